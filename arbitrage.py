@@ -0,0 +1,186 @@
+"""
+🏦 SKANER ARBITRAŻU - parytet put-call, box spready, konwersje i rewersale
+Bierze cały łańcuch opcji (bid/ask dla każdego strike'a i terminu) i szuka
+okazji wolnych od ryzyka po kosztach spreadu bid-ask i prowizjach:
+
+    Conversion  - long akcja + long put + short call: K·DF - (S_ask + P_ask - C_bid)
+    Reversal    - short akcja + short put + long call: (S_bid + P_bid - C_ask) - K·DF
+    Long Box    - long call K1, short call K2, long put K2, short put K1: (K2 - K1)·DF - koszt
+    Short Box   - odwrotnie: wpływ - (K2 - K1)·DF
+
+Łańcuch jest raz rozkładany na tablice (termin, strike) z ceną call i put;
+box spready liczone są wektorowo na wszystkich parach strike'ów terminu
+(indeksy górnego trójkąta), bez pętli po parach. Opcje europejskie, DF
+z krzywej stóp aplikacji.
+
+Użycie:
+    python arbitrage.py lancuch.csv --S 100.02 100.05
+    python arbitrage.py lancuch.csv --co 1          # ponowny skan po każdej zmianie pliku
+Łańcuch: kolumny dni, K, typ (call/put), bid, ask; wiersz typ=akcja (bid, ask)
+może zastąpić --S.
+"""
+import argparse
+import os
+import time
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from options import KRZYWA, stopa_dla
+
+MNOZNIK = 100  # akcji na kontrakt
+
+# ══════════════════════════════════════════════════════════════════════════════
+# ŁAŃCUCH
+# ══════════════════════════════════════════════════════════════════════════════
+def wczytaj_lancuch(sciezka):
+    if sciezka.lower().endswith((".jsonl", ".json")):
+        return pd.read_json(sciezka, lines=True)
+    return pd.read_csv(sciezka)
+
+
+def rozloz_lancuch(lancuch):
+    """Łańcuch jako tablice po (termin, strike) - posortowane, z granicami terminów
+
+    Brakujące notowania to NaN; strike'i bez obu stron (call i put) zostają,
+    ale nie biorą udziału w żadnej okazji.
+    """
+    typ = lancuch["typ"].astype(str).str.lower().to_numpy()
+    opcje = typ != "akcja"
+    dni = lancuch["dni"].to_numpy(float)[opcje]
+    K = lancuch["K"].to_numpy(float)[opcje]
+    bid = lancuch["bid"].to_numpy(float)[opcje]
+    ask = lancuch["ask"].to_numpy(float)[opcje]
+    call = typ[opcje] == "call"
+
+    klucze, inv = np.unique(np.stack([dni, K], axis=1), axis=0, return_inverse=True)
+    inv = inv.ravel()
+    tablice = {"dni": klucze[:, 0], "K": klucze[:, 1]}
+    for nazwa, maska in (("C", call), ("P", ~call)):
+        for strona, wartosci in (("bid", bid), ("ask", ask)):
+            t = np.full(len(klucze), np.nan)
+            t[inv[maska]] = wartosci[maska]
+            tablice[f"{nazwa}_{strona}"] = t
+    terminy, poczatki = np.unique(tablice["dni"], return_index=True)
+    tablice["granice"] = np.append(poczatki, len(klucze))
+    tablice["terminy"] = terminy
+
+    akcja = lancuch[typ == "akcja"]
+    tablice["S"] = (float(akcja["bid"].iloc[-1]), float(akcja["ask"].iloc[-1])) if len(akcja) else None
+    return tablice
+
+
+@lru_cache(maxsize=64)
+def _pary(n):
+    """Indeksy par strike'ów (i < j) dla terminu z n strike'ami - wspólne dla kolejnych migawek"""
+    return np.triu_indices(n, 1)
+
+# ══════════════════════════════════════════════════════════════════════════════
+# SKAN
+# ══════════════════════════════════════════════════════════════════════════════
+def parytet(tablice, S_bid, S_ask, r=None):
+    """Odchylenie od parytetu put-call na midach i pasmo braku arbitrażu z bid-ask
+
+    odchylenie = (C - P) - (S - K·DF); arbitraż istnieje, gdy odchylenie wychodzi
+    poza pasmo wyznaczone przez spready wszystkich trzech instrumentów:
+    zysk conversion = odchylenie - pasmo, zysk reversal = -odchylenie - pasmo.
+    """
+    r = KRZYWA if r is None else r
+    T = tablice["dni"] / 365
+    DF = np.exp(-np.asarray(stopa_dla(r, T)) * T)
+    C = 0.5 * (tablice["C_bid"] + tablice["C_ask"])
+    P = 0.5 * (tablice["P_bid"] + tablice["P_ask"])
+    pasmo = 0.5 * ((tablice["C_ask"] - tablice["C_bid"]) + (tablice["P_ask"] - tablice["P_bid"]) + (S_ask - S_bid))
+    df = pd.DataFrame({"dni": tablice["dni"], "K": tablice["K"], "K_DF": tablice["K"] * DF,
+                       "odchylenie": (C - P) - (0.5 * (S_bid + S_ask) - tablice["K"] * DF), "pasmo": pasmo})
+    return df.dropna(ignore_index=True)
+
+
+def skanuj(lancuch, S_bid=None, S_ask=None, r=None, prowizja=0.0, min_zysk=0.0):
+    """Okazje arbitrażowe w całym łańcuchu, od najbardziej zyskownej
+
+    lancuch   - DataFrame albo wynik rozloz_lancuch()
+    prowizja  - koszt jednej nogi na akcję (odejmowany od zysku)
+    min_zysk  - próg zysku na akcję (wartość bieżąca)
+    Zysk i przepływ dziś (+ = wpływ) są na akcję; zysk_kontrakt - na 1 kontrakt.
+    """
+    r = KRZYWA if r is None else r
+    t = lancuch if isinstance(lancuch, dict) else rozloz_lancuch(lancuch)
+    if S_bid is None:
+        if t["S"] is None:
+            raise ValueError("Brak notowania akcji - podaj S_bid/S_ask albo wiersz typ=akcja")
+        S_bid, S_ask = t["S"]
+    S_ask = S_bid if S_ask is None else S_ask
+
+    DF_terminu = np.exp(-np.asarray(stopa_dla(r, t["terminy"] / 365)) * t["terminy"] / 365)
+    K = t["K"]
+    okazje = []
+
+    # Konwersje i rewersale - naruszenia parytetu put-call poza pasmem bid-ask, każdy strike osobno
+    p = parytet(t, S_bid, S_ask, r)
+    for nazwa, znak in (("Conversion", 1), ("Reversal", -1)):
+        z = znak * p["odchylenie"] - p["pasmo"]
+        przeplyw = z - znak * p["K_DF"]  # conversion: C_bid - P_ask - S_ask, reversal: S_bid + P_bid - C_ask
+        z = z - 3 * prowizja
+        m = (z > min_zysk).to_numpy()
+        okazje.append(pd.DataFrame({"strategia": nazwa, "dni": p["dni"][m], "K1": p["K"][m], "K2": p["K"][m],
+                                    "przeplyw_dzis": przeplyw[m], "zysk": z[m]}))
+
+    # Box spready - wszystkie pary strike'ów terminu naraz
+    for e in range(len(t["terminy"])):
+        a, b = t["granice"][e], t["granice"][e + 1]
+        pelne = np.flatnonzero(np.isfinite(t["C_bid"][a:b] + t["C_ask"][a:b] + t["P_bid"][a:b] + t["P_ask"][a:b])) + a
+        if len(pelne) < 2:
+            continue
+        i, j = _pary(len(pelne))
+        i, j = pelne[i], pelne[j]
+        wartosc = (K[j] - K[i]) * DF_terminu[e]
+        przeplyw_long = -(t["C_ask"][i] - t["C_bid"][j] + t["P_ask"][j] - t["P_bid"][i])
+        przeplyw_short = t["C_bid"][i] - t["C_ask"][j] + t["P_bid"][j] - t["P_ask"][i]
+        for nazwa, p, z in (("Long Box", przeplyw_long, wartosc + przeplyw_long),
+                            ("Short Box", przeplyw_short, przeplyw_short - wartosc)):
+            z = z - 4 * prowizja
+            m = z > min_zysk
+            if m.any():
+                okazje.append(pd.DataFrame({"strategia": nazwa, "dni": t["terminy"][e], "K1": K[i][m], "K2": K[j][m],
+                                            "przeplyw_dzis": p[m], "zysk": z[m]}))
+
+    wynik = pd.concat(okazje, ignore_index=True)
+    wynik["zysk_kontrakt"] = wynik["zysk"] * MNOZNIK
+    return wynik.sort_values("zysk", ascending=False, ignore_index=True)
+
+
+def obserwuj(sciezka, co=1.0, S=None, **opcje):
+    """Skan przy każdej zmianie pliku łańcucha (migawki co `co` sekund)"""
+    ostatni = None
+    while True:
+        zmiana = os.stat(sciezka).st_mtime_ns
+        if zmiana != ostatni:
+            ostatni = zmiana
+            start = time.perf_counter()
+            okazje = skanuj(wczytaj_lancuch(sciezka), *(S or (None, None)), **opcje)
+            czas = (time.perf_counter() - start) * 1000
+            print(f"\n🏦 {time.strftime('%H:%M:%S')} | {len(okazje)} okazji | skan {czas:.1f} ms")
+            print(okazje.head(10).to_string(index=False))
+        time.sleep(co)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Skaner arbitrażu parytetu put-call i box spreadów")
+    parser.add_argument("lancuch", help="Łańcuch opcji (CSV/JSONL): dni, K, typ, bid, ask")
+    parser.add_argument("--S", type=float, nargs=2, metavar=("BID", "ASK"), help="Notowanie akcji")
+    parser.add_argument("--prowizja", type=float, default=0.0, help="Koszt nogi na akcję")
+    parser.add_argument("--min-zysk", type=float, default=0.0, help="Minimalny zysk na akcję")
+    parser.add_argument("--co", type=float, help="Obserwuj plik - sprawdzanie zmian co N sekund")
+    parser.add_argument("-n", "--ile", type=int, default=20, help="Ile najlepszych okazji pokazać")
+    args = parser.parse_args()
+
+    if args.co:
+        obserwuj(args.lancuch, args.co, args.S, prowizja=args.prowizja, min_zysk=args.min_zysk)
+    else:
+        start = time.perf_counter()
+        okazje = skanuj(wczytaj_lancuch(args.lancuch), *(args.S or (None, None)), prowizja=args.prowizja,
+                        min_zysk=args.min_zysk)
+        print(f"🏦 {len(okazje)} okazji ({(time.perf_counter() - start) * 1000:.1f} ms)")
+        print(okazje.head(args.ile).to_string(index=False))
@@ -0,0 +1,170 @@
+"""
+🧾 ATRYBUCJA P&L - ile wyniku dała delta, gamma, theta i vega
+Dla książki pozycji i szeregu notowań (spot i IV każdego instrumentu) dzieli
+zmianę wartości w każdym kroku na składniki z Greeks na początku kroku:
+
+    ΔV ≈ Δ·dS + ½Γ·dS² + Θ·dt + vega·dIV [+ vanna·dS·dIV + ½volga·dIV²] + reszta
+
+ΔV liczona jest pełną rewaluacją (bs() na płaskich nogach), więc reszta to
+dokładnie to, czego Greeks nie wyjaśniają (duże ruchy, skoki, zmiana stóp).
+Wszystkie kroki i nogi liczone są naraz - jedna wycena na typ opcji dla
+macierzy (kroki × nogi); przy dużych książkach pozycje idą partiami.
+
+Użycie:
+    python attribution.py pozycje.csv szereg.csv
+    python attribution.py pozycje.csv szereg.csv --wyzsze -o atrybucja.csv
+Pozycje jak w feed.py (dni - do wygaśnięcia w pierwszym dniu szeregu).
+Szereg: kolumny data, symbol, S, iv (brakujące dni - ostatnia wartość).
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from options import NOGI, KRZYWA, bs, stopa_dla
+
+MNOZNIK = 100  # akcji na kontrakt
+SKLADNIKI = ("delta", "gamma", "theta", "vega")
+SKLADNIKI_WYZSZE = ("vanna", "volga")
+
+# ══════════════════════════════════════════════════════════════════════════════
+# DANE
+# ══════════════════════════════════════════════════════════════════════════════
+def wczytaj_szereg(szereg, symbole):
+    """Szereg długi (data, symbol, S, iv) -> daty i macierze (dni × symbole)"""
+    df = szereg.assign(data=pd.to_datetime(szereg["data"]), symbol=szereg["symbol"].astype(str))
+    brak = set(symbole) - set(df["symbol"])
+    if brak:
+        raise KeyError(f"Brak notowań dla: {', '.join(sorted(brak))}")
+    S = df.pivot_table(index="data", columns="symbol", values="S", aggfunc="last").ffill()[symbole]
+    iv = df.pivot_table(index="data", columns="symbol", values="iv", aggfunc="last").ffill()[symbole]
+    dni = ((S.index - S.index[0]).days).to_numpy(float)
+    return S.index, dni, S.to_numpy(float), iv.to_numpy(float)
+
+
+def splaszcz(pozycje, symbole):
+    """Nogi książki w kolejności pozycji - tablice do wyceny macierzowej"""
+    indeks = {s: u for u, s in enumerate(symbole)}
+    poz, u, K, T, waga, call = [], [], [], [], [], []
+    akcje = np.zeros(len(pozycje))
+    u_poz = np.empty(len(pozycje), dtype=np.intp)
+    for i, w in enumerate(pozycje.to_dict("records")):
+        if w["strategia"] not in NOGI:
+            raise KeyError(f"Nieznana strategia: {w['strategia']}")
+        ilosc = float(w["ilosc"]) * MNOZNIK
+        u_poz[i] = indeks[str(w["symbol"])]
+        for n in NOGI[w["strategia"]]:
+            if n.typ == "akcja":
+                akcje[i] += n.ilosc * ilosc
+                continue
+            poz.append(i)
+            u.append(u_poz[i])
+            K.append(float(w[n.strike]))
+            T.append(n.termin * float(w["dni"]) / 365)
+            waga.append(n.ilosc * ilosc)
+            call.append(n.typ == "call")
+    return {"poz": np.array(poz, dtype=np.intp), "u": np.array(u, dtype=np.intp), "K": np.array(K),
+            "T": np.array(T), "waga": np.array(waga), "call": np.array(call, dtype=bool),
+            "akcje": akcje, "u_poz": u_poz}
+
+# ══════════════════════════════════════════════════════════════════════════════
+# ATRYBUCJA
+# ══════════════════════════════════════════════════════════════════════════════
+def _atrybucja_nog(nogi, m, dni, S, iv, r, wyzsze, model):
+    """Składniki P&L wybranych nóg - macierze (kroki × nogi), już z wagami"""
+    u, K, waga, call = nogi["u"][m], nogi["K"][m], nogi["waga"][m], nogi["call"][m]
+    T = nogi["T"][m] - dni[:, None] / 365
+    S_n, iv_n = S[:, u], iv[:, u]
+    r_n = np.broadcast_to(stopa_dla(r, np.maximum(T, 0.0)), T.shape)
+
+    pola = ("cena",) + SKLADNIKI + (SKLADNIKI_WYZSZE if wyzsze else ())
+    g = {k: np.empty(T.shape) for k in pola}
+    opcje_modelu = {"wyzsze": True} if wyzsze else {}
+    for typ, kol in (("call", call), ("put", ~call)):
+        if kol.any():
+            wycena = model(S_n[:, kol], K[kol], T[:, kol], r_n[:, kol], iv_n[:, kol], typ, **opcje_modelu)
+            for k in pola:
+                g[k][:, kol] = wycena[k]
+
+    dS, dIV, dt = np.diff(S_n, axis=0), np.diff(iv_n, axis=0) * 100, np.diff(dni)[:, None]
+    aktywne = (T[:-1] > 0) * waga  # po wygaśnięciu noga nie zmienia wartości
+    skladniki = {
+        "pnl": np.diff(g["cena"], axis=0) * aktywne,
+        "delta": g["delta"][:-1] * dS * aktywne,
+        "gamma": 0.5 * g["gamma"][:-1] * dS**2 * aktywne,
+        "theta": g["theta"][:-1] * dt * aktywne,
+        "vega": g["vega"][:-1] * dIV * aktywne,
+    }
+    if wyzsze:
+        skladniki["vanna"] = g["vanna"][:-1] * dS * dIV * aktywne
+        skladniki["volga"] = 0.5 * g["volga"][:-1] * dIV**2 * aktywne
+    return skladniki
+
+
+def atrybucja(pozycje, szereg, r=None, wyzsze=False, partia=2_000_000, model=bs):
+    """Rozkład P&L każdej pozycji w każdym kroku szeregu na składniki z Greeks i resztę
+
+    Zwraca daty końca kroków i słownik macierzy (kroki × pozycje) w PLN:
+    pnl (pełna rewaluacja), delta, gamma, theta, vega [vanna, volga], reszta.
+    partia - limit elementów (kroki × nogi) jednej wyceny.
+    """
+    r = KRZYWA if r is None else r
+    pozycje = pozycje.reset_index(drop=True)
+    symbole = list(dict.fromkeys(pozycje["symbol"].astype(str)))
+    daty, dni, S, iv = wczytaj_szereg(szereg, symbole)
+    nogi = splaszcz(pozycje, symbole)
+
+    pola = ("pnl",) + SKLADNIKI + (SKLADNIKI_WYZSZE if wyzsze else ())
+    wynik = {k: np.zeros((len(dni) - 1, len(pozycje))) for k in pola}
+    dS_poz = np.diff(S, axis=0)[:, nogi["u_poz"]] * nogi["akcje"]
+    wynik["pnl"] += dS_poz
+    wynik["delta"] += dS_poz
+
+    # Partie pozycji - nogi są w kolejności pozycji, więc partia to ciągły zakres nóg
+    na_partie = max(1, partia // max(len(dni), 1))
+    granice = np.searchsorted(nogi["poz"], np.arange(0, len(pozycje) + na_partie, na_partie))
+    for a, b in zip(granice[:-1], granice[1:]):
+        if a == b:
+            continue
+        m = slice(a, b)
+        skladniki = _atrybucja_nog(nogi, m, dni, S, iv, r, wyzsze, model)
+        poz = nogi["poz"][m]
+        for k, v in skladniki.items():
+            _sumuj(wynik[k], poz, v)
+
+    wynik["reszta"] = wynik["pnl"] - sum(wynik[k] for k in pola if k != "pnl")
+    return daty[1:], wynik
+
+
+def _sumuj(cel, poz, v):
+    """cel[:, p] += suma kolumn v nóg pozycji p - nogi posortowane po pozycji"""
+    pozycje, poczatki = np.unique(poz, return_index=True)
+    cel[:, pozycje] += np.add.reduceat(v, poczatki, axis=1)
+
+
+def podsumowanie(daty, wynik):
+    """Sumy składników: w czasie (cała książka) i na pozycję (cały okres)"""
+    w_czasie = pd.DataFrame({k: v.sum(axis=1) for k, v in wynik.items()}, index=daty)
+    na_pozycje = pd.DataFrame({k: v.sum(axis=0) for k, v in wynik.items()})
+    return w_czasie, na_pozycje
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Atrybucja P&L książki na Greeks z szeregu spot/IV")
+    parser.add_argument("pozycje", help="Plik pozycji (CSV)")
+    parser.add_argument("szereg", help="Szereg notowań (CSV): data, symbol, S, iv")
+    parser.add_argument("--wyzsze", action="store_true", help="Dodaj składniki vanna i volga")
+    parser.add_argument("-o", "--wyjscie", help="CSV z atrybucją książki dzień po dniu")
+    args = parser.parse_args()
+
+    pozycje = pd.read_csv(args.pozycje)
+    start = time.time()
+    daty, wynik = atrybucja(pozycje, pd.read_csv(args.szereg), wyzsze=args.wyzsze)
+    w_czasie, na_pozycje = podsumowanie(daty, wynik)
+    print(f"🧾 {len(pozycje)} pozycji × {len(daty)} kroków ({time.time() - start:.1f} s)")
+    razem = w_czasie.sum()
+    print("   " + " | ".join(f"{k}: {v:,.0f}" for k, v in razem.items()) + " PLN")
+    print(f"   reszta / |P&L| dziennie: {w_czasie['reszta'].abs().sum() / w_czasie['pnl'].abs().sum():.1%}")
+    if args.wyjscie:
+        w_czasie.rename_axis("data").to_csv(args.wyjscie)
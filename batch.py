@@ -0,0 +1,172 @@
+"""
+📦 WSADOWA OCENA STRATEGII - wiersz poleceń
+Czyta plik konfiguracji (CSV / JSONL / Parquet), liczy dla każdego wiersza koszt,
+Greeks (z --wyzsze także rho, vanna, volga, charm, speed), breakeveny, max zysk/stratę,
+POP, oczekiwany P&L i scenariusze P&L, a wyniki zapisuje strumieniowo do CSV lub
+Parquet - pamięć nie rośnie z rozmiarem wejścia.
+
+Kolumny wejścia:
+    strategia           nazwa z STRATEGIE
+    S, sigma, dni       cena aktywa, zmienność (ułamek, 0.3 = 30%), dni do wygaśnięcia
+    K, K1..K4, K_put, K_call, K_low, K_mid, K_high - strike'i wymagane przez strategię
+
+Użycie:
+    python batch.py pozycje.csv -o wyniki.csv --procesy 8
+    python batch.py pozycje.parquet -o wyniki.parquet --partia 50000
+
+Wartości są na 1 akcję (jak w get_payoff); wykres w aplikacji mnoży je przez 100.
+Parquet wymaga pakietu pyarrow (opcjonalny - CSV i JSONL działają bez niego).
+"""
+import argparse
+import importlib.util
+import os
+import sys
+import time
+from collections import deque
+import multiprocessing as mp
+
+import numpy as np
+import pandas as pd
+
+from options import NOGI, GREEKS_WYZSZE, wycen_strategie, analiza_wygasniecia, breakeveny
+
+SCENARIUSZE = (-0.2, -0.1, 0.0, 0.1, 0.2)
+
+# ══════════════════════════════════════════════════════════════════════════════
+# OBLICZENIA
+# ══════════════════════════════════════════════════════════════════════════════
+def ocen_partie(df, punkty=300, wyzsze=False):
+    """Wyniki dla jednej partii konfiguracji - DataFrame tej samej długości"""
+    n = len(df)
+    pola_greeks = ("delta", "gamma", "theta", "vega") + (GREEKS_WYZSZE if wyzsze else ())
+    wynik = {k: np.full(n, np.nan) for k in ("koszt", *pola_greeks,
+                                              "be_1", "be_2", "max_zysk", "max_strata", "pop", "ev")}
+    for s in SCENARIUSZE:
+        wynik[f"pnl_{s:+.0%}"] = np.full(n, np.nan)
+    blad = np.full(n, "", dtype=object)
+
+    siatka = np.linspace(0.5, 1.5, punkty)
+    for nazwa, idx in df.groupby("strategia", sort=False).indices.items():
+        if nazwa not in NOGI:
+            blad[idx] = "nieznana strategia"
+            continue
+        wiersze = df.iloc[idx]
+        S = wiersze["S"].to_numpy(float)
+        T = wiersze["dni"].to_numpy(float) / 365
+        σ = wiersze["sigma"].to_numpy(float)
+        params = {}
+        for noga in NOGI[nazwa]:
+            if noga.strike and noga.strike not in params:
+                params[noga.strike] = (wiersze[noga.strike].to_numpy(float) if noga.strike in wiersze
+                                       else np.full(len(idx), np.nan))
+        brak = ~np.isfinite(np.column_stack([S, T, σ, *params.values()])).all(axis=1)
+        blad[idx[brak]] = "brak parametrów"
+
+        x = S[:, None] * siatka
+        y, koszt, greeks = wycen_strategie(nazwa, x, S, params, T, σ, wyzsze=wyzsze)
+        wynik["koszt"][idx] = koszt
+        for k in pola_greeks:
+            wynik[k][idx] = greeks[k]
+        wynik["max_zysk"][idx] = y.max(axis=1)
+        wynik["max_strata"][idx] = y.min(axis=1)
+        be = breakeveny(x, y)
+        wynik["be_1"][idx], wynik["be_2"][idx] = be[:, 0], be[:, 1]
+
+        analiza = analiza_wygasniecia(nazwa, S, params, T, σ)
+        wynik["pop"][idx], wynik["ev"][idx] = analiza["pop"], analiza["ev"]
+
+        y_scen, _, _ = wycen_strategie(nazwa, S[:, None] * (1 + np.array(SCENARIUSZE)), S, params, T, σ)
+        for j, s in enumerate(SCENARIUSZE):
+            wynik[f"pnl_{s:+.0%}"][idx] = y_scen[:, j]
+
+    out = pd.DataFrame(wynik, index=df.index)
+    out.insert(0, "strategia", df["strategia"].to_numpy())
+    out["blad"] = blad
+    return out
+
+# ══════════════════════════════════════════════════════════════════════════════
+# WEJŚCIE / WYJŚCIE STRUMIENIOWE
+# ══════════════════════════════════════════════════════════════════════════════
+def czytaj_partie(sciezka, rozmiar):
+    """Generator partii wejścia - nigdy nie trzyma całego pliku w pamięci"""
+    rozszerzenie = os.path.splitext(sciezka)[1].lower()
+    if rozszerzenie == ".parquet":
+        import pyarrow.parquet as pq
+        for b in pq.ParquetFile(sciezka).iter_batches(batch_size=rozmiar):
+            yield b.to_pandas()
+    elif rozszerzenie in (".jsonl", ".json"):
+        yield from pd.read_json(sciezka, lines=True, chunksize=rozmiar)
+    else:
+        yield from pd.read_csv(sciezka, chunksize=rozmiar)
+
+
+class Zapis:
+    """Dopisywanie kolejnych partii do CSV albo Parquet"""
+
+    def __init__(self, sciezka):
+        self.sciezka = sciezka
+        self.parquet = sciezka.lower().endswith(".parquet")
+        self._writer = None
+        self._plik = None
+
+    def dopisz(self, df):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            tabela = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.sciezka, tabela.schema)
+            self._writer.write_table(tabela)
+        else:
+            if self._plik is None:
+                self._plik = open(self.sciezka, "w", newline="")
+                df.to_csv(self._plik, index=False)
+            else:
+                df.to_csv(self._plik, index=False, header=False)
+
+    def zamknij(self):
+        if self._writer is not None:
+            self._writer.close()
+        if self._plik is not None:
+            self._plik.close()
+
+
+def uruchom(wejscie, wyjscie, procesy, rozmiar, punkty, wyzsze=False):
+    """Przetwarza plik partiami w puli procesów, zachowując kolejność wierszy"""
+    zapis = Zapis(wyjscie)
+    w_locie = deque()
+    wierszy = 0
+    start = time.time()
+    try:
+        with mp.Pool(procesy) as pula:
+            for partia in czytaj_partie(wejscie, rozmiar):
+                w_locie.append(pula.apply_async(ocen_partie, (partia, punkty, wyzsze)))
+                # Ograniczona liczba partii w locie - stała pamięć przy dowolnym wejściu
+                while len(w_locie) > 2 * procesy:
+                    wynik = w_locie.popleft().get()
+                    zapis.dopisz(wynik)
+                    wierszy += len(wynik)
+            while w_locie:
+                wynik = w_locie.popleft().get()
+                zapis.dopisz(wynik)
+                wierszy += len(wynik)
+    finally:
+        zapis.zamknij()
+    czas = time.time() - start
+    print(f"✅ {wierszy} konfiguracji w {czas:.1f} s ({wierszy / max(czas, 1e-9):.0f}/s) -> {wyjscie}", file=sys.stderr)
+    return wierszy
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Wsadowa ocena strategii opcyjnych")
+    parser.add_argument("wejscie", help="Plik konfiguracji: .csv, .jsonl lub .parquet")
+    parser.add_argument("-o", "--wyjscie", required=True, help="Plik wyników: .csv lub .parquet")
+    parser.add_argument("--procesy", type=int, default=os.cpu_count(), help="Liczba procesów roboczych")
+    parser.add_argument("--partia", type=int, default=20000, help="Wierszy na partię")
+    parser.add_argument("--punkty", type=int, default=300, help="Punkty siatki cen (jak w aplikacji)")
+    parser.add_argument("--wyzsze", action="store_true", help="Dodaj rho, vanna, volga, charm i speed")
+    args = parser.parse_args()
+    if any(p.lower().endswith(".parquet") for p in (args.wejscie, args.wyjscie)) \
+            and importlib.util.find_spec("pyarrow") is None:
+        parser.error("Pliki .parquet wymagają pakietu pyarrow (pip install pyarrow)")
+    uruchom(args.wejscie, args.wyjscie, args.procesy, args.partia, args.punkty, args.wyzsze)
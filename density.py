@@ -0,0 +1,183 @@
+"""
+🔔 GĘSTOŚĆ RYZYKA-NEUTRALNA - rozkład ceny przy wygaśnięciu z łańcucha opcji
+Cena motyla (Long Call Butterfly) o szerokości h to h² razy gęstość w jego
+środku (Breeden-Litzenberger): q(K) = e^(rT) · ∂²C/∂K². Silnik liczy drugie
+różnice cen call na gęstej siatce strike'ów naraz:
+
+    kwotowania OTM -> zmienności implikowane -> wygładzony uśmiech (splajn
+    wariancji całkowitej w log-moneyness) -> ceny call na siatce ->
+    druga różnica -> naprawa arbitrażu (ujemna masa = 0, normalizacja)
+
+Gęstość zamienia wycenę dowolnej strategii z STRATEGIE na iloczyn skalarny:
+payoff na siatce · wagi. Macierz payoffów tysięcy strategii mnożona jest
+przez jeden wektor wag - jedna gęstość, jedno mnożenie macierzy.
+
+Użycie:
+    python density.py lancuch.csv --S 100 --dni 30
+Łańcuch jak w arbitrage.py (dni, K, typ, bid, ask).
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+from scipy.interpolate import UnivariateSpline
+
+from options import KRZYWA, NOGI, bs, stopa_dla
+
+# ══════════════════════════════════════════════════════════════════════════════
+# ZMIENNOŚĆ IMPLIKOWANA I UŚMIECH
+# ══════════════════════════════════════════════════════════════════════════════
+def zmiennosc_implikowana(cena, S, K, T, r, typ, iteracje=60):
+    """Wektorowa bisekcja na bs() - wszystkie kwotowania naraz; poza granicami arbitrażu NaN"""
+    cena, K = np.asarray(cena, dtype=float), np.asarray(K, dtype=float)
+    call = np.asarray(typ) == "call"
+    dol, gora = np.full(cena.shape, 1e-3), np.full(cena.shape, 5.0)
+    for _ in range(iteracje):
+        srodek = 0.5 * (dol + gora)
+        c = np.where(call, bs(S, K, T, r, srodek, "call")["cena"], bs(S, K, T, r, srodek, "put")["cena"])
+        za_drogo = c > cena
+        gora = np.where(za_drogo, srodek, gora)
+        dol = np.where(za_drogo, dol, srodek)
+    iv = 0.5 * (dol + gora)
+    return np.where((iv > 1.1e-3) & (iv < 4.99), iv, np.nan)
+
+
+def usmiech(K, iv, S, T, wygladzenie=None):
+    """Wygładzony uśmiech σ(K): splajn wariancji całkowitej w ln(K/S), poza danymi stały"""
+    k = np.log(np.asarray(K, dtype=float) / S)
+    w = np.asarray(iv, dtype=float)**2 * T
+    m = np.isfinite(w)
+    k, w = k[m], w[m]
+    kolejnosc = np.argsort(k)
+    k, w = k[kolejnosc], w[kolejnosc]
+    s = len(k) * (0.1 * w.mean())**2 if wygladzenie is None else wygladzenie
+    splajn = UnivariateSpline(k, w, k=3, s=s, ext=3)
+    return lambda K_: np.sqrt(np.maximum(splajn(np.log(np.asarray(K_, dtype=float) / S)), 1e-8) / T)
+
+# ══════════════════════════════════════════════════════════════════════════════
+# GĘSTOŚĆ
+# ══════════════════════════════════════════════════════════════════════════════
+def _payoff_opcji(nogi, x, params):
+    """Wartość nóg opcyjnych przy wygaśnięciu na siatce x - (warianty params, len(x))"""
+    wartosc = np.zeros_like(x)
+    for n in nogi:
+        if n.typ == "akcja":
+            continue
+        K = np.asarray(params[n.strike], dtype=float)[..., None]
+        wartosc = wartosc + n.ilosc * (np.maximum(x - K, 0) if n.typ == "call" else np.maximum(K - x, 0))
+    return np.atleast_2d(wartosc)
+
+
+class Gestosc:
+    """Dyskretny rozkład ceny przy wygaśnięciu: siatka x i masy prawdopodobieństwa wagi"""
+
+    def __init__(self, x, wagi, S, T, r, naprawiona_masa=0.0):
+        niezerowe = wagi > 1e-15 * wagi.max()  # ogony bez masy nie wnoszą nic do iloczynów
+        self.x, self.wagi = x[niezerowe], wagi[niezerowe]
+        self.S, self.T, self.r = S, T, r
+        self.DF = float(np.exp(-r * T))
+        self.naprawiona_masa = naprawiona_masa  # masa ujemna usunięta przy naprawie
+
+    @classmethod
+    def z_cen_call(cls, S, T, r, K, C):
+        """Breeden-Litzenberger na równej siatce K: druga różnica cen call, naprawa, normalizacja"""
+        h = K[1] - K[0]
+        q = np.exp(r * T) * np.diff(C, 2) / h**2
+        ujemna = float(-q[q < 0].sum() * h)
+        q = np.maximum(q, 0.0)
+        return cls(K[1:-1], q / q.sum(), S, T, r, ujemna)
+
+    @classmethod
+    def z_modelu(cls, model, S, T, σ=0.0, r=None, punkty=2001, zakres=6.0):
+        """Gęstość dowolnego modelu wywoływalnego jak bs() (np. Heston z fft_pricing)"""
+        r = float(stopa_dla(KRZYWA if r is None else r, T))
+        szerokosc = zakres * max(σ, 0.2) * np.sqrt(T)
+        K = np.linspace(S * np.exp(-szerokosc), S * np.exp(szerokosc), punkty)
+        return cls.z_cen_call(S, T, r, K, model(S, K, T, r, σ, "call")["cena"])
+
+    @classmethod
+    def z_usmiechu(cls, iv, S, T, r=None, punkty=2001, zakres=6.0):
+        """Gęstość z uśmiechu σ(K) (funkcja) - ceny call przez bs() na siatce"""
+        r = float(stopa_dla(KRZYWA if r is None else r, T))
+        szerokosc = zakres * max(float(iv(S)), 0.05) * np.sqrt(T)
+        K = np.linspace(S * np.exp(-szerokosc), S * np.exp(szerokosc), punkty)
+        return cls.z_cen_call(S, T, r, K, bs(S, K, T, r, iv(K), "call")["cena"])
+
+    @classmethod
+    def z_lancucha(cls, lancuch, S, dni, r=None, wygladzenie=None, punkty=2001):
+        """Gęstość terminu `dni` z midów OTM łańcucha (put poniżej S, call powyżej)"""
+        T = dni / 365
+        r_T = float(stopa_dla(KRZYWA if r is None else r, T))
+        df = lancuch[(lancuch["dni"] == dni) & lancuch["typ"].astype(str).str.lower().isin(["call", "put"])]
+        df = df.assign(mid=0.5 * (df["bid"] + df["ask"]), typ=df["typ"].str.lower())
+        df = df[(((df["typ"] == "call") & (df["K"] >= S)) | ((df["typ"] == "put") & (df["K"] < S))) & (df["mid"] > 0)]
+        if len(df) < 5:
+            raise ValueError(f"Za mało kwotowań OTM dla terminu {dni} dni: {len(df)}")
+        iv = zmiennosc_implikowana(df["mid"].to_numpy(float), S, df["K"].to_numpy(float), T, r_T, df["typ"].to_numpy())
+        return cls.z_usmiechu(usmiech(df["K"].to_numpy(float), iv, S, T, wygladzenie), S, T, r_T, punkty)
+
+    # ── Statystyki ──────────────────────────────────────────────────────────────
+    def oczekiwana(self, y):
+        """E[y(X)] - y to wartości na siatce (…, len(x)); jeden iloczyn skalarny na wiersz"""
+        return np.asarray(y) @ self.wagi
+
+    def statystyki(self):
+        srednia = float(self.wagi @ self.x)
+        odch = float(np.sqrt(self.wagi @ (self.x - srednia)**2))
+        z = (self.x - srednia) / odch
+        dystrybuanta = np.cumsum(self.wagi)
+        kwantyl = lambda p: float(np.interp(p, dystrybuanta, self.x))
+        return {"srednia": srednia, "forward": self.S / self.DF, "odchylenie": odch,
+                "skosnosc": float(self.wagi @ z**3), "kurtoza": float(self.wagi @ z**4 - 3),
+                "p5": kwantyl(0.05), "mediana": kwantyl(0.5), "p95": kwantyl(0.95),
+                "naprawiona_masa": self.naprawiona_masa}
+
+    # ── Strategie ───────────────────────────────────────────────────────────────
+    def wycen_strategie(self, nazwy, params_lista, koszt=None):
+        """Wycena wielu strategii z gęstości - macierz payoffów (strategie × siatka) @ wagi
+
+        params_lista - słowniki strike'ów (wartości mogą być tablicami: wiele
+        wariantów jednej strategii naraz). Cena to wartość dziś nóg opcyjnych
+        (na akcję, jak koszt w wycen_strategie); oczekiwany P&L i szansa zysku
+        (POP) liczone są jak payoff aplikacji - od podanego kosztu, domyślnie ceny.
+        """
+        wyniki = {"cena": [], "ev": [], "pop": []}
+        koszty = [None] * len(nazwy) if koszt is None else koszt
+        for nazwa, params, k in zip(nazwy, params_lista, koszty):
+            nogi = NOGI[nazwa]
+            if any(n.termin != 1.0 for n in nogi):
+                raise ValueError(f"{nazwa}: nogi o różnych terminach - gęstość opisuje jeden termin")
+            akcje = sum(n.ilosc for n in nogi if n.typ == "akcja")
+            payoff = _payoff_opcji(nogi, self.x, params)
+            cena = self.DF * (payoff @ self.wagi)
+            k = cena if k is None else np.asarray(k, dtype=float)
+            pnl = payoff + akcje * (self.x - self.S) - np.asarray(k)[..., None]
+            wyniki["cena"].append(cena)
+            wyniki["ev"].append(pnl @ self.wagi)
+            wyniki["pop"].append((pnl > 0) @ self.wagi)
+        return {n: np.concatenate([np.ravel(v) for v in w]) for n, w in wyniki.items()}
+
+
+if __name__ == "__main__":
+    from arbitrage import wczytaj_lancuch
+    from options import REJESTR, macierz_strategii
+
+    parser = argparse.ArgumentParser(description="Gęstość ryzyka-neutralna z łańcucha opcji (Breeden-Litzenberger)")
+    parser.add_argument("lancuch", help="Łańcuch opcji (CSV/JSONL): dni, K, typ, bid, ask")
+    parser.add_argument("--S", type=float, required=True, help="Cena aktywa")
+    parser.add_argument("--dni", type=int, required=True, help="Termin z łańcucha")
+    parser.add_argument("--wygladzenie", type=float, help="Parametr s splajnu uśmiechu (domyślnie automatycznie)")
+    args = parser.parse_args()
+
+    g = Gestosc.z_lancucha(wczytaj_lancuch(args.lancuch), args.S, args.dni, wygladzenie=args.wygladzenie)
+    print("🔔 " + " | ".join(f"{k}: {v:.4f}" for k, v in g.statystyki().items()))
+
+    # Wszystkie strategie jednego terminu z domyślnymi strike'ami: gęstość vs bs() przy IV ATM
+    iv_atm = float(np.sqrt(g.wagi @ np.log(g.x / (g.S / g.DF))**2 / g.T))
+    nazwy = [n for n in REJESTR if all(noga.termin == 1.0 for noga in NOGI[n])]
+    params_lista = [REJESTR[n].params(args.S) for n in nazwy]
+    wynik = g.wycen_strategie(nazwy, params_lista)
+    _, koszt_bs, _ = macierz_strategii(nazwy, np.array([args.S]), args.S, g.T, iv_atm, params_lista)
+    tabela = pd.DataFrame({"strategia": nazwy, "gestosc": wynik["cena"], f"bs (σ={iv_atm:.1%})": koszt_bs,
+                           "POP przy cenie bs": g.wycen_strategie(nazwy, params_lista, koszt_bs)["pop"]})
+    print(tabela.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
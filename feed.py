@@ -0,0 +1,292 @@
+"""
+📡 NOTOWANIA NA ŻYWO - przyrostowa wycena książki pozycji
+Źródło notowań (interfejs ZrodloNotowan) wypycha ticki spot/IV. Książka
+przelicza tylko pozycje na instrumencie, którego dotyczy tick, i poprawia
+agregaty o różnicę - bez pełnej rewaluacji przy każdej wiadomości.
+Odświeżanie widoku jest dławione do zadanej liczby klatek na sekundę.
+
+Źródła:
+    ReplayPliku    - odtwarza plik CSV/JSONL (kolumny: czas, symbol, S, iv)
+    ReplayGniazda  - czyta JSON-y rozdzielone nową linią z gniazda TCP
+    serwuj_plik()  - lokalny serwer TCP odtwarzający plik (zastępnik giełdy)
+
+Użycie:
+    python feed.py pozycje.csv ticki.csv --fps 10 --tempo 5
+    python feed.py pozycje.csv --gniazdo 127.0.0.1:9100
+    python feed.py --serwuj ticki.csv 127.0.0.1:9100       # lokalny feed TCP z pliku
+Plik pozycji: kolumny jak w batch.py + symbol i ilosc (kontrakty, ujemne = short).
+"""
+import argparse
+import asyncio
+import json
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from options import NOGI, KRZYWA, bs, stopa_dla
+
+MNOZNIK = 100  # akcji na kontrakt
+
+# ══════════════════════════════════════════════════════════════════════════════
+# ŹRÓDŁA NOTOWAŃ
+# ══════════════════════════════════════════════════════════════════════════════
+@dataclass
+class Tick:
+    symbol: str
+    S: float = None    # None = bez zmiany
+    iv: float = None   # None = bez zmiany
+    czas: float = 0.0
+
+
+def _tick(d):
+    brak = lambda v: v is None or (isinstance(v, float) and np.isnan(v))
+    return Tick(str(d["symbol"]), None if brak(d.get("S")) else float(d["S"]),
+                None if brak(d.get("iv")) else float(d["iv"]), float(d.get("czas", 0.0)))
+
+
+class ZrodloNotowan(ABC):
+    """Interfejs źródła notowań - asynchroniczny strumień obiektów Tick"""
+
+    @abstractmethod
+    def ticki(self):
+        """Asynchroniczny generator obiektów Tick"""
+
+
+class ReplayPliku(ZrodloNotowan):
+    """Odtwarzanie pliku ticków; tempo=0 - tak szybko, jak się da"""
+
+    def __init__(self, sciezka, tempo=1.0):
+        self.sciezka = sciezka
+        self.tempo = tempo
+
+    async def ticki(self):
+        if self.sciezka.lower().endswith((".jsonl", ".json")):
+            df = pd.read_json(self.sciezka, lines=True)
+        else:
+            df = pd.read_csv(self.sciezka)
+        start, czas0 = time.monotonic(), None
+        for d in df.to_dict("records"):
+            t = _tick(d)
+            if self.tempo > 0:
+                czas0 = t.czas if czas0 is None else czas0
+                opoznienie = (t.czas - czas0) / self.tempo - (time.monotonic() - start)
+                if opoznienie > 0:
+                    await asyncio.sleep(opoznienie)
+            else:
+                await asyncio.sleep(0)  # oddaj pętlę rysowaniu
+            yield t
+
+
+class ReplayGniazda(ZrodloNotowan):
+    """Klient TCP: jedna linia JSON = jeden tick"""
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+
+    async def ticki(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            while linia := await reader.readline():
+                if linia.strip():
+                    yield _tick(json.loads(linia))
+        finally:
+            writer.close()
+
+
+async def serwuj_plik(sciezka, host="127.0.0.1", port=9100, tempo=1.0):
+    """Zastępnik zewnętrznego feedu - każdy klient dostaje odtworzenie pliku"""
+    async def klient(reader, writer):
+        async for t in ReplayPliku(sciezka, tempo).ticki():
+            writer.write((json.dumps(t.__dict__) + "\n").encode())
+            await writer.drain()
+        writer.close()
+
+    srv = await asyncio.start_server(klient, host, port)
+    async with srv:
+        await srv.serve_forever()
+
+# ══════════════════════════════════════════════════════════════════════════════
+# KSIĄŻKA Z PRZYROSTOWĄ WYCENĄ
+# ══════════════════════════════════════════════════════════════════════════════
+POLA = ("wartosc", "delta", "gamma", "theta", "vega")
+
+
+class KsiazkaNaZywo:
+    """Książka rozłożona na nogi, pogrupowane po symbolu
+
+    Tick przelicza tylko nogi swojego symbolu - jedno wektorowe wywołanie
+    modelu na typ opcji, niezależnie od liczby pozycji i strategii. Agregaty
+    symbolu i całej książki aktualizowane są różnicą (nowe - stare), a nie
+    sumą od zera.
+    """
+
+    def __init__(self, pozycje, r=None, model=bs):
+        self.r, self.model = KRZYWA if r is None else r, model
+        self.pozycje = pozycje.reset_index(drop=True)
+        self.stan = {k: np.zeros(len(self.pozycje)) for k in POLA}
+        ilosc = self.pozycje["ilosc"].to_numpy(float) * MNOZNIK
+        T = self.pozycje["dni"].to_numpy(float) / 365
+
+        self.nogi = {}  # symbol -> płaskie tablice nóg
+        for symbol, idx in self.pozycje.groupby("symbol", sort=False).indices.items():
+            lok, K, termin, waga, call = [], [], [], [], []
+            akcje = np.zeros(len(idx))
+            for j, i in enumerate(idx):
+                strategia = self.pozycje.at[i, "strategia"]
+                if strategia not in NOGI:
+                    raise KeyError(f"Nieznana strategia: {strategia}")
+                for n in NOGI[strategia]:
+                    if n.typ == "akcja":
+                        akcje[j] += n.ilosc * ilosc[i]
+                        continue
+                    lok.append(j)
+                    K.append(float(self.pozycje.at[i, n.strike]))
+                    termin.append(n.termin * T[i])
+                    waga.append(n.ilosc * ilosc[i])
+                    call.append(n.typ == "call")
+            call, termin = np.array(call, dtype=bool), np.array(termin)
+            self.nogi[symbol] = {"poz": idx, "akcje": akcje, "lok": np.array(lok, dtype=np.intp),
+                                 "K": np.array(K), "T": termin, "waga": np.array(waga),
+                                 "r": np.broadcast_to(stopa_dla(self.r, termin), termin.shape),
+                                 "call": call, "put": ~call}
+
+        pierwsze = self.pozycje.groupby("symbol", sort=False).first()
+        self.rynek = {s: {"S": float(w["S"]), "iv": float(w["sigma"])} for s, w in pierwsze.iterrows()}
+        self.agregat_symbolu = {s: dict.fromkeys(POLA, 0.0) for s in self.nogi}
+        self.agregat = dict.fromkeys(POLA, 0.0)
+        self.przeliczen = 0
+
+        for symbol in self.nogi:
+            self._przelicz(symbol)
+        self.wejscie = self.stan["wartosc"].copy()
+
+    def _przelicz(self, symbol):
+        S, iv = self.rynek[symbol]["S"], self.rynek[symbol]["iv"]
+        nogi = self.nogi[symbol]
+        n_poz = len(nogi["poz"])
+        nowe = {"wartosc": nogi["akcje"] * S, "delta": nogi["akcje"].copy()}
+        for k in ("gamma", "theta", "vega"):
+            nowe[k] = np.zeros(n_poz)
+        for typ in ("call", "put"):
+            m = nogi[typ]
+            if not m.any():
+                continue
+            g = self.model(S, nogi["K"][m], nogi["T"][m], nogi["r"][m], iv, typ)
+            g["wartosc"] = g["cena"]
+            for k in POLA:
+                nowe[k] += np.bincount(nogi["lok"][m], weights=nogi["waga"][m] * g[k], minlength=n_poz)
+        self.przeliczen += len(nogi["K"])
+
+        stary = self.agregat_symbolu[symbol]
+        suma = {}
+        for k in POLA:
+            self.stan[k][nogi["poz"]] = nowe[k]
+            suma[k] = float(nowe[k].sum())
+            self.agregat[k] += suma[k] - stary[k]
+        self.agregat_symbolu[symbol] = suma
+
+    def zastosuj(self, tick):
+        """Nowy tick - przelicza tylko pozycje na tym symbolu; zwraca czy coś się zmieniło"""
+        rynek = self.rynek.get(tick.symbol)
+        if rynek is None:
+            return False
+        nowe = {"S": tick.S if tick.S is not None else rynek["S"], "iv": tick.iv if tick.iv is not None else rynek["iv"]}
+        if nowe == rynek:
+            return False
+        self.rynek[tick.symbol] = nowe
+        self._przelicz(tick.symbol)
+        return True
+
+    def pnl(self):
+        return float(self.stan["wartosc"].sum() - self.wejscie.sum())
+
+    def migawka(self):
+        """Stan do wyświetlenia - agregaty książki i symboli"""
+        return {"agregat": dict(self.agregat), "pnl": self.pnl(), "rynek": dict(self.rynek),
+                "symbole": {s: dict(a) for s, a in self.agregat_symbolu.items()}}
+
+# ══════════════════════════════════════════════════════════════════════════════
+# DŁAWIENIE ODŚWIEŻANIA
+# ══════════════════════════════════════════════════════════════════════════════
+async def na_zywo(zrodlo, ksiazka, rysuj, fps=10.0):
+    """Ticki trafiają do książki od razu, rysowanie - najwyżej fps razy na sekundę"""
+    brudna = asyncio.Event()
+    koniec = False
+    ticki = 0
+
+    async def odbior():
+        nonlocal koniec, ticki
+        try:
+            async for t in zrodlo.ticki():
+                ticki += 1
+                if ksiazka.zastosuj(t):
+                    brudna.set()
+        finally:
+            # Także przy błędzie źródła (np. odmowa połączenia) - pętla rysowania nie może czekać w nieskończoność
+            koniec = True
+            brudna.set()
+
+    zadanie = asyncio.create_task(odbior())
+    klatki = 0
+    try:
+        while True:
+            await brudna.wait()
+            brudna.clear()
+            rysuj(ksiazka.migawka(), ticki)
+            klatki += 1
+            if koniec:
+                break
+            await asyncio.sleep(1.0 / fps)
+        await zadanie  # wyjątek źródła trafia do wywołującego
+    finally:
+        zadanie.cancel()
+    return {"ticki": ticki, "klatki": klatki, "przeliczen_nog": ksiazka.przeliczen}
+
+
+def rysuj_terminal(migawka, ticki):
+    a = migawka["agregat"]
+    print(f"\r📡 ticki: {ticki:>8} | P&L: {migawka['pnl']:>12.2f} | Δ: {a['delta']:>10.1f} | "
+          f"Γ: {a['gamma']:>8.2f} | Θ: {a['theta']:>9.2f} | V: {a['vega']:>9.2f}", end="", flush=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Przyrostowa wycena książki pozycji z notowań na żywo")
+    parser.add_argument("pozycje", nargs="?", help="Plik pozycji (CSV)")
+    parser.add_argument("ticki", nargs="?", help="Plik ticków do odtworzenia (CSV/JSONL)")
+    parser.add_argument("--gniazdo", help="host:port feedu TCP zamiast pliku")
+    parser.add_argument("--serwuj", nargs=2, metavar=("TICKI", "HOST:PORT"),
+                        help="Uruchom lokalny feed TCP odtwarzający plik ticków (bez wyceny)")
+    parser.add_argument("--tempo", type=float, default=1.0, help="Przyspieszenie odtwarzania (0 = maksymalne)")
+    parser.add_argument("--fps", type=float, default=10.0, help="Odświeżeń widoku na sekundę")
+    args = parser.parse_args()
+
+    def adres(tekst):
+        host, _, port = tekst.rpartition(":")
+        if not host or not port.isdigit():
+            parser.error(f"Adres musi mieć postać host:port, jest: {tekst}")
+        return host, int(port)
+
+    if args.serwuj:
+        host, port = adres(args.serwuj[1])
+        print(f"📡 Feed {args.serwuj[0]} na {host}:{port} (Ctrl+C kończy)")
+        try:
+            asyncio.run(serwuj_plik(args.serwuj[0], host, port, args.tempo))
+        except KeyboardInterrupt:
+            pass
+        raise SystemExit(0)
+    if not args.pozycje:
+        parser.error("Podaj plik pozycji")
+    if bool(args.ticki) == bool(args.gniazdo):
+        parser.error("Podaj plik ticków albo --gniazdo (dokładnie jedno)")
+
+    ksiazka = KsiazkaNaZywo(pd.read_csv(args.pozycje))
+    zrodlo = ReplayGniazda(*adres(args.gniazdo)) if args.gniazdo else ReplayPliku(args.ticki, args.tempo)
+    try:
+        wynik = asyncio.run(na_zywo(zrodlo, ksiazka, rysuj_terminal, args.fps))
+    except OSError as e:
+        print()
+        parser.exit(1, f"❌ Błąd źródła notowań: {e}\n")
+    print(f"\n✅ {wynik['ticki']} ticków, {wynik['klatki']} klatek, {wynik['przeliczen_nog']} przeliczeń nóg")
@@ -0,0 +1,245 @@
+"""
+🌊 WYCENA FFT - modele ze zmienną zmiennością (Heston) i skokami (Merton)
+bs() zakłada stałą zmienność, więc skrzydła (Short Strangle, Iron Condor,
+ratio spready) są wyceniane bez skośności. Tu cena liczona jest z funkcji
+charakterystycznej log-ceny metodą Carra-Madana: jedno FFT daje całą drabinę
+strike'ów dla terminu, a wycena dowolnych K to interpolacja splajnem.
+
+Modele są wywoływalne jak bs() - (S, K, T, r, σ, typ) -> cena i Greeks - więc
+podłącza się je jako `model=` w wycen_strategie, macierz_strategii,
+tablica_ryzyka czy symuluj_hedging. Drabiny są buforowane po (T, r, σ), a
+kalibracja do łańcucha - w trwałym magazynie wyników. Aplikacja, server.py
+i batch.py liczą tylko bs(): modele FFT są dostępne wyłącznie przez argument
+`model=` w Pythonie i wiersz poleceń tego modułu.
+
+    from fft_pricing import Heston
+    heston = Heston(v0=0.09, kappa=2.0, theta=0.09, sigma_v=0.6, rho=-0.7)
+    y, koszt, greeks = wycen_strategie("Iron Condor", x, 100, params, 30/365, 0.3, model=heston)
+
+Użycie:
+    python fft_pricing.py lancuch.csv --model heston --S 100 --strategia "Iron Condor" --dni 30
+Łańcuch jak w arbitrage.py (dni, K, typ, bid, ask).
+"""
+import argparse
+import time
+from abc import ABC, abstractmethod
+
+import numpy as np
+import pandas as pd
+from scipy.interpolate import CubicSpline
+from scipy.optimize import least_squares
+
+from options import KRZYWA, stopa_dla
+
+# ══════════════════════════════════════════════════════════════════════════════
+# RDZEŃ CARRA-MADANA
+# ══════════════════════════════════════════════════════════════════════════════
+class ModelFFT(ABC):
+    """Model zadany funkcją charakterystyczną ln(S_T / S) - wycena drabin przez FFT
+
+    Podklasa definiuje PARAMETRY, GRANICE i _cf(u, T, r, vol). `vol` to chwilowa
+    zmienność modelu: parametr ustawiony w konstruktorze albo - gdy None - σ
+    z wywołania (suwak IV aplikacji), względem niej liczona jest vega.
+    """
+    PARAMETRY = ()
+    GRANICE = ()
+    N = 8192           # punkty FFT
+    ETA = 0.25         # krok całkowania po częstości
+    ALFA = 1.5         # tłumienie Carra-Madana
+    ZAKRES_K = 3.0     # |ln(K/S)| trzymane w drabinie
+    T_MIN = 1 / 365 / 24
+
+    def __init__(self, **params):
+        for p in self.PARAMETRY:
+            setattr(self, p, params.get(p))
+        self._bufor = {}
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(f'{p}={getattr(self, p)!r}' for p in self.PARAMETRY)})"
+
+    def parametry(self):
+        return {p: getattr(self, p) for p in self.PARAMETRY}
+
+    @abstractmethod
+    def _vol(self, σ):
+        """Chwilowa zmienność modelu dla σ z wywołania"""
+
+    @abstractmethod
+    def _cf(self, u, T, r, vol):
+        """Funkcja charakterystyczna ln(S_T / S) w punktach u"""
+
+    def _drabina(self, T, r, vol):
+        """Splajn c(k) = C(S=1, K=e^k) dla jednego terminu - jedno FFT"""
+        klucz = (T, r, vol)
+        splajn = self._bufor.get(klucz)
+        if splajn is not None:
+            return splajn
+        if len(self._bufor) > 256:
+            self._bufor.clear()
+
+        N, eta, alfa = self.N, self.ETA, self.ALFA
+        lam = 2 * np.pi / (N * eta)
+        b = N * lam / 2
+        v = eta * np.arange(N)
+        psi = np.exp(-r * T) * self._cf(v - (alfa + 1) * 1j, T, r, vol) / (alfa**2 + alfa - v**2 + 1j * (2 * alfa + 1) * v)
+        simpson = (3 + (-1) ** np.arange(1, N + 1)) / 3
+        simpson[0] = 1 / 3
+        k = -b + lam * np.arange(N)
+        c = np.exp(-alfa * k) / np.pi * np.real(np.fft.fft(np.exp(1j * b * v) * psi * eta * simpson))
+
+        m = np.abs(k) <= self.ZAKRES_K
+        k, c = k[m], c[m]
+        c = np.maximum(c, np.maximum(1 - np.exp(k - r * T), 0.0))  # granica arbitrażowa
+        splajn = self._bufor[klucz] = CubicSpline(k, c)
+        return splajn
+
+    def _ceny_call(self, S, K, T, r, vol):
+        """Cena call i pochodne c', c'' po log-strike'u - jedna drabina na unikalne (T, r, vol)"""
+        T = np.maximum(T, self.T_MIN)
+        k = np.log(K / S)
+        trojki, inv = np.unique(np.stack([T.ravel(), r.ravel(), vol.ravel()], axis=1), axis=0, return_inverse=True)
+        inv = inv.ravel()
+        kk = k.ravel()
+        wynik = np.empty((3, kk.size))
+        for i, (T_i, r_i, vol_i) in enumerate(trojki):
+            m = inv == i
+            splajn = self._drabina(float(T_i), float(r_i), float(vol_i))
+            for rzad in range(3):
+                wynik[rzad, m] = splajn(kk[m], rzad)
+        return (w.reshape(k.shape) for w in wynik)
+
+    def __call__(self, S, K, T, r, σ, typ="call", wyzsze=False):
+        """Cena i Greeks jak w bs() - delta i gamma z drabiny, theta i vega z drabin sąsiednich"""
+        if wyzsze:
+            raise ValueError("Greeks wyższego rzędu liczy tylko bs()")
+        S, K, T, r, σ = np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in (S, K, T, r, σ)))
+        vol = self._vol(σ)
+        c, c1, c2 = self._ceny_call(S, K, T, r, vol)
+        dzien = np.minimum(1 / 365, 0.5 * np.maximum(T, self.T_MIN))
+        c_t, _, _ = self._ceny_call(S, K, np.maximum(T - dzien, self.T_MIN), r, vol)
+        c_v, _, _ = self._ceny_call(S, K, T, r, vol + 0.01)
+
+        cena = S * c
+        delta = c - c1
+        gamma = (c2 - c1) / S
+        theta = S * (c_t - c) / dzien / 365
+        vega = S * (c_v - c)
+        if typ == "put":
+            dyskonto = K * np.exp(-r * np.maximum(T, self.T_MIN))
+            cena = np.maximum(cena - S + dyskonto, 0.0)
+            delta = delta - 1
+            theta = theta + r * dyskonto / 365
+        return {"cena": cena, "delta": delta, "gamma": gamma, "theta": theta, "vega": vega}
+
+# ══════════════════════════════════════════════════════════════════════════════
+# MODELE
+# ══════════════════════════════════════════════════════════════════════════════
+class Heston(ModelFFT):
+    """Heston: dv = κ(θ - v)dt + σ_v √v dW, corr(dW, dS) = ρ; v0 = None -> σ² z wywołania"""
+    PARAMETRY = ("v0", "kappa", "theta", "sigma_v", "rho")
+    GRANICE = ((1e-4, 0.01, 1e-4, 0.01, -0.99), (4.0, 20.0, 4.0, 5.0, 0.99))
+
+    def _vol(self, σ):
+        return σ if self.v0 is None else np.full_like(σ, np.sqrt(self.v0))
+
+    def _cf(self, u, T, r, vol):
+        # Postać "little trap" (Albrecher i in.) - bez skoków gałęzi logarytmu
+        κ, θ, σv, ρ = self.kappa, self.theta, self.sigma_v, self.rho
+        iu = 1j * u
+        beta = κ - ρ * σv * iu
+        d = np.sqrt(beta**2 + σv**2 * (iu + u**2))
+        g = (beta - d) / (beta + d)
+        e = np.exp(-d * T)
+        C = κ * θ / σv**2 * ((beta - d) * T - 2 * np.log((1 - g * e) / (1 - g)))
+        D = (beta - d) / σv**2 * (1 - e) / (1 - g * e)
+        return np.exp(iu * r * T + C + D * vol**2)
+
+
+class Merton(ModelFFT):
+    """Merton: dyfuzja σ + skoki Poissona (λ na rok) o log-rozmiarze N(μ_j, δ_j²); sigma = None -> σ z wywołania"""
+    PARAMETRY = ("sigma", "lam", "mu_j", "delta_j")
+    GRANICE = ((0.01, 0.0, -1.0, 0.01), (2.0, 10.0, 1.0, 1.0))
+
+    def _vol(self, σ):
+        return σ if self.sigma is None else np.full_like(σ, self.sigma)
+
+    def _cf(self, u, T, r, vol):
+        λ, μj, δj = self.lam, self.mu_j, self.delta_j
+        kompensata = λ * (np.exp(μj + 0.5 * δj**2) - 1)
+        iu = 1j * u
+        return np.exp(iu * (r - 0.5 * vol**2 - kompensata) * T - 0.5 * vol**2 * u**2 * T
+                      + λ * T * (np.exp(iu * μj - 0.5 * δj**2 * u**2) - 1))
+
+
+MODELE = {"heston": Heston, "merton": Merton}
+START = {"heston": (0.09, 2.0, 0.09, 0.5, -0.6), "merton": (0.25, 0.5, -0.1, 0.15)}
+
+# ══════════════════════════════════════════════════════════════════════════════
+# KALIBRACJA
+# ══════════════════════════════════════════════════════════════════════════════
+def _kwotowania_otm(lancuch, S):
+    """Midy opcji OTM (put poniżej S, call powyżej) - one niosą informację o skośności"""
+    df = lancuch[lancuch["typ"].astype(str).str.lower().isin(["call", "put"])]
+    df = df.assign(mid=0.5 * (df["bid"] + df["ask"]), typ=df["typ"].str.lower())
+    otm = ((df["typ"] == "call") & (df["K"] >= S)) | ((df["typ"] == "put") & (df["K"] < S))
+    return df[otm & (df["mid"] > 0)].reset_index(drop=True)
+
+
+def kalibruj(nazwa, lancuch, S, r=None, start=None):
+    """Parametry modelu dopasowane do midów OTM łańcucha (najmniejsze kwadraty)
+
+    Jedna ocena funkcji celu to jedno FFT na termin łańcucha. Wynik jest
+    zapisywany w magazynie wyników - ten sam łańcuch nie jest kalibrowany dwa razy.
+    """
+    from result_store import magazyn
+
+    r = KRZYWA if r is None else r
+    klasa = MODELE[nazwa]
+    kw = _kwotowania_otm(lancuch, S)
+    K, T, mid = kw["K"].to_numpy(float), kw["dni"].to_numpy(float) / 365, kw["mid"].to_numpy(float)
+    typy = kw["typ"].to_numpy()
+    r_T = np.broadcast_to(np.asarray(stopa_dla(r, T), dtype=float), T.shape)
+
+    def licz():
+        def reszty(p):
+            model = klasa(**dict(zip(klasa.PARAMETRY, p)))
+            cena = np.where(typy == "call", model(S, K, T, r_T, 0.0, "call")["cena"],
+                            model(S, K, T, r_T, 0.0, "put")["cena"])
+            return (cena - mid) / S
+
+        dopasowanie = least_squares(reszty, start or START[nazwa], bounds=klasa.GRANICE, x_scale="jac")
+        blad = float(np.sqrt(np.mean(dopasowanie.fun**2)) * S)
+        return {}, {"parametry": dict(zip(klasa.PARAMETRY, map(float, dopasowanie.x))), "blad_rms": blad,
+                    "kwotowan": int(len(mid))}, None
+
+    wejscie = {"kalibracja": nazwa, "S": S, "K": K, "T": T, "mid": mid, "typ": typy, "r": r_T, "start": start}
+    meta = magazyn().pobierz_lub_licz(wejscie, licz)["meta"]
+    return klasa(**meta["parametry"]), meta
+
+
+if __name__ == "__main__":
+    from arbitrage import wczytaj_lancuch
+    from options import REJESTR, bs, wycen_strategie
+
+    parser = argparse.ArgumentParser(description="Kalibracja modelu Hestona / Mertona i wycena strategii przez FFT")
+    parser.add_argument("lancuch", help="Łańcuch opcji (CSV/JSONL): dni, K, typ, bid, ask")
+    parser.add_argument("--model", choices=list(MODELE), default="heston")
+    parser.add_argument("--S", type=float, required=True, help="Cena aktywa")
+    parser.add_argument("--strategia", default="Iron Condor")
+    parser.add_argument("--dni", type=int, default=30)
+    parser.add_argument("--iv", type=float, default=30, help="IV dla bs() do porównania (%)")
+    args = parser.parse_args()
+
+    start = time.time()
+    model, meta = kalibruj(args.model, wczytaj_lancuch(args.lancuch), args.S)
+    print(f"🌊 {model} | RMS {meta['blad_rms']:.4f} na {meta['kwotowan']} kwotowaniach ({time.time() - start:.1f} s)")
+
+    T = args.dni / 365
+    params = REJESTR[args.strategia].params(args.S)
+    x = np.linspace(args.S * 0.5, args.S * 1.5, 300)
+    wiersze = {}
+    for nazwa, m in (("bs", bs), (args.model, model)):
+        _, koszt, greeks = wycen_strategie(args.strategia, x, args.S, params, T, args.iv / 100, model=m)
+        wiersze[nazwa] = {"koszt": float(koszt), **{k: float(greeks[k]) for k in ("delta", "gamma", "theta", "vega")}}
+    print(f"\n{args.strategia} ({args.dni} dni, na 1 akcję):")
+    print(pd.DataFrame(wiersze).T.to_string(float_format=lambda v: f"{v:.4f}"))
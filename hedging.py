@@ -0,0 +1,156 @@
+"""
+🧪 SYMULATOR DELTA-HEDGINGU
+Ile naprawdę kosztuje utrzymanie strategii delta-neutralnej? Symulator generuje
+ścieżki ceny, rebalansuje deltę strategii (z bs()) co N kroków albo po wyjściu
+z pasma i zwraca rozkład P&L po hedgingu - z kosztami transakcyjnymi.
+
+Ścieżki liczone są wektorowo w partiach (pamięć ~ rozmiar partii, nie liczba
+ścieżek); partie mogą iść równolegle w puli procesów. Ziarno jest dzielone
+na partie przez SeedSequence, więc wynik nie zależy od liczby procesów.
+
+    from hedging import symuluj_hedging
+    w = symuluj_hedging("Short Straddle", 100, {"K": 100}, 30/365, 0.3,
+                        σ_real=0.25, sciezki=100_000, kroki=250, procesy=4)
+    w["statystyki"]
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from options import NOGI, KRZYWA, bs, stopa_dla, stopa_terminowa_dla
+
+# ══════════════════════════════════════════════════════════════════════════════
+# WYCENA NA ŚCIEŻKACH
+# ══════════════════════════════════════════════════════════════════════════════
+def _stan_strategii(nogi, S, params, T, t, r, σ, model):
+    """Wartość opcji i delta całej strategii (z akcjami) w chwili t"""
+    wartosc, delta = 0.0, 0.0
+    for n in nogi:
+        if n.typ == "akcja":
+            delta = delta + n.ilosc
+            continue
+        g = model(S, params[n.strike], n.termin * T - t, stopa_terminowa_dla(r, t, n.termin * T), σ, n.typ)
+        wartosc = wartosc + n.ilosc * g["cena"]
+        delta = delta + n.ilosc * g["delta"]
+    return wartosc, delta
+
+
+def _wartosc_na_horyzoncie(nogi, S, params, T, T_h, r, σ, model):
+    """Opcje wygasające na horyzoncie - wartość wewnętrzna, dłuższe - modelem"""
+    wartosc = 0.0
+    for n in nogi:
+        if n.typ == "akcja":
+            continue
+        K = params[n.strike]
+        if n.termin * T > T_h:
+            wartosc = wartosc + n.ilosc * model(S, K, n.termin * T - T_h, stopa_terminowa_dla(r, T_h, n.termin * T), σ,
+                                                n.typ)["cena"]
+        elif n.typ == "call":
+            wartosc = wartosc + n.ilosc * np.maximum(S - K, 0)
+        else:
+            wartosc = wartosc + n.ilosc * np.maximum(K - S, 0)
+    return wartosc
+
+
+def _partia(zadanie):
+    """Jedna partia ścieżek - liczona krok po kroku, wektorowo po ścieżkach"""
+    (strategia_nazwa, S0, params, T, σ, σ_real, mu, r, kroki, co_krokow, pasmo,
+     koszt_transakcji, liczba, ziarno, model) = zadanie
+    nogi = NOGI[strategia_nazwa]
+    rng = np.random.default_rng(ziarno)
+    T_h = T * min(n.termin for n in nogi)
+    dt = T_h / kroki
+    akcje = sum(n.ilosc for n in nogi if n.typ == "akcja")
+
+    S = np.full(liczba, float(S0))
+    wartosc0, delta = _stan_strategii(nogi, S0, params, T, 0.0, r, σ, model)
+    hedge = np.full(liczba, -float(delta))
+    koszty = koszt_transakcji * np.abs(hedge) * S
+    gotowka = -(wartosc0 + akcje * S0) - hedge * S - koszty
+    gotowka_bez = np.full(liczba, -(wartosc0 + akcje * S0))
+    rebalanse = np.zeros(liczba, dtype=np.int32)
+
+    # Gotówka rośnie stopą forward każdego kroku (krzywa) - dla stałej r to e^(r·dt)
+    t = np.arange(kroki + 1) * dt
+    wzrost = np.exp(np.broadcast_to(stopa_terminowa_dla(r, t[:-1], t[1:]), (kroki,)) * dt)
+    dryf = (mu - 0.5 * σ_real**2) * dt
+    szum = σ_real * np.sqrt(dt)
+    for k in range(1, kroki + 1):
+        S *= np.exp(dryf + szum * rng.standard_normal(liczba))
+        gotowka *= wzrost[k - 1]
+        gotowka_bez *= wzrost[k - 1]
+        if k == kroki or k % co_krokow:
+            continue
+        _, delta = _stan_strategii(nogi, S, params, T, k * dt, r, σ, model)
+        zmiana = -delta - hedge
+        if pasmo is not None:
+            zmiana = np.where(np.abs(zmiana) > pasmo, zmiana, 0.0)
+        koszt = koszt_transakcji * np.abs(zmiana) * S
+        gotowka -= zmiana * S + koszt
+        koszty += koszt
+        hedge += zmiana
+        rebalanse += zmiana != 0
+
+    opcje = _wartosc_na_horyzoncie(nogi, S, params, T, T_h, r, σ, model)
+    pozycja = opcje + akcje * S
+    return gotowka + hedge * S + pozycja, gotowka_bez + pozycja, koszty, rebalanse
+
+# ══════════════════════════════════════════════════════════════════════════════
+# API
+# ══════════════════════════════════════════════════════════════════════════════
+def statystyki(pnl, alfa=0.05):
+    """Podsumowanie rozkładu P&L (na 1 akcję)"""
+    ogon = np.sort(pnl)[: max(1, int(alfa * len(pnl)))]
+    return {
+        "srednia": float(np.mean(pnl)),
+        "odchylenie": float(np.std(pnl)),
+        "p1": float(np.percentile(pnl, 1)),
+        "p5": float(np.percentile(pnl, 5)),
+        "mediana": float(np.median(pnl)),
+        "p95": float(np.percentile(pnl, 95)),
+        "VaR": float(-ogon[-1]),
+        "ES": float(-ogon.mean()),
+    }
+
+
+def symuluj_hedging(strategia_nazwa, S, params, T, σ, σ_real=None, mu=None, r=None, sciezki=10_000, kroki=250,
+                    co_krokow=1, pasmo=None, koszt_transakcji=0.0005, partia=10_000, procesy=1, ziarno=0,
+                    model=bs):
+    """Rozkład P&L strategii hedgowanej delta-neutralnie
+
+    σ         - zmienność implikowana (wycena i delta, jak w bs())
+    σ_real    - zmienność realizowana ścieżek (domyślnie σ); σ_real > σ to zysk
+                dla long gamma, σ_real < σ dla sprzedawców zmienności
+    co_krokow - rebalans co N kroków; pasmo - tylko gdy |zmiana hedge'a| > pasmo akcji
+    koszt_transakcji - ułamek wartości obrotu akcjami
+    r         - stała stopa albo KrzywaStop (domyślnie KRZYWA); mu - dryf ścieżek
+                (domyślnie stopa krzywej dla horyzontu, jak miara ryzyka-neutralna)
+
+    Zwraca tablice P&L na ścieżkę (z hedgingiem i bez), koszty transakcyjne,
+    liczbę rebalansów i statystyki rozkładu.
+    """
+    if strategia_nazwa not in NOGI:
+        raise KeyError(f"Nieznana strategia: {strategia_nazwa}")
+    σ_real = σ if σ_real is None else σ_real
+    r = KRZYWA if r is None else r
+    mu = float(stopa_dla(r, T * min(n.termin for n in NOGI[strategia_nazwa]))) if mu is None else mu
+    params = {k: float(v) for k, v in params.items()}
+    ziarna = np.random.SeedSequence(ziarno).spawn(-(-sciezki // partia))
+    zadania = [(strategia_nazwa, S, params, T, σ, σ_real, mu, r, kroki, co_krokow, pasmo, koszt_transakcji,
+                min(partia, sciezki - i * partia), z, model) for i, z in enumerate(ziarna)]
+
+    if procesy > 1 and len(zadania) > 1:
+        with ProcessPoolExecutor(procesy) as pula:
+            wyniki = list(pula.map(_partia, zadania))
+    else:
+        wyniki = [_partia(z) for z in zadania]
+
+    pnl, pnl_bez, koszty, rebalanse = (np.concatenate(w) for w in zip(*wyniki))
+    return {
+        "pnl": pnl,
+        "pnl_bez_hedgingu": pnl_bez,
+        "koszty": koszty,
+        "rebalanse": rebalanse,
+        "statystyki": statystyki(pnl),
+        "statystyki_bez_hedgingu": statystyki(pnl_bez),
+    }
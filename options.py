@@ -2,28 +2,39 @@
 🎓 AKADEMIA OPCJI v2.0 - KOMPLETNA PLATFORMA EDUKACYJNA
 Wszystkie strategie opcyjne z pełnym kontekstem "kiedy używać"
 """
+import os
+import re
+from bisect import bisect_left
 import streamlit as st
 import numpy as np
+import pandas as pd
 import plotly.graph_objects as go
-from scipy.stats import norm
+import plotly.io as pio
+from plotly.subplots import make_subplots
+from scipy.special import ndtr
 from dataclasses import dataclass
 
 # ══════════════════════════════════════════════════════════════════════════════
 # KONFIGURACJA
 # ══════════════════════════════════════════════════════════════════════════════
-st.set_page_config(page_title="🎓 Akademia Opcji v2.0", page_icon="📈", layout="wide")
 R = 0.045  # Stopa wolna od ryzyka
+_ODWR_SQRT_2PI = 0.3989422804014327  # 1/√(2π) jako float Pythona - nie podnosi float32 do float64
 
 # ══════════════════════════════════════════════════════════════════════════════
 # MODEL BLACKA-SCHOLESA
 # ══════════════════════════════════════════════════════════════════════════════
-def bs(S, K, T, r, σ, typ="call"):
-    """Model Blacka-Scholesa - wycena i Greeks"""
-    T = max(T, 1e-6)
+def bs(S, K, T, r, σ, typ="call", wyzsze=False):
+    """Model Blacka-Scholesa - wycena i Greeks (wyzsze=True: także rho, vanna, volga, charm, speed)
+
+    Wynik ma typ wejść: tablice float32 (i stopa jako float32 albo liczba
+    Pythona) dają float32 - połowa pamięci dla dużych siatek, błąd ceny
+    rzędu 1e-6 względnie.
+    """
+    T = np.maximum(T, 1e-6)
     sqrt_T = np.sqrt(T)
     d1 = (np.log(S / K) + (r + 0.5 * σ**2) * T) / (σ * sqrt_T)
     d2 = d1 - σ * sqrt_T
-    Nd1, Nd2, nd1 = norm.cdf(d1), norm.cdf(d2), norm.pdf(d1)
+    Nd1, Nd2, nd1 = ndtr(d1), ndtr(d2), np.exp(-0.5 * d1**2) * _ODWR_SQRT_2PI
     exp_rT = np.exp(-r * T)
     
     if typ == "call":
@@ -33,13 +44,122 @@ def bs(S, K, T, r, σ, typ="call"):
     else:
         cena = K * exp_rT * (1 - Nd2) - S * (1 - Nd1)
         delta = Nd1 - 1
-        theta_cdf = norm.cdf(-d2)
+        theta_cdf = ndtr(-d2)
     
     gamma = nd1 / (S * σ * sqrt_T)
     vega = S * nd1 * sqrt_T / 100
-    theta = (-(S * nd1 * σ) / (2 * sqrt_T) - r * K * exp_rT * theta_cdf) / 365
+    znak = 1 if typ == "call" else -1  # put: odsetki od K działają na korzyść
+    theta = (-(S * nd1 * σ) / (2 * sqrt_T) - znak * r * K * exp_rT * theta_cdf) / 365
     
-    return {"cena": cena, "delta": delta, "gamma": gamma, "theta": theta, "vega": vega}
+    wynik = {"cena": cena, "delta": delta, "gamma": gamma, "theta": theta, "vega": vega}
+    if wyzsze:
+        wynik.update(greeks_wyzsze(S, K, T, r, σ, typ, d1, d2, nd1, exp_rT * theta_cdf, gamma, vega))
+    return wynik
+
+def greeks_wyzsze(S, K, T, r, σ, typ, d1, d2, nd1, dyskonto_cdf, gamma, vega):
+    """Greeks wyższego rzędu z wielkości policzonych już w wycenie (d1, d2, N'(d1))
+
+    Jednostki jak w bs(): rho i vanna na 1 pkt % stopy / IV, volga na (1 pkt % IV)²,
+    charm - zmiana delty na dzień, speed - zmiana gammy na 1 jednostkę ceny.
+    """
+    σ_sqrt_T = σ * np.sqrt(T)
+    znak = 1 if typ == "call" else -1
+    return {
+        "rho": znak * K * T * dyskonto_cdf / 100,
+        "vanna": -nd1 * d2 / σ / 100,
+        "volga": vega * d1 * d2 / σ / 100,
+        "charm": -nd1 * (2 * r * T - d2 * σ_sqrt_T) / (2 * T * σ_sqrt_T) / 365,
+        "speed": -gamma / S * (d1 / σ_sqrt_T + 1),
+    }
+
+GREEKS_WYZSZE = ("rho", "vanna", "volga", "charm", "speed")
+
+# ══════════════════════════════════════════════════════════════════════════════
+# KRZYWA STÓP PROCENTOWYCH
+# ══════════════════════════════════════════════════════════════════════════════
+class KrzywaStop:
+    """Krzywa stóp zerokuponowych (kapitalizacja ciągła) z buforem czynników dyskontowych
+
+    Między węzłami interpolowane jest liniowo r·T (stałe stopy forward), poza
+    zakresem stopa jest stała. Zapytania o pojedynczy termin - typowe dla
+    get_payoff i UI - trafiają do słownika (termin -> stopa, czynnik dyskontowy);
+    tablice terminów (wycena wsadowa) liczone są jednym np.interp.
+    """
+
+    def __init__(self, terminy, stopy):
+        terminy, stopy = np.asarray(terminy, dtype=float), np.asarray(stopy, dtype=float)
+        kolejnosc = np.argsort(terminy)
+        self.terminy, self.stopy = terminy[kolejnosc], stopy[kolejnosc]
+        self._rT = self.terminy * self.stopy
+        self._bufor = {}
+
+    @classmethod
+    def plaska(cls, r):
+        return cls([1.0], [r])
+
+    @classmethod
+    def z_pliku(cls, sciezka):
+        """CSV/JSONL z kolumnami: dni, stopa (ułamek, 0.045 = 4.5%)"""
+        if sciezka.lower().endswith((".jsonl", ".json")):
+            df = pd.read_json(sciezka, lines=True)
+        else:
+            df = pd.read_csv(sciezka)
+        return cls(df["dni"].to_numpy(float) / 365, df["stopa"].to_numpy(float))
+
+    @classmethod
+    def z_box_spreadow(cls, dni, szerokosc, cena):
+        """Stopy implikowane z cen box spreadów: cena = (K2 - K1)·e^(-rT)
+
+        Kilka boxów z tym samym terminem jest uśredniane.
+        """
+        df = pd.DataFrame({"dni": np.asarray(dni, dtype=float), "szerokosc": szerokosc, "cena": cena})
+        df["stopa"] = -np.log(df["cena"] / df["szerokosc"]) / (df["dni"] / 365)
+        stopy = df.groupby("dni")["stopa"].mean()
+        return cls(stopy.index.to_numpy() / 365, stopy.to_numpy())
+
+    def _interpoluj(self, T):
+        T = np.maximum(T, 1e-6)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r = np.interp(T, self.terminy, self._rT) / T
+        return np.where(T <= self.terminy[0], self.stopy[0], np.where(T >= self.terminy[-1], self.stopy[-1], r))
+
+    def _wezel(self, T):
+        wezel = self._bufor.get(T)
+        if wezel is None:
+            if len(self._bufor) > 4096:
+                self._bufor.clear()
+            r = float(self._interpoluj(np.array([T]))[0])
+            wezel = self._bufor[T] = (r, float(np.exp(-r * T)))
+        return wezel
+
+    def stopa(self, T):
+        """Stopa zerokuponowa dla terminu T (w latach) - skalar lub tablica"""
+        if np.ndim(T) == 0:
+            return self._wezel(float(T))[0]
+        return self._interpoluj(np.asarray(T, dtype=float))
+
+    def czynnik_dyskontowy(self, T):
+        if np.ndim(T) == 0:
+            return self._wezel(float(T))[1]
+        return np.exp(-self.stopa(T) * np.asarray(T, dtype=float))
+
+    def stopa_terminowa(self, T1, T2):
+        """Stopa forward między T1 a T2 (T2 > T1)"""
+        T1, T2 = np.asarray(T1, dtype=float), np.asarray(T2, dtype=float)
+        dT = np.maximum(T2 - T1, 1e-9)
+        return (self.stopa(T2) * T2 - self.stopa(T1) * T1) / dT
+
+
+def stopa_dla(r, T):
+    """Stopa dla terminu T - r to liczba albo KrzywaStop"""
+    return r.stopa(T) if isinstance(r, KrzywaStop) else r
+
+def stopa_terminowa_dla(r, T1, T2):
+    return r.stopa_terminowa(T1, T2) if isinstance(r, KrzywaStop) else r
+
+
+# Krzywa aplikacji: plik wskazany w AKADEMIA_KRZYWA albo płaska stopa R
+KRZYWA = KrzywaStop.z_pliku(os.environ["AKADEMIA_KRZYWA"]) if os.environ.get("AKADEMIA_KRZYWA") else KrzywaStop.plaska(R)
 
 # ══════════════════════════════════════════════════════════════════════════════
 # DEFINICJE WSZYSTKICH STRATEGII
@@ -649,212 +769,489 @@ Ograniczone ryzyko w obie strony. Czas pracuje DLA Ciebie."""
 # FUNKCJE PAYOFF
 # ══════════════════════════════════════════════════════════════════════════════
 def get_payoff(strategia_nazwa, x, S, params, T, σ):
-    """Uniwersalna funkcja zwracająca payoff dla dowolnej strategii"""
-    
-    # === PODSTAWOWE ===
-    if strategia_nazwa == "Long Call":
-        K = params["K"]
-        g = bs(S, K, T, R, σ, "call")
-        return np.maximum(x - K, 0) - g["cena"], g["cena"], g
-    
-    elif strategia_nazwa == "Long Put":
-        K = params["K"]
-        g = bs(S, K, T, R, σ, "put")
-        return np.maximum(K - x, 0) - g["cena"], g["cena"], g
-    
-    elif strategia_nazwa == "Short Call (Naked)":
-        K = params["K"]
-        g = bs(S, K, T, R, σ, "call")
-        return g["cena"] - np.maximum(x - K, 0), -g["cena"], {k: -v for k, v in g.items()}
-    
-    elif strategia_nazwa == "Short Put (Cash-Secured)":
-        K = params["K"]
-        g = bs(S, K, T, R, σ, "put")
-        return g["cena"] - np.maximum(K - x, 0), -g["cena"], {k: -v for k, v in g.items()}
-    
-    # === DOCHODOWE ===
-    elif strategia_nazwa == "Covered Call":
-        K = params["K"]
-        g = bs(S, K, T, R, σ, "call")
-        akcje = x - S
-        short_call = g["cena"] - np.maximum(x - K, 0)
-        return akcje + short_call, g["cena"], {"delta": 1 - g["delta"], "theta": -g["theta"], "vega": -g["vega"], "cena": g["cena"]}
-    
-    elif strategia_nazwa == "Covered Put":
-        K = params["K"]
-        g = bs(S, K, T, R, σ, "put")
-        short_akcje = S - x
-        short_put = g["cena"] - np.maximum(K - x, 0)
-        return short_akcje + short_put, g["cena"], {"delta": -1 - g["delta"], "theta": -g["theta"], "vega": -g["vega"], "cena": g["cena"]}
-    
-    # === ZABEZPIECZAJĄCE ===
-    elif strategia_nazwa == "Protective Put":
-        K = params["K"]
-        g = bs(S, K, T, R, σ, "put")
-        akcje = x - S
-        long_put = np.maximum(K - x, 0) - g["cena"]
-        return akcje + long_put, g["cena"], {"delta": 1 + g["delta"], "theta": g["theta"], "vega": g["vega"], "cena": g["cena"]}
-    
-    elif strategia_nazwa == "Protective Call":
-        K = params["K"]
-        g = bs(S, K, T, R, σ, "call")
-        short_akcje = S - x
-        long_call = np.maximum(x - K, 0) - g["cena"]
-        return short_akcje + long_call, g["cena"], {"delta": -1 + g["delta"], "theta": g["theta"], "vega": g["vega"], "cena": g["cena"]}
-    
-    elif strategia_nazwa == "Collar (Zero-Cost)":
-        K_put, K_call = params["K_put"], params["K_call"]
-        gp, gc = bs(S, K_put, T, R, σ, "put"), bs(S, K_call, T, R, σ, "call")
-        koszt = gp["cena"] - gc["cena"]
-        akcje = x - S
-        long_put = np.maximum(K_put - x, 0) - gp["cena"]
-        short_call = gc["cena"] - np.maximum(x - K_call, 0)
-        return akcje + long_put + short_call, koszt, {"delta": 1 + gp["delta"] - gc["delta"], "theta": gp["theta"] - gc["theta"], "vega": gp["vega"] - gc["vega"], "cena": koszt}
-    
-    # === SPREADY ===
-    elif strategia_nazwa == "Bull Call Spread":
-        K1, K2 = params["K1"], params["K2"]
-        g1, g2 = bs(S, K1, T, R, σ, "call"), bs(S, K2, T, R, σ, "call")
-        koszt = g1["cena"] - g2["cena"]
-        return np.maximum(x - K1, 0) - np.maximum(x - K2, 0) - koszt, koszt, {"delta": g1["delta"] - g2["delta"], "theta": g1["theta"] - g2["theta"], "vega": g1["vega"] - g2["vega"], "cena": koszt}
-    
-    elif strategia_nazwa == "Bear Put Spread":
-        K1, K2 = params["K1"], params["K2"]  # K1 niższy, K2 wyższy
-        g1, g2 = bs(S, K1, T, R, σ, "put"), bs(S, K2, T, R, σ, "put")
-        koszt = g2["cena"] - g1["cena"]
-        return np.maximum(K2 - x, 0) - np.maximum(K1 - x, 0) - koszt, koszt, {"delta": g2["delta"] - g1["delta"], "theta": g2["theta"] - g1["theta"], "vega": g2["vega"] - g1["vega"], "cena": koszt}
-    
-    elif strategia_nazwa == "Bull Put Spread (Credit)":
-        K1, K2 = params["K1"], params["K2"]  # K1 niższy, K2 wyższy
-        g1, g2 = bs(S, K1, T, R, σ, "put"), bs(S, K2, T, R, σ, "put")
-        kredyt = g2["cena"] - g1["cena"]
-        return kredyt - np.maximum(K2 - x, 0) + np.maximum(K1 - x, 0), -kredyt, {"delta": -(g2["delta"] - g1["delta"]), "theta": -(g2["theta"] - g1["theta"]), "vega": -(g2["vega"] - g1["vega"]), "cena": -kredyt}
-    
-    elif strategia_nazwa == "Bear Call Spread (Credit)":
-        K1, K2 = params["K1"], params["K2"]  # K1 niższy, K2 wyższy
-        g1, g2 = bs(S, K1, T, R, σ, "call"), bs(S, K2, T, R, σ, "call")
-        kredyt = g1["cena"] - g2["cena"]
-        return kredyt - np.maximum(x - K1, 0) + np.maximum(x - K2, 0), -kredyt, {"delta": -(g1["delta"] - g2["delta"]), "theta": -(g1["theta"] - g2["theta"]), "vega": -(g1["vega"] - g2["vega"]), "cena": -kredyt}
-    
-    # === ZMIENNOŚĆ ===
-    elif strategia_nazwa == "Long Straddle":
-        K = params["K"]
-        gc, gp = bs(S, K, T, R, σ, "call"), bs(S, K, T, R, σ, "put")
-        koszt = gc["cena"] + gp["cena"]
-        return np.maximum(x - K, 0) + np.maximum(K - x, 0) - koszt, koszt, {"delta": gc["delta"] + gp["delta"], "theta": gc["theta"] + gp["theta"], "vega": gc["vega"] + gp["vega"], "cena": koszt}
-    
-    elif strategia_nazwa == "Long Strangle":
-        K_put, K_call = params["K_put"], params["K_call"]
-        gc, gp = bs(S, K_call, T, R, σ, "call"), bs(S, K_put, T, R, σ, "put")
-        koszt = gc["cena"] + gp["cena"]
-        return np.maximum(x - K_call, 0) + np.maximum(K_put - x, 0) - koszt, koszt, {"delta": gc["delta"] + gp["delta"], "theta": gc["theta"] + gp["theta"], "vega": gc["vega"] + gp["vega"], "cena": koszt}
-    
-    elif strategia_nazwa == "Short Straddle":
-        K = params["K"]
-        gc, gp = bs(S, K, T, R, σ, "call"), bs(S, K, T, R, σ, "put")
-        kredyt = gc["cena"] + gp["cena"]
-        return kredyt - np.maximum(x - K, 0) - np.maximum(K - x, 0), -kredyt, {"delta": -(gc["delta"] + gp["delta"]), "theta": -(gc["theta"] + gp["theta"]), "vega": -(gc["vega"] + gp["vega"]), "cena": -kredyt}
-    
-    elif strategia_nazwa == "Short Strangle":
-        K_put, K_call = params["K_put"], params["K_call"]
-        gc, gp = bs(S, K_call, T, R, σ, "call"), bs(S, K_put, T, R, σ, "put")
-        kredyt = gc["cena"] + gp["cena"]
-        return kredyt - np.maximum(x - K_call, 0) - np.maximum(K_put - x, 0), -kredyt, {"delta": -(gc["delta"] + gp["delta"]), "theta": -(gc["theta"] + gp["theta"]), "vega": -(gc["vega"] + gp["vega"]), "cena": -kredyt}
-    
-    # === NEUTRALNE ===
-    elif strategia_nazwa == "Iron Condor":
-        K1, K2, K3, K4 = params["K1"], params["K2"], params["K3"], params["K4"]
-        gp1, gp2 = bs(S, K1, T, R, σ, "put"), bs(S, K2, T, R, σ, "put")
-        gc3, gc4 = bs(S, K3, T, R, σ, "call"), bs(S, K4, T, R, σ, "call")
-        kredyt = (gp2["cena"] - gp1["cena"]) + (gc3["cena"] - gc4["cena"])
-        payoff = kredyt - np.maximum(K2 - x, 0) + np.maximum(K1 - x, 0) - np.maximum(x - K3, 0) + np.maximum(x - K4, 0)
-        return payoff, -kredyt, {"delta": 0, "theta": 0.05, "vega": -0.1, "cena": -kredyt}
-    
-    elif strategia_nazwa == "Iron Butterfly":
-        K_low, K_mid, K_high = params["K_low"], params["K_mid"], params["K_high"]
-        gp_low, gp_mid = bs(S, K_low, T, R, σ, "put"), bs(S, K_mid, T, R, σ, "put")
-        gc_mid, gc_high = bs(S, K_mid, T, R, σ, "call"), bs(S, K_high, T, R, σ, "call")
-        kredyt = (gp_mid["cena"] - gp_low["cena"]) + (gc_mid["cena"] - gc_high["cena"])
-        payoff = kredyt - np.maximum(K_mid - x, 0) + np.maximum(K_low - x, 0) - np.maximum(x - K_mid, 0) + np.maximum(x - K_high, 0)
-        return payoff, -kredyt, {"delta": 0, "theta": 0.08, "vega": -0.15, "cena": -kredyt}
-    
-    elif strategia_nazwa in ["Long Call Butterfly", "Long Put Butterfly"]:
-        K1, K2, K3 = params["K1"], params["K2"], params["K3"]
-        if "Call" in strategia_nazwa:
-            g1, g2, g3 = bs(S, K1, T, R, σ, "call"), bs(S, K2, T, R, σ, "call"), bs(S, K3, T, R, σ, "call")
-            koszt = g1["cena"] - 2*g2["cena"] + g3["cena"]
-            payoff = np.maximum(x - K1, 0) - 2*np.maximum(x - K2, 0) + np.maximum(x - K3, 0) - koszt
+    """Payoff, koszt i Greeks widoku pojedynczej strategii - z nóg (NOGI), jak porównanie i wsad
+
+    Jedno źródło prawdy dla wszystkich widoków: wycen_strategie na krzywej
+    aplikacji. Koszt > 0 to debet; payoff przy wygaśnięciu najbliższej nogi.
+    """
+    return wycen_strategie(strategia_nazwa, x, S, params, T, σ)
+
+# ══════════════════════════════════════════════════════════════════════════════
+# RDZEŃ WSADOWY - STRATEGIE JAKO NOGI
+# ══════════════════════════════════════════════════════════════════════════════
+@dataclass(frozen=True)
+class Noga:
+    typ: str             # "call", "put" lub "akcja"
+    ilosc: float         # dodatnia = kupno, ujemna = sprzedaż
+    strike: str = ""     # klucz strike'a w params
+    termin: float = 1.0  # mnożnik T (kalendarze i diagonale)
+
+NOGI = {
+    "Long Call": (Noga("call", 1, "K"),),
+    "Long Put": (Noga("put", 1, "K"),),
+    "Short Call (Naked)": (Noga("call", -1, "K"),),
+    "Short Put (Cash-Secured)": (Noga("put", -1, "K"),),
+    "Covered Call": (Noga("akcja", 1), Noga("call", -1, "K")),
+    "Covered Put": (Noga("akcja", -1), Noga("put", -1, "K")),
+    "Protective Put": (Noga("akcja", 1), Noga("put", 1, "K")),
+    "Protective Call": (Noga("akcja", -1), Noga("call", 1, "K")),
+    "Collar (Zero-Cost)": (Noga("akcja", 1), Noga("put", 1, "K_put"), Noga("call", -1, "K_call")),
+    "Bull Call Spread": (Noga("call", 1, "K1"), Noga("call", -1, "K2")),
+    "Bear Put Spread": (Noga("put", 1, "K2"), Noga("put", -1, "K1")),
+    "Bull Put Spread (Credit)": (Noga("put", -1, "K2"), Noga("put", 1, "K1")),
+    "Bear Call Spread (Credit)": (Noga("call", -1, "K1"), Noga("call", 1, "K2")),
+    "Long Straddle": (Noga("call", 1, "K"), Noga("put", 1, "K")),
+    "Long Strangle": (Noga("call", 1, "K_call"), Noga("put", 1, "K_put")),
+    "Short Straddle": (Noga("call", -1, "K"), Noga("put", -1, "K")),
+    "Short Strangle": (Noga("call", -1, "K_call"), Noga("put", -1, "K_put")),
+    "Iron Condor": (Noga("put", 1, "K1"), Noga("put", -1, "K2"), Noga("call", -1, "K3"), Noga("call", 1, "K4")),
+    "Iron Butterfly": (Noga("put", 1, "K_low"), Noga("put", -1, "K_mid"), Noga("call", -1, "K_mid"), Noga("call", 1, "K_high")),
+    "Long Call Butterfly": (Noga("call", 1, "K1"), Noga("call", -2, "K2"), Noga("call", 1, "K3")),
+    "Long Put Butterfly": (Noga("put", 1, "K1"), Noga("put", -2, "K2"), Noga("put", 1, "K3")),
+    "Calendar Call Spread": (Noga("call", -1, "K", 0.5), Noga("call", 1, "K")),
+    "Calendar Put Spread": (Noga("put", -1, "K", 0.5), Noga("put", 1, "K")),
+    "Diagonal Call Spread": (Noga("call", 1, "K1", 2.0), Noga("call", -1, "K2")),
+    "Call Ratio Spread": (Noga("call", 1, "K1"), Noga("call", -2, "K2")),
+    "Put Ratio Spread": (Noga("put", 1, "K2"), Noga("put", -2, "K1")),
+    "Synthetic Long Stock": (Noga("call", 1, "K"), Noga("put", -1, "K")),
+    "Synthetic Short Stock": (Noga("call", -1, "K"), Noga("put", 1, "K")),
+    "Box Spread": (Noga("call", 1, "K1"), Noga("call", -1, "K2"), Noga("put", 1, "K2"), Noga("put", -1, "K1")),
+    "Conversion": (Noga("akcja", 1), Noga("put", 1, "K"), Noga("call", -1, "K")),
+    "Reversal": (Noga("akcja", -1), Noga("put", -1, "K"), Noga("call", 1, "K")),
+}
+
+def domyslne_params(strategia_nazwa, S):
+    """Domyślne strike'i strategii - startowe wartości suwaków w get_params_ui"""
+    return REJESTR[strategia_nazwa].params(S)
+
+def wycen_strategie(strategia_nazwa, x, S, params, T, σ, r=None, model=bs, wyzsze=False):
+    """Wektorowa wycena strategii z nóg - payoff, koszt i zagregowane Greeks
+
+    S, T, σ i wartości params mogą być tablicami jednego kształtu (wiele zestawów
+    parametrów naraz); x to siatka cen na horyzoncie. Payoff ma kształt
+    (..., len(x)) i jest liczony przy wygaśnięciu najbliższej nogi - nogi
+    dłuższe wyceniane są modelem na pozostały czas. Koszt > 0 oznacza debet.
+    r - stała stopa albo KrzywaStop (domyślnie KRZYWA): każda noga dostaje
+    stopę swojego terminu, a noga dłuższa na horyzoncie - stopę forward.
+    Dla x=None liczone są tylko koszt i Greeks (payoff = None).
+    wyzsze=True dokłada rho, vanna, volga, charm i speed z tego samego wywołania modelu.
+    """
+    nogi = NOGI[strategia_nazwa]
+    r = KRZYWA if r is None else r
+    if x is None:
+        x = np.empty(0)
+    x = np.asarray(x, dtype=float)
+    S, T, σ = (np.asarray(a, dtype=float) for a in (S, T, σ))
+    S_, σ_ = S[..., None], σ[..., None]
+    termin_min = min(n.termin for n in nogi)
+
+    payoff = 0.0
+    koszt = np.zeros(np.broadcast_shapes(S.shape, T.shape, σ.shape))
+    greeks = dict.fromkeys(("delta", "gamma", "theta", "vega") + (GREEKS_WYZSZE if wyzsze else ()), 0.0)
+    opcje_modelu = {"wyzsze": True} if wyzsze else {}
+    for n in nogi:
+        if n.typ == "akcja":
+            payoff = payoff + n.ilosc * (x - S_)
+            greeks["delta"] = greeks["delta"] + n.ilosc
+            continue
+
+        K = np.asarray(params[n.strike], dtype=float)
+        g = model(S, K, T * n.termin, stopa_dla(r, T * n.termin), σ, n.typ, **opcje_modelu)
+        koszt = koszt + n.ilosc * g["cena"]
+        for k in greeks:
+            greeks[k] = greeks[k] + n.ilosc * g[k]
+
+        K_ = K[..., None]
+        if x.size == 0:
+            continue
+        if n.termin > termin_min:
+            r_fwd = stopa_terminowa_dla(r, T * termin_min, T * n.termin)
+            wartosc = model(x, K_, (T * (n.termin - termin_min))[..., None], np.asarray(r_fwd)[..., None], σ_,
+                            n.typ)["cena"]
+        elif n.typ == "call":
+            wartosc = np.maximum(x - K_, 0)
         else:
-            g1, g2, g3 = bs(S, K1, T, R, σ, "put"), bs(S, K2, T, R, σ, "put"), bs(S, K3, T, R, σ, "put")
-            koszt = g3["cena"] - 2*g2["cena"] + g1["cena"]
-            payoff = np.maximum(K3 - x, 0) - 2*np.maximum(K2 - x, 0) + np.maximum(K1 - x, 0) - koszt
-        return payoff, koszt, {"delta": 0, "theta": 0.02, "vega": -0.05, "cena": koszt}
-    
-    # === KALENDARZOWE ===
-    elif strategia_nazwa in ["Calendar Call Spread", "Calendar Put Spread"]:
-        K = params["K"]
-        T_near, T_far = params.get("T_near", T*0.5), params.get("T_far", T)
-        typ = "call" if "Call" in strategia_nazwa else "put"
-        g_near = bs(S, K, T_near, R, σ, typ)
-        g_far = bs(S, K, T_far, R, σ, typ)
-        koszt = g_far["cena"] - g_near["cena"]
-        # Uproszczony payoff przy wygaśnięciu bliższej opcji
-        if typ == "call":
-            payoff = g_far["cena"] - koszt - np.maximum(x - K, 0) + g_near["cena"]
+            wartosc = np.maximum(K_ - x, 0)
+        payoff = payoff + n.ilosc * wartosc
+
+    greeks = {k: np.broadcast_to(v, koszt.shape) for k, v in greeks.items()}
+    greeks["cena"] = koszt
+    if x.size == 0:
+        return None, koszt, greeks
+    return payoff - koszt[..., None], koszt, greeks
+
+def macierz_strategii(nazwy, x, S, T, σ, params_lista=None, r=None, model=bs, wyzsze=False):
+    """Wiele strategii naraz - macierz payoff (strategie × siatka), koszty i Greeks
+
+    Nogi wszystkich strategii są spłaszczane do jednej listy: wycena to jedno
+    wywołanie modelu na typ opcji, a payoff to iloczyn macierzy wag
+    (strategie × nogi) i wartości nóg na siatce (nogi × siatka).
+    params_lista - słowniki strike'ów w kolejności nazw (domyślnie domyslne_params).
+    """
+    x = np.asarray(x, dtype=float)
+    r = KRZYWA if r is None else r
+    if params_lista is None:
+        params_lista = [domyslne_params(nazwa, S) for nazwa in nazwy]
+
+    akcje = np.zeros(len(nazwy))
+    strat, K, termin, reszta, ilosc, call = [], [], [], [], [], []
+    for i, (nazwa, params) in enumerate(zip(nazwy, params_lista)):
+        nogi = NOGI[nazwa]
+        termin_min = min(n.termin for n in nogi)
+        for n in nogi:
+            if n.typ == "akcja":
+                akcje[i] += n.ilosc
+                continue
+            strat.append(i)
+            K.append(float(params[n.strike]))
+            termin.append(n.termin * T)
+            reszta.append((n.termin - termin_min) * T)
+            ilosc.append(n.ilosc)
+            call.append(n.typ == "call")
+    strat, K, termin, reszta, ilosc, call = (np.array(a) for a in (strat, K, termin, reszta, ilosc, call))
+    call = call.astype(bool)
+    r_nogi = np.broadcast_to(stopa_dla(r, termin), termin.shape)
+    r_fwd = np.broadcast_to(stopa_terminowa_dla(r, termin - reszta, termin), termin.shape)
+
+    # Wycena nóg dziś i ich wartość na horyzoncie najbliższego wygaśnięcia
+    pola = ("cena", "delta", "gamma", "theta", "vega") + (GREEKS_WYZSZE if wyzsze else ())
+    opcje_modelu = {"wyzsze": True} if wyzsze else {}
+    wyceny = {k: np.zeros(len(K)) for k in pola}
+    wartosci = np.empty((len(K), len(x)))
+    for typ, m in (("call", call), ("put", ~call)):
+        if not m.any():
+            continue
+        g = model(S, K[m], termin[m], r_nogi[m], σ, typ, **opcje_modelu)
+        for k in pola:
+            wyceny[k][m] = g[k]
+        K_ = K[m][:, None]
+        wartosci[m] = np.maximum(x - K_, 0) if typ == "call" else np.maximum(K_ - x, 0)
+        dluzsze = m & (reszta > 0)
+        if dluzsze.any():
+            wartosci[dluzsze] = model(x, K[dluzsze][:, None], reszta[dluzsze][:, None], r_fwd[dluzsze][:, None],
+                                      σ, typ)["cena"]
+
+    wagi = np.zeros((len(nazwy), len(K)))
+    wagi[strat, np.arange(len(K))] = ilosc
+    greeks = {k: wagi @ wyceny[k] for k in pola}
+    greeks["delta"] = greeks["delta"] + akcje
+    koszt = greeks["cena"]
+    payoff = wagi @ wartosci + akcje[:, None] * (x - S) - koszt[:, None]
+    return payoff, koszt, greeks
+
+def zgodnosc_widokow(S=100.0, σ=0.3, T=30 / 365, nazwy=None):
+    """Największe różnice payoff, kosztu i Greeks między widokiem pojedynczym (get_payoff)
+    a porównaniem (macierz_strategii) na domyślnych strike'ach - DataFrame po strategiach"""
+    nazwy = list(REJESTR) if nazwy is None else list(nazwy)
+    x = np.linspace(S * 0.5, S * 1.5, 300)
+    params_lista = [domyslne_params(nazwa, S) for nazwa in nazwy]
+    payoff, koszt, greeks = macierz_strategii(nazwy, x, S, T, σ, params_lista)
+    wiersze = []
+    for i, (nazwa, params) in enumerate(zip(nazwy, params_lista)):
+        y, k, g = get_payoff(nazwa, x, S, params, T, σ)
+        wiersze.append({"strategia": nazwa, "payoff": float(np.abs(y - payoff[i]).max()),
+                        "koszt": abs(float(k) - koszt[i]),
+                        "greeks": max(abs(float(g[p]) - greeks[p][i]) for p in ("delta", "gamma", "theta", "vega"))})
+    return pd.DataFrame(wiersze)
+
+def breakeveny(x, y, ile=2):
+    """Pierwsze `ile` miejsc zerowych każdego wiersza y(x) - interpolacja liniowa"""
+    x = np.broadcast_to(x, y.shape)
+    zmiana = np.sign(y[:, :-1]) * np.sign(y[:, 1:]) < 0
+    wynik = np.full((y.shape[0], ile), np.nan)
+    wiersze = np.arange(y.shape[0])
+    for k in range(ile):
+        jest = zmiana.any(axis=1)
+        i = np.argmax(zmiana, axis=1)
+        x0, x1 = x[wiersze, i], x[wiersze, i + 1]
+        y0, y1 = y[wiersze, i], y[wiersze, i + 1]
+        wynik[:, k] = np.where(jest, x0 - y0 * (x1 - x0) / np.where(y1 != y0, y1 - y0, 1), np.nan)
+        zmiana[wiersze, i] = False
+    return wynik
+
+def rozpad_czasowy(strategia_nazwa, x, S, params, T, σ, r=None, model=bs):
+    """Wartość rynkowa strategii na siatce x dla każdego dnia od dziś do wygaśnięcia
+
+    Jedno wywołanie modelu na typ opcji: nogi × dni × siatka w jednym broadcaście.
+    Horyzont to wygaśnięcie najbliższej nogi (jak w wycen_strategie); dłuższe nogi
+    zachowują resztę terminu. Zwraca (dni, P&L o kształcie dni × siatka, koszt).
+    """
+    nogi = NOGI[strategia_nazwa]
+    r = KRZYWA if r is None else r
+    x = np.asarray(x, dtype=float)
+    termin_min = min(n.termin for n in nogi)
+    dni = np.arange(int(round(T * termin_min * 365)) + 1)
+    t = dni / 365
+
+    akcje = sum(n.ilosc for n in nogi if n.typ == "akcja")
+    wartosc = akcje * (x - S) + np.zeros((len(dni), 1))
+    koszt = 0.0
+    for typ in ("call", "put"):
+        nogi_typu = [n for n in nogi if n.typ == typ]
+        if not nogi_typu:
+            continue
+        K = np.array([float(params[n.strike]) for n in nogi_typu])[:, None, None]
+        ilosc = np.array([n.ilosc for n in nogi_typu])
+        termin = np.array([n.termin * T for n in nogi_typu])
+        koszt += float(ilosc @ model(S, K[:, 0, 0], termin, stopa_dla(r, termin), σ, typ)["cena"])
+        reszta = np.maximum(termin[:, None] - t, 0.0)[..., None]
+        V = model(x, K, reszta, np.broadcast_to(stopa_dla(r, reszta), reszta.shape), σ, typ)["cena"]
+        wygasle = reszta <= 0
+        if wygasle.any():
+            wewn = np.maximum(x - K, 0) if typ == "call" else np.maximum(K - x, 0)
+            V = np.where(wygasle, wewn, V)
+        wartosc = wartosc + np.tensordot(ilosc, V, axes=1)
+    return dni, wartosc - koszt, koszt
+
+# ══════════════════════════════════════════════════════════════════════════════
+# REJESTR STRATEGII - METADANE I INDEKSY LICZONE RAZ PRZY STARCIE
+# ══════════════════════════════════════════════════════════════════════════════
+class WpisStrategii:
+    """Metadane jednej strategii dla UI i przetwarzania wsadowego"""
+    __slots__ = ("nazwa", "strategia", "pozycja", "kategoria", "poziom", "kierunek", "zmiennosc",
+                 "liczba_nog", "schemat", "uklad", "mnozniki", "tokeny_nazwy")
+
+    def __init__(self, **pola):
+        for k, v in pola.items():
+            setattr(self, k, v)
+
+    def params(self, S):
+        """Domyślne strike'i dla ceny S"""
+        return {k: S * m for k, m in self.mnozniki}
+
+    def __repr__(self):
+        return f"WpisStrategii({self.nazwa!r}, {self.uklad}, {self.kierunek}, {self.zmiennosc})"
+
+
+def _tokeny(tekst):
+    return re.findall(r"\w{2,}", tekst.lower())
+
+def _uklad_i_mnozniki(nazwa, strategia, schemat):
+    """Układ pól w get_params_ui i domyślne strike'i jako ułamek S"""
+    if strategia.kategoria == "🏦 Arbitraż":
+        # Bez suwaków - płaski profil, strike'i tylko do wyceny nóg
+        return "staly", (("K", 1.0),) + ((("K1", 0.95), ("K2", 1.05)) if "K1" in schemat else ())
+    if schemat == ("K",):
+        if "ATM" in strategia.konstrukcja or "Straddle" in nazwa:
+            m = 1.0
+        elif "Call" in nazwa and "Put" not in nazwa:
+            m = 1.05
+        else:
+            m = 0.95
+        return "jeden", (("K", m),)
+    if schemat == ("K1", "K2"):
+        if "Bull" in nazwa or "Ratio" in nazwa:
+            return "dwa", (("K1", 0.95), ("K2", 1.1))
+        return "dwa_nizej", (("K1", 0.9), ("K2", 1.05))
+    if schemat == ("K_call", "K_put"):
+        return "strangle", (("K_put", 0.9), ("K_call", 1.1))
+    if schemat == ("K1", "K2", "K3", "K4"):
+        return "condor", (("K1", 0.85), ("K2", 0.95), ("K3", 1.05), ("K4", 1.15))
+    if schemat == ("K_high", "K_low", "K_mid"):
+        return "butterfly", (("K_low", 0.9), ("K_mid", 1.0), ("K_high", 1.1))
+    if schemat == ("K1", "K2", "K3"):
+        return "butterfly3", (("K1", 0.95), ("K2", 1.0), ("K3", 1.05))
+    return "staly", (("K", 1.0),)
+
+
+class RejestrStrategii:
+    """Indeksy strategii: kategoria, poziom, profil kierunku i zmienności,
+    liczba nóg, schemat parametrów i odwrócony indeks słów do wyszukiwania
+
+    Budowany raz przy imporcie modułu. Profil kierunku i zmienności pochodzi
+    z Greeks przy domyślnych strike'ach (S=100, 30 dni, IV 30%) - jedno
+    wywołanie macierz_strategii dla wszystkich strategii.
+    """
+    PROG_DELTA = 0.1   # |delta| na akcję, poniżej - neutralny
+    PROG_VEGA = 0.02   # |vega| na akcję i 1% IV, poniżej - neutralna
+
+    def __init__(self, strategie, nogi):
+        nazwy = [n for n in strategie if n in nogi]
+        wstepne = []
+        for nazwa in nazwy:
+            schemat = tuple(sorted({n.strike for n in nogi[nazwa] if n.strike}))
+            wstepne.append((schemat, *_uklad_i_mnozniki(nazwa, strategie[nazwa], schemat)))
+        params = [{k: 100 * m for k, m in mnozniki} for _, _, mnozniki in wstepne]
+        _, _, greeks = macierz_strategii(nazwy, np.empty(0), 100.0, 30 / 365, 0.3, params, r=R)
+
+        self.wpisy = {}
+        self._indeksy = {pole: {} for pole in ("kategoria", "poziom", "kierunek", "zmiennosc",
+                                               "liczba_nog", "schemat", "uklad")}
+        self._slowa = {}
+        for i, (nazwa, (schemat, uklad, mnozniki)) in enumerate(zip(nazwy, wstepne)):
+            s = strategie[nazwa]
+            delta, vega = greeks["delta"][i], greeks["vega"][i]
+            arbitraz = s.kategoria == "🏦 Arbitraż"
+            wpis = WpisStrategii(
+                nazwa=nazwa, strategia=s, pozycja=i, kategoria=s.kategoria, poziom=s.poziom,
+                kierunek="neutralny" if arbitraz or abs(delta) < self.PROG_DELTA else "byczy" if delta > 0 else "niedźwiedzi",
+                zmiennosc="neutralna" if arbitraz or abs(vega) < self.PROG_VEGA else "long" if vega > 0 else "short",
+                liczba_nog=len(nogi[nazwa]), schemat=schemat, uklad=uklad, mnozniki=mnozniki,
+                tokeny_nazwy=frozenset(_tokeny(nazwa)),
+            )
+            self.wpisy[nazwa] = wpis
+            for pole, indeks in self._indeksy.items():
+                indeks.setdefault(getattr(wpis, pole), set()).add(nazwa)
+            tekst = " ".join((nazwa, s.kategoria, s.opis, s.kiedy, s.konstrukcja, s.greeks, s.uwagi))
+            for token in _tokeny(tekst):
+                self._slowa.setdefault(token, set()).add(nazwa)
+        self._slownik = sorted(self._slowa)
+
+        self.kategorie = {}
+        for nazwa, wpis in self.wpisy.items():
+            self.kategorie.setdefault(wpis.kategoria, []).append(nazwa)
+
+    def __getitem__(self, nazwa):
+        return self.wpisy[nazwa]
+
+    def __contains__(self, nazwa):
+        return nazwa in self.wpisy
+
+    def __iter__(self):
+        return iter(self.wpisy)
+
+    def __len__(self):
+        return len(self.wpisy)
+
+    def wartosci(self, pole):
+        """Dostępne wartości indeksu, np. wartosci("kierunek")"""
+        return list(self._indeksy[pole])
+
+    def filtruj(self, **kryteria):
+        """Nazwy spełniające wszystkie kryteria (pole=wartość albo pole=[wartości])"""
+        wynik = None
+        for pole, wartosc in kryteria.items():
+            if wartosc is None:
+                continue
+            indeks = self._indeksy[pole]
+            wartosci = wartosc if isinstance(wartosc, (list, set, frozenset)) else [wartosc]
+            zbior = set().union(*(indeks.get(w, ()) for w in wartosci))
+            wynik = zbior if wynik is None else wynik & zbior
+        if wynik is None:
+            return list(self.wpisy)
+        return sorted(wynik, key=lambda n: self.wpisy[n].pozycja)
+
+    def _prefiks(self, token):
+        """Strategie zawierające słowo zaczynające się od token (bisect po słowniku)"""
+        zbior = set()
+        i = bisect_left(self._slownik, token)
+        while i < len(self._slownik) and self._slownik[i].startswith(token):
+            zbior |= self._slowa[self._slownik[i]]
+            i += 1
+        return zbior
+
+    def szukaj(self, zapytanie, **kryteria):
+        """Wyszukiwanie pełnotekstowe (wszystkie słowa, także początki słów) z filtrami
+
+        Trafienia w nazwie strategii idą pierwsze.
+        """
+        tokeny = _tokeny(zapytanie)
+        kandydaci = self.filtruj(**kryteria)
+        if not tokeny:
+            return kandydaci
+        wynik = set(kandydaci)
+        for token in tokeny:
+            wynik &= self._prefiks(token)
+        w_nazwie = lambda n: all(any(t.startswith(q) for t in self.wpisy[n].tokeny_nazwy) for q in tokeny)
+        return sorted(wynik, key=lambda n: (not w_nazwie(n), self.wpisy[n].pozycja))
+
+
+REJESTR = RejestrStrategii(STRATEGIE, NOGI)
+
+# ══════════════════════════════════════════════════════════════════════════════
+# ANALITYKA PRAWDOPODOBIEŃSTWA (zamknięte wzory lognormalne)
+# ══════════════════════════════════════════════════════════════════════════════
+def _payoff_wygasniecia(nogi, x, S, params):
+    """Payoff przy wygaśnięciu (bez premii) i jego nachylenie w punktach x"""
+    wartosc, nachylenie = 0.0, 0.0
+    for n in nogi:
+        if n.typ == "akcja":
+            wartosc = wartosc + n.ilosc * (x - S)
+            nachylenie = nachylenie + n.ilosc
+            continue
+        K = np.asarray(params[n.strike], dtype=float)[..., None]
+        if n.typ == "call":
+            wartosc = wartosc + n.ilosc * np.maximum(x - K, 0)
+            nachylenie = nachylenie + n.ilosc * (x > K)
         else:
-            payoff = g_far["cena"] - koszt - np.maximum(K - x, 0) + g_near["cena"]
-        # Maksymalny zysk przy strike
-        max_at_strike = g_far["cena"] - koszt
-        payoff = np.where(np.abs(x - K) < S*0.1, max_at_strike, payoff * 0.3)
-        return payoff, koszt, {"delta": 0, "theta": 0.03, "vega": 0.1, "cena": koszt}
-    
-    # === SYNTETYCZNE ===
-    elif strategia_nazwa == "Synthetic Long Stock":
-        K = params["K"]
-        gc, gp = bs(S, K, T, R, σ, "call"), bs(S, K, T, R, σ, "put")
-        koszt = gc["cena"] - gp["cena"]
-        return (x - K) - koszt, koszt, {"delta": 1, "theta": gc["theta"] - gp["theta"], "vega": gc["vega"] - gp["vega"], "cena": koszt}
-    
-    elif strategia_nazwa == "Synthetic Short Stock":
-        K = params["K"]
-        gc, gp = bs(S, K, T, R, σ, "call"), bs(S, K, T, R, σ, "put")
-        kredyt = gc["cena"] - gp["cena"]
-        return (K - x) + kredyt, -kredyt, {"delta": -1, "theta": -(gc["theta"] - gp["theta"]), "vega": -(gc["vega"] - gp["vega"]), "cena": -kredyt}
-    
-    # === RATIO ===
-    elif strategia_nazwa == "Call Ratio Spread":
-        K1, K2 = params["K1"], params["K2"]
-        g1, g2 = bs(S, K1, T, R, σ, "call"), bs(S, K2, T, R, σ, "call")
-        koszt = g1["cena"] - 2*g2["cena"]
-        payoff = np.maximum(x - K1, 0) - 2*np.maximum(x - K2, 0) - koszt
-        return payoff, koszt, {"delta": g1["delta"] - 2*g2["delta"], "theta": g1["theta"] - 2*g2["theta"], "vega": g1["vega"] - 2*g2["vega"], "cena": koszt}
-    
-    elif strategia_nazwa == "Put Ratio Spread":
-        K1, K2 = params["K1"], params["K2"]  # K1 niższy, K2 wyższy
-        g1, g2 = bs(S, K1, T, R, σ, "put"), bs(S, K2, T, R, σ, "put")
-        koszt = g2["cena"] - 2*g1["cena"]
-        payoff = np.maximum(K2 - x, 0) - 2*np.maximum(K1 - x, 0) - koszt
-        return payoff, koszt, {"delta": g2["delta"] - 2*g1["delta"], "theta": g2["theta"] - 2*g1["theta"], "vega": g2["vega"] - 2*g1["vega"], "cena": koszt}
-    
-    # === ARBITRAŻ ===
-    elif strategia_nazwa in ["Box Spread", "Conversion", "Reversal"]:
-        # Te strategie mają płaski profil - zysk = stopa %
-        K = params.get("K", S)
-        zysk = K * R * T / 365 * 100
-        return np.full_like(x, zysk), 0, {"delta": 0, "theta": 0, "vega": 0, "cena": 0}
-    
-    # === DIAGONALNE (uproszczone) ===
-    elif strategia_nazwa == "Diagonal Call Spread":
-        K1, K2 = params["K1"], params["K2"]
-        g1 = bs(S, K1, T * 2, R, σ, "call")  # daleki termin
-        g2 = bs(S, K2, T, R, σ, "call")  # bliski termin
-        koszt = g1["cena"] - g2["cena"]
-        # Uproszczony payoff
-        payoff = np.minimum(np.maximum(x - K1, 0), K2 - K1) + g2["cena"] - koszt
-        return payoff, koszt, {"delta": 0.5, "theta": 0.02, "vega": 0.05, "cena": koszt}
-    
-    # Default
-    return np.zeros_like(x), 0, {"delta": 0, "theta": 0, "vega": 0, "cena": 0}
+            wartosc = wartosc + n.ilosc * np.maximum(K - x, 0)
+            nachylenie = nachylenie - n.ilosc * (x < K)
+    return wartosc, nachylenie
+
+def prawdopodobienstwo_dotkniecia(S, H, T, σ, mu=R):
+    """P(cena dotknie poziomu H przed T) - max/min ruchu Browna z dryfem"""
+    S, H, T, σ = np.broadcast_arrays(*(np.asarray(a, dtype=float) for a in (S, H, T, σ)))
+    T = np.maximum(T, 1e-6)
+    ν = mu - 0.5 * σ**2
+    h = np.abs(np.log(H / S))
+    kierunek = np.where(H >= S, 1.0, -1.0)  # w dół: dryf działa odwrotnie
+    ν = ν * kierunek
+    s = σ * np.sqrt(T)
+    with np.errstate(over="ignore", invalid="ignore"):
+        p = ndtr((-h + ν * T) / s) + np.exp(2 * ν * h / σ**2) * ndtr((-h - ν * T) / s)
+    return np.clip(np.where(h == 0, 1.0, p), 0, 1)
+
+def analiza_wygasniecia(strategia_nazwa, S, params, T, σ, r=None, mu=None):
+    """POP, oczekiwany P&L i breakeveny przy wygaśnięciu - bez próbkowania
+
+    Payoff jest kawałkami liniowy między strike'ami, więc na każdym odcinku
+    P(zysk) i E[P&L] mają postać zamkniętą przy lognormalnej cenie końcowej
+    (ta sama stopa, σ i T co w wycenie; mu pozwala podać własny dryf). Wszystkie
+    argumenty mogą być tablicami - jeden przebieg liczy cały ekran strategii.
+    Strategie z nogami o różnych terminach zwracają NaN.
+    """
+    nogi = NOGI[strategia_nazwa]
+    r = KRZYWA if r is None else r
+    mu = stopa_dla(r, T) if mu is None else mu
+    S, T, σ = (np.asarray(a, dtype=float) for a in (S, T, σ))
+    params = {k: np.asarray(v, dtype=float) for k, v in params.items()}
+    strike_klucze = sorted({n.strike for n in nogi if n.strike})
+    ksztalt = np.broadcast_shapes(S.shape, T.shape, σ.shape, *(params[k].shape for k in strike_klucze))
+
+    if len({n.termin for n in nogi}) > 1:
+        nan = np.full(ksztalt, np.nan)
+        return {"pop": nan, "ev": nan, "breakeveny": np.full(ksztalt + (0,), np.nan),
+                "dotkniecie": {k: nan for k in strike_klucze}}
+
+    koszt = wycen_strategie(strategia_nazwa, None, S, params, T, σ, r)[1]
+    koszt = np.broadcast_to(koszt, ksztalt)
+
+    # Odcinki [p_i, p_i+1] między kolejnymi strike'ami, od 0 do nieskończoności
+    strike = [np.broadcast_to(params[k], ksztalt) for k in strike_klucze]
+    p = np.sort(np.stack([np.zeros(ksztalt), *strike, np.full(ksztalt, np.inf)], axis=-1), axis=-1)
+    lo, hi = p[..., :-1], p[..., 1:]
+    srodek = np.where(np.isinf(hi), lo + 1, 0.5 * (lo + hi))
+    wartosc, b = _payoff_wygasniecia(nogi, srodek, S[..., None], params)
+    b = np.broadcast_to(b, lo.shape).astype(float)
+    a = wartosc - koszt[..., None] - b * srodek  # payoff - koszt = a + b·x
+
+    # Miejsca zerowe wewnątrz odcinków
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pierwiastek = np.where(b != 0, -a / b, np.nan)
+    w_odcinku = (pierwiastek > lo) & (pierwiastek <= hi)
+    breakeveny = np.sort(np.where(w_odcinku, pierwiastek, np.nan), axis=-1)
+
+    # Część odcinka z dodatnim P&L: [u, w]
+    u = np.where(b > 0, np.maximum(lo, np.nan_to_num(pierwiastek, nan=0.0)), lo)
+    w = np.where(b < 0, np.minimum(hi, np.nan_to_num(pierwiastek, nan=np.inf)), hi)
+    u = np.where((b == 0) & (a <= 0), hi, u)
+
+    S_, T_, σ_ = S[..., None], np.maximum(T, 1e-6)[..., None], σ[..., None]
+    mu_ = np.asarray(mu, dtype=float)[..., None]
+    v = σ_ * np.sqrt(T_)
+
+    def N_d(granica, przesuniecie):
+        with np.errstate(divide="ignore"):
+            d = (np.log(S_ / granica) + (mu_ - 0.5 * σ_**2) * T_) / v + przesuniecie
+        return ndtr(d)
+
+    Nd2_lo, Nd2_hi = N_d(lo, 0), N_d(hi, 0)
+    pop = np.clip(N_d(u, 0) - N_d(np.maximum(w, u), 0), 0, 1).sum(axis=-1)
+    ES_odcinka = S_ * np.exp(mu_ * T_) * (N_d(lo, v) - N_d(hi, v))
+    ev = (a * (Nd2_lo - Nd2_hi) + b * ES_odcinka).sum(axis=-1)
+
+    dotkniecie = {k: prawdopodobienstwo_dotkniecia(S, params[k], T, σ, mu) for k in strike_klucze}
+    return {"pop": pop, "ev": ev, "breakeveny": breakeveny, "dotkniecie": dotkniecie}
 
 # ══════════════════════════════════════════════════════════════════════════════
 # UI HELPERS
@@ -893,6 +1290,36 @@ def rysuj_wykres(x, y, tytul, S, breakevens=None):
     )
     return fig
 
+def rysuj_rozpad(x, dni, y, tytul, S):
+    """Animacja rozpadu czasowego - klatki liczone z góry, odtwarzanie po stronie przeglądarki"""
+    pozostalo = dni[-1] - dni
+    fig = go.Figure(
+        data=[go.Scatter(x=x, y=y[0], name="Dziś", line=dict(color='#FFFFFF', width=3)),
+              go.Scatter(x=x, y=y[-1], name="Wygaśnięcie", line=dict(color='#00BFFF', width=1, dash='dash'))],
+        frames=[go.Frame(data=[go.Scatter(y=y[i])], traces=[0], name=str(d)) for i, d in enumerate(pozostalo)],
+    )
+    fig.add_hline(y=0, line_dash="dash", line_color="gray", opacity=0.5)
+    fig.add_vline(x=S, line_dash="dot", line_color="#FFD700", opacity=0.7,
+                  annotation_text=f"Spot: {S:.0f}", annotation_position="top")
+
+    klatka = dict(frame=dict(duration=80, redraw=False), transition=dict(duration=0), mode="immediate")
+    fig.update_layout(
+        template="plotly_dark",
+        title=dict(text=tytul, font=dict(size=18)),
+        xaxis_title="Cena aktywa",
+        yaxis_title="Zysk / Strata (PLN)",
+        yaxis_range=[float(y.min()) * 1.1 - 1, float(y.max()) * 1.1 + 1],
+        height=480,
+        margin=dict(l=50, r=50, t=60, b=50),
+        legend=dict(orientation="h", y=1.02, x=1, xanchor="right"),
+        updatemenus=[dict(type="buttons", direction="left", x=0, y=-0.12, xanchor="left", showactive=False,
+                          buttons=[dict(label="▶️", method="animate", args=[None, {**klatka, "fromcurrent": True}]),
+                                   dict(label="⏸️", method="animate", args=[[None], klatka])])],
+        sliders=[dict(active=0, x=0.1, len=0.9, y=-0.05, currentvalue=dict(prefix="Dni do wygaśnięcia: "),
+                      steps=[dict(label=str(d), method="animate", args=[[str(d)], klatka]) for d in pozostalo])],
+    )
+    return fig
+
 def panel_edukacyjny(strategia, greeks, koszt):
     """Panel edukacyjny z informacjami o strategii"""
     st.markdown("---")
@@ -972,84 +1399,218 @@ def get_params_ui(strategia_nazwa, S):
     """Dynamiczne UI dla parametrów strategii"""
     params = {}
     
-    single_strike = ["Long Call", "Long Put", "Short Call (Naked)", "Short Put (Cash-Secured)",
-                     "Covered Call", "Covered Put", "Protective Put", "Protective Call",
-                     "Long Straddle", "Short Straddle", "Synthetic Long Stock", "Synthetic Short Stock",
-                     "Calendar Call Spread", "Calendar Put Spread"]
-    
-    two_strikes_same = ["Bull Call Spread", "Bear Put Spread", "Bull Put Spread (Credit)", 
-                        "Bear Call Spread (Credit)", "Call Ratio Spread", "Put Ratio Spread",
-                        "Diagonal Call Spread"]
+    wpis = REJESTR[strategia_nazwa]
+    d = wpis.params(S)
     
-    strangle = ["Long Strangle", "Short Strangle", "Collar (Zero-Cost)"]
+    if wpis.uklad == "jeden":
+        params["K"] = st.slider("Strike (K)", float(S * 0.7), float(S * 1.3), float(d["K"]), step=1.0)
     
-    condor = ["Iron Condor"]
-    butterfly = ["Iron Butterfly"]
-    butterfly3 = ["Long Call Butterfly", "Long Put Butterfly"]
-    
-    if strategia_nazwa in single_strike:
-        default = S if "ATM" in STRATEGIE[strategia_nazwa].konstrukcja or "Straddle" in strategia_nazwa else S * 1.05 if "Call" in strategia_nazwa and "Put" not in strategia_nazwa else S * 0.95
-        params["K"] = st.slider("Strike (K)", float(S * 0.7), float(S * 1.3), float(default), step=1.0)
-    
-    elif strategia_nazwa in two_strikes_same:
+    elif wpis.uklad in ("dwa", "dwa_nizej"):
         col1, col2 = st.columns(2)
-        if "Bull" in strategia_nazwa or "Ratio" in strategia_nazwa:
+        if wpis.uklad == "dwa":
             with col1:
-                params["K1"] = st.slider("K1 (niższy)", float(S * 0.8), float(S * 1.1), float(S * 0.95), step=1.0)
+                params["K1"] = st.slider("K1 (niższy)", float(S * 0.8), float(S * 1.1), float(d["K1"]), step=1.0)
             with col2:
-                params["K2"] = st.slider("K2 (wyższy)", float(params["K1"]), float(S * 1.3), float(S * 1.1), step=1.0)
+                params["K2"] = st.slider("K2 (wyższy)", float(params["K1"]), float(S * 1.3), float(d["K2"]), step=1.0)
         else:  # Bear
             with col1:
-                params["K1"] = st.slider("K1 (niższy)", float(S * 0.7), float(S), float(S * 0.9), step=1.0)
+                params["K1"] = st.slider("K1 (niższy)", float(S * 0.7), float(S), float(d["K1"]), step=1.0)
             with col2:
-                params["K2"] = st.slider("K2 (wyższy)", float(params["K1"]), float(S * 1.2), float(S * 1.05), step=1.0)
+                params["K2"] = st.slider("K2 (wyższy)", float(params["K1"]), float(S * 1.2), float(d["K2"]), step=1.0)
     
-    elif strategia_nazwa in strangle:
+    elif wpis.uklad == "strangle":
         col1, col2 = st.columns(2)
         with col1:
-            params["K_put"] = st.slider("Strike PUT", float(S * 0.7), float(S), float(S * 0.9), step=1.0)
+            params["K_put"] = st.slider("Strike PUT", float(S * 0.7), float(S), float(d["K_put"]), step=1.0)
         with col2:
-            params["K_call"] = st.slider("Strike CALL", float(S), float(S * 1.3), float(S * 1.1), step=1.0)
+            params["K_call"] = st.slider("Strike CALL", float(S), float(S * 1.3), float(d["K_call"]), step=1.0)
     
-    elif strategia_nazwa in condor:
+    elif wpis.uklad == "condor":
         st.markdown("*Strike'i: K1 < K2 < K3 < K4*")
         col1, col2, col3, col4 = st.columns(4)
         with col1:
-            params["K1"] = st.number_input("K1 (Put buy)", value=float(S * 0.85), step=1.0)
+            params["K1"] = st.number_input("K1 (Put buy)", value=float(d["K1"]), step=1.0)
         with col2:
-            params["K2"] = st.number_input("K2 (Put sell)", value=float(S * 0.95), step=1.0)
+            params["K2"] = st.number_input("K2 (Put sell)", value=float(d["K2"]), step=1.0)
         with col3:
-            params["K3"] = st.number_input("K3 (Call sell)", value=float(S * 1.05), step=1.0)
+            params["K3"] = st.number_input("K3 (Call sell)", value=float(d["K3"]), step=1.0)
         with col4:
-            params["K4"] = st.number_input("K4 (Call buy)", value=float(S * 1.15), step=1.0)
+            params["K4"] = st.number_input("K4 (Call buy)", value=float(d["K4"]), step=1.0)
     
-    elif strategia_nazwa in butterfly:
+    elif wpis.uklad == "butterfly":
         col1, col2, col3 = st.columns(3)
         with col1:
-            params["K_low"] = st.number_input("K niskie", value=float(S * 0.9), step=1.0)
+            params["K_low"] = st.number_input("K niskie", value=float(d["K_low"]), step=1.0)
         with col2:
-            params["K_mid"] = st.number_input("K środkowe", value=float(S), step=1.0)
+            params["K_mid"] = st.number_input("K środkowe", value=float(d["K_mid"]), step=1.0)
         with col3:
-            params["K_high"] = st.number_input("K wysokie", value=float(S * 1.1), step=1.0)
+            params["K_high"] = st.number_input("K wysokie", value=float(d["K_high"]), step=1.0)
     
-    elif strategia_nazwa in butterfly3:
+    elif wpis.uklad == "butterfly3":
         col1, col2, col3 = st.columns(3)
         with col1:
-            params["K1"] = st.number_input("K1 (ITM)", value=float(S * 0.95), step=1.0)
+            params["K1"] = st.number_input("K1 (ITM)", value=float(d["K1"]), step=1.0)
         with col2:
-            params["K2"] = st.number_input("K2 (ATM)", value=float(S), step=1.0)
+            params["K2"] = st.number_input("K2 (ATM)", value=float(d["K2"]), step=1.0)
         with col3:
-            params["K3"] = st.number_input("K3 (OTM)", value=float(S * 1.05), step=1.0)
+            params["K3"] = st.number_input("K3 (OTM)", value=float(d["K3"]), step=1.0)
     
     else:
-        params["K"] = S
+        params.update(d)
     
     return params
 
+@st.cache_data(show_spinner=False)
+def porownaj_strategie(nazwy, S, σ, dni):
+    """Siatka, macierz payoff i tabela metryk dla wybranych strategii - jedno przeliczenie"""
+    T = dni / 365
+    x = np.linspace(S * 0.5, S * 1.5, 300)
+    params_lista = [domyslne_params(nazwa, S) for nazwa in nazwy]
+    payoff, koszt, greeks = macierz_strategii(list(nazwy), x, S, T, σ, params_lista)
+    be = breakeveny(x, payoff)
+
+    pop = np.full(len(nazwy), np.nan)
+    for i, (nazwa, params) in enumerate(zip(nazwy, params_lista)):
+        if STRATEGIE[nazwa].kategoria != "🏦 Arbitraż":
+            pop[i] = analiza_wygasniecia(nazwa, S, params, T, σ)["pop"]
+
+    tabela = pd.DataFrame({
+        "Strategia": list(nazwy),
+        "Kategoria": [STRATEGIE[nazwa].kategoria for nazwa in nazwy],
+        "Koszt (PLN)": koszt * 100,
+        "Max Zysk (PLN)": payoff.max(axis=1) * 100,
+        "Max Strata (PLN)": payoff.min(axis=1) * 100,
+        "BE 1": be[:, 0],
+        "BE 2": be[:, 1],
+        "POP (%)": pop * 100,
+        "Delta": greeks["delta"],
+        "Gamma": greeks["gamma"],
+        "Theta": greeks["theta"],
+        "Vega": greeks["vega"],
+    })
+    return x, payoff, tabela
+
+def widok_porownania(S, vol, dni):
+    """Porównanie wielu strategii na domyślnych parametrach"""
+    st.markdown("## 📊 Porównanie strategii")
+    st.markdown("*Wszystkie strategie liczone jednym przebiegiem - strike'i domyślne jak w widoku pojedynczym*")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        kierunek = st.selectbox("🧭 Kierunek", ["Wszystkie", *REJESTR.wartosci("kierunek")])
+    with col2:
+        zmiennosc = st.selectbox("🌪️ Zmienność", ["Wszystkie", *REJESTR.wartosci("zmiennosc")])
+    with col3:
+        poziom = st.selectbox("🎚️ Poziom ryzyka", ["Wszystkie", *sorted(REJESTR.wartosci("poziom"))])
+    wybor = lambda w: None if w == "Wszystkie" else w
+    dostepne = REJESTR.filtruj(kierunek=wybor(kierunek), zmiennosc=wybor(zmiennosc), poziom=wybor(poziom))
+    
+    nazwy = st.multiselect("📋 Strategie", list(REJESTR), default=dostepne)
+    if not nazwy:
+        st.info("Wybierz co najmniej jedną strategię")
+        return
+    uklad = st.radio("Wykres", ["🔀 Nałożone krzywe", "🔲 Małe wykresy"], horizontal=True)
+    
+    x, payoff, tabela = porownaj_strategie(tuple(nazwy), S, vol, dni)
+    
+    if uklad == "🔀 Nałożone krzywe":
+        fig = go.Figure()
+        for nazwa, y in zip(nazwy, payoff):
+            fig.add_trace(go.Scatter(x=x, y=y * 100, name=nazwa, line=dict(width=2)))
+        fig.update_layout(template="plotly_dark", height=550, xaxis_title="Cena przy wygaśnięciu",
+                          yaxis_title="Zysk / Strata (PLN)", margin=dict(l=50, r=50, t=30, b=50))
+    else:
+        kolumny = 4
+        wiersze = -(-len(nazwy) // kolumny)
+        fig = make_subplots(rows=wiersze, cols=kolumny, subplot_titles=nazwy, shared_xaxes=True,
+                            vertical_spacing=0.25 / wiersze)
+        for i, y in enumerate(payoff):
+            kolor = "#00FF88" if y[len(y) // 2] > 0 else "#FF4444"
+            fig.add_trace(go.Scatter(x=x, y=y * 100, line=dict(color=kolor, width=2)),
+                          row=i // kolumny + 1, col=i % kolumny + 1)
+        fig.update_annotations(font_size=11)
+        fig.update_layout(template="plotly_dark", height=220 * wiersze, showlegend=False,
+                          margin=dict(l=30, r=30, t=40, b=30))
+    fig.add_hline(y=0, line_dash="dash", line_color="gray", opacity=0.5)
+    fig.add_vline(x=S, line_dash="dot", line_color="#FFD700", opacity=0.7)
+    st.plotly_chart(fig, use_container_width=True)
+    
+    st.markdown("### 📋 Metryki (kliknij nagłówek, aby sortować)")
+    st.dataframe(tabela, hide_index=True, use_container_width=True, column_config={
+        "Koszt (PLN)": st.column_config.NumberColumn(format="%.0f"),
+        "Max Zysk (PLN)": st.column_config.NumberColumn(format="%.0f"),
+        "Max Strata (PLN)": st.column_config.NumberColumn(format="%.0f"),
+        "BE 1": st.column_config.NumberColumn(format="%.1f"),
+        "BE 2": st.column_config.NumberColumn(format="%.1f"),
+        "POP (%)": st.column_config.NumberColumn(format="%.1f"),
+        "Delta": st.column_config.NumberColumn(format="%.3f"),
+        "Gamma": st.column_config.NumberColumn(format="%.4f"),
+        "Theta": st.column_config.NumberColumn(format="%.3f"),
+        "Vega": st.column_config.NumberColumn(format="%.3f"),
+    })
+    st.caption("Max zysk/strata w zakresie ±50% ceny aktywa. Koszt > 0 to debet (na 1 kontrakt = 100 akcji).")
+
+@st.cache_data(show_spinner=False)
+def rekomendacje(S, σ, dni, ruch, niepewnosc, zmiana_iv, horyzont):
+    """Ocena wszystkich wariantów strategii pod pogląd - jedno przeliczenie na zestaw wejść"""
+    from recommender import ocen
+    return ocen(S, σ, dni, ruch=ruch, niepewnosc=niepewnosc, zmiana_iv=zmiana_iv, horyzont=horyzont)
+
+def widok_rekomendacji(S, vol, dni):
+    """Ranking strategii i wariantów strike'ów pod scenariusz użytkownika"""
+    from recommender import RANKINGI
+    st.markdown("## 🎯 Rekomendacje strategii")
+    st.markdown("*Opisz swój pogląd - każda strategia jest oceniana na siatce wariantów strike'ów*")
+    
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        ruch = st.slider("📈 Oczekiwany ruch (%)", -30.0, 30.0, 0.0, step=0.5)
+    with col2:
+        horyzont = st.slider("⏱️ Horyzont (dni)", 1, max(dni, 2), dni)
+    with col3:
+        rynkowa = vol * np.sqrt(horyzont / 365) * 100
+        niepewnosc = st.slider("🎲 Niepewność ruchu (%)", 0.5, 50.0, float(np.clip(round(rynkowa * 2) / 2, 0.5, 50.0)),
+                               step=0.5, help=f"Odchylenie ruchu do horyzontu; rynkowe z IV: {rynkowa:.1f}%")
+    with col4:
+        zmiana_iv = st.slider("🌪️ Zmiana IV (pkt %)", -30, 30, 0, help="Ma znaczenie dla nóg żyjących po horyzoncie")
+    
+    col1, col2 = st.columns([1, 1])
+    with col1:
+        ranking = st.radio("Sortuj wg", list(RANKINGI), format_func=RANKINGI.get, horizontal=True)
+    with col2:
+        wszystkie = st.checkbox("Pokaż wszystkie warianty strike'ów")
+    
+    tabela = rekomendacje(S, vol, dni, ruch / 100, niepewnosc / 100, zmiana_iv / 100, horyzont)
+    ranking_tabela = tabela.sort_values(ranking, ascending=False, kind="stable")
+    if not wszystkie:
+        ranking_tabela = ranking_tabela.drop_duplicates("strategia")
+    
+    st.caption(f"Oceniono {len(tabela)} wariantów {tabela['strategia'].nunique()} strategii")
+    widok = pd.DataFrame({
+        "Strategia": ranking_tabela["strategia"],
+        "Kategoria": ranking_tabela["kategoria"],
+        "Strike'i": ranking_tabela["strike"],
+        "Koszt (PLN)": ranking_tabela["koszt"],
+        "EV (PLN)": ranking_tabela["ev"],
+        "POP (%)": ranking_tabela["pop"] * 100,
+        "Kapitał (PLN)": ranking_tabela["kapital"],
+        "EV / Kapitał (%)": ranking_tabela["efektywnosc"] * 100,
+    })
+    st.dataframe(widok, hide_index=True, use_container_width=True, column_config={
+        "Koszt (PLN)": st.column_config.NumberColumn(format="%.0f"),
+        "EV (PLN)": st.column_config.NumberColumn(format="%.0f"),
+        "POP (%)": st.column_config.NumberColumn(format="%.1f"),
+        "Kapitał (PLN)": st.column_config.NumberColumn(format="%.0f"),
+        "EV / Kapitał (%)": st.column_config.NumberColumn(format="%.1f"),
+    })
+    st.caption("Wynik na horyzoncie na 1 kontrakt (100 akcji). Kapitał to największa strata w zakresie "
+               "co najmniej ±50% ceny aktywa. Strategie arbitrażowe pominięte.")
+
 # ══════════════════════════════════════════════════════════════════════════════
 # GŁÓWNA APLIKACJA
 # ══════════════════════════════════════════════════════════════════════════════
 def main():
+    st.set_page_config(page_title="🎓 Akademia Opcji v2.0", page_icon="📈", layout="wide")
     st.title("🎓 Akademia Opcji v2.0")
     st.markdown("*Kompletna platforma edukacyjna - wszystkie strategie opcyjne*")
     
@@ -1059,6 +1620,7 @@ def main():
     vol = st.sidebar.slider("🌪️ Zmienność IV (%)", 5, 150, 30) / 100
     dni = st.sidebar.slider("📅 Dni do wygaśnięcia", 1, 365, 30)
     T = dni / 365
+    st.sidebar.caption(f"💹 Stopa wolna od ryzyka dla terminu: {KRZYWA.stopa(T) * 100:.2f}%")
     
     st.sidebar.markdown("---")
     st.sidebar.markdown("### 📊 Interpretacja IV")
@@ -1070,22 +1632,33 @@ def main():
     elif vol > 0.5:
         st.sidebar.info("💡 Sprzedawaj premię (iron condor)")
     
-    # Grupowanie strategii
-    kategorie = {}
-    for nazwa, strat in STRATEGIE.items():
-        kat = strat.kategoria
-        if kat not in kategorie:
-            kategorie[kat] = []
-        kategorie[kat].append(nazwa)
-    
-    # Wybór strategii
+    st.sidebar.markdown("---")
+    tryb = st.sidebar.radio("🧭 Tryb", ["📋 Pojedyncza strategia", "📊 Porównanie strategii", "🎯 Rekomendacje"])
+    if tryb == "📊 Porównanie strategii":
+        widok_porownania(S, vol, dni)
+        return
+    if tryb == "🎯 Rekomendacje":
+        widok_rekomendacji(S, vol, dni)
+        return
+    
+    # Wybór strategii (kategorie i wyszukiwanie z rejestru)
     st.markdown("---")
+    zapytanie = st.text_input("🔎 Szukaj strategii", placeholder="np. iron, zabezpieczenie, theta")
+    wyniki = REJESTR.szukaj(zapytanie) if zapytanie.strip() else None
     col1, col2 = st.columns([1, 2])
     
-    with col1:
-        wybrana_kategoria = st.selectbox("📂 Kategoria", list(kategorie.keys()))
-    with col2:
-        wybrana_strategia = st.selectbox("📋 Strategia", kategorie[wybrana_kategoria])
+    if wyniki:
+        with col1:
+            st.markdown(f"**🔎 Wyniki:** {len(wyniki)}")
+        with col2:
+            wybrana_strategia = st.selectbox("📋 Strategia", wyniki)
+    else:
+        if wyniki is not None:
+            st.caption("Brak wyników - pokazuję wszystkie kategorie")
+        with col1:
+            wybrana_kategoria = st.selectbox("📂 Kategoria", list(REJESTR.kategorie))
+        with col2:
+            wybrana_strategia = st.selectbox("📋 Strategia", REJESTR.kategorie[wybrana_kategoria])
     
     strategia = STRATEGIE[wybrana_strategia]
     
@@ -1097,21 +1670,26 @@ def main():
     st.markdown("### ⚙️ Parametry Strategii")
     params = get_params_ui(wybrana_strategia, S)
     
-    # Obliczenia
-    x = np.linspace(S * 0.5, S * 1.5, 300)
-    y, koszt, greeks = get_payoff(wybrana_strategia, x, S, params, T, vol)
-    
-    # Breakeven
-    breakevens = []
-    zero_crossings = np.where(np.diff(np.sign(y)))[0]
-    for idx in zero_crossings:
-        breakevens.append(x[idx])
+    # Obliczenia (widoki domyślne z trwałego magazynu wyników - wspólne dla sesji i procesów)
+    from result_store import widok_payoff
+    widok = widok_payoff(wybrana_strategia, S, params, T, vol)
+    x, y = widok["tablice"]["x"], widok["tablice"]["y"]
+    koszt, greeks, breakevens = widok["meta"]["koszt"], widok["meta"]["greeks"], widok["meta"]["breakevens"]
     
     # Wykres
     st.markdown("### 📈 Wykres Payoff (przy wygaśnięciu)")
-    fig = rysuj_wykres(x, y * 100, f"{wybrana_strategia}", S, breakevens)
+    fig = pio.from_json(widok["wykres"])
     st.plotly_chart(fig, use_container_width=True)
-    
+
+    # Rozpad czasowy - wszystkie dni policzone naraz, odtwarzanie w przeglądarce
+    nogi = NOGI[wybrana_strategia]  # każda strategia ma nogi, a get_params_ui zwraca wszystkie ich strike'i
+    with st.expander("⏳ Rozpad czasowy (animacja do wygaśnięcia)"):
+        from result_store import widok_rozpadu
+        rozpad = widok_rozpadu(wybrana_strategia, S, params, T, vol)
+        st.plotly_chart(pio.from_json(rozpad["wykres"]), use_container_width=True)
+        st.caption("▶️ odtwarza, suwak przewija dni - bez przeliczania na serwerze. "
+                   "Biała linia: wartość rynkowa strategii, przerywana: payoff przy wygaśnięciu.")
+
     # Panel edukacyjny
     panel_edukacyjny(strategia, greeks, koszt)
     
@@ -1165,6 +1743,99 @@ def main():
         else:
             st.metric("📊 Zysk/Ryzyko", "N/A")
     
+    # Prawdopodobieństwa (zamknięte wzory lognormalne)
+    # Arbitraż ma na wykresie płaski profil stopy - rozkład ceny nic tu nie wnosi
+    if strategia.kategoria != "🏦 Arbitraż":
+        analiza = analiza_wygasniecia(wybrana_strategia, S, params, T, vol)
+        if np.isfinite(analiza["pop"]):
+            col_p1, col_p2, col_p3 = st.columns(3)
+            with col_p1:
+                st.metric("🎲 Szansa zysku (POP)", f"{float(analiza['pop']) * 100:.1f}%")
+            with col_p2:
+                st.metric("💵 Oczekiwany P&L", f"{float(analiza['ev']) * 100:.0f} PLN")
+            with col_p3:
+                dotkniecie = " | ".join(f"{float(params[k]):.0f}: {float(p) * 100:.0f}%"
+                                        for k, p in analiza["dotkniecie"].items())
+                st.metric("🎯 Dotknięcie strike'ów", dotkniecie)
+            st.caption("Rozkład lognormalny z tą samą stopą, IV i terminem co wycena. "
+                       "Oczekiwany P&L przy neutralnym dryfie jest bliski zeru - premia jest 'uczciwa'.")
+    
+    # Greeks wyższego rzędu - jedno wywołanie modelu na nogę
+    with st.expander("🔬 Greeks wyższego rzędu (rho, vanna, volga, charm, speed)"):
+        pola = ("delta", "gamma", "theta", "vega") + GREEKS_WYZSZE
+        wiersze = []
+        for n in nogi:
+            if n.typ == "akcja":
+                wiersze.append({"Noga": f"{n.ilosc:+g} akcja", "K": np.nan, "Dni": np.nan,
+                                **{k: float(n.ilosc) if k == "delta" else 0.0 for k in pola}})
+                continue
+            T_nogi = T * n.termin
+            g = bs(S, params[n.strike], T_nogi, KRZYWA.stopa(T_nogi), vol, n.typ, wyzsze=True)
+            wiersze.append({"Noga": f"{n.ilosc:+g} {n.typ}", "K": float(params[n.strike]), "Dni": T_nogi * 365,
+                            **{k: float(n.ilosc * g[k]) for k in pola}})
+        _, _, g_suma = wycen_strategie(wybrana_strategia, None, S, params, T, vol, wyzsze=True)
+        wiersze.append({"Noga": "Σ strategia", "K": np.nan, "Dni": np.nan, **{k: float(g_suma[k]) for k in pola}})
+        st.dataframe(pd.DataFrame(wiersze), hide_index=True, use_container_width=True)
+        st.caption("Na 1 akcję. Rho i vanna na 1 pkt % stopy / IV, volga na (1 pkt % IV)², "
+                   "charm - zmiana delty na dzień, speed - zmiana gammy na 1 PLN ceny.")
+    
+    # Depozyt zabezpieczający
+    with st.expander("🏦 Depozyt zabezpieczający (1 kontrakt)"):
+        from margin import depozyt_strategii
+        dep = depozyt_strategii(wybrana_strategia, S, params, T, vol)
+        col_d1, col_d2, col_d3 = st.columns(3)
+        with col_d1:
+            st.metric("📊 Scenariusze (SPAN)", f"{dep['span']:.0f} PLN")
+        with col_d2:
+            st.metric("📏 Reguły strategii", f"{dep['regulowy']:.0f} PLN")
+        with col_d3:
+            pelne = dep["pelne_pokrycie"]
+            st.metric("💵 Pełne pokrycie", f"{pelne:.0f} PLN" if np.isfinite(pelne) else "♾️")
+        st.caption("SPAN: najgorszy z 16 scenariuszy (cena ±15%, IV ±4 pkt, 1 dzień). Reguły: maks. strata "
+                   "przy wygaśnięciu, strona niepokryta - ruch ±20% (min. 10% ceny). "
+                   "Pełne pokrycie - kapitał na najgorszy przypadek (np. gotówka pod cash-secured put).")
+    
+    # Hedging delta
+    st.markdown("---")
+    with st.expander("🧪 Ile kosztuje hedging delta? (symulacja)"):
+        from hedging import symuluj_hedging
+        col_h1, col_h2, col_h3, col_h4 = st.columns(4)
+        with col_h1:
+            vol_real = st.slider("Zmienność realizowana (%)", 5, 150, int(round(vol * 100))) / 100
+        with col_h2:
+            co_dni = st.slider("Rebalans co (dni)", 1, max(2, dni), 1)
+        with col_h3:
+            pasmo = st.number_input("Pasmo delta (0 = brak)", value=0.0, min_value=0.0, step=0.05)
+        with col_h4:
+            koszt_tr = st.number_input("Koszt transakcji (%)", value=0.05, min_value=0.0, step=0.01) / 100
+        
+        if st.button("▶️ Symuluj 5 000 ścieżek"):
+            wynik = symuluj_hedging(wybrana_strategia, S, params, T, vol, σ_real=vol_real,
+                                    sciezki=5000, kroki=dni, co_krokow=co_dni,
+                                    pasmo=pasmo or None, koszt_transakcji=koszt_tr)
+            fig_h = go.Figure()
+            fig_h.add_trace(go.Histogram(x=wynik["pnl_bez_hedgingu"] * 100, name="Bez hedgingu",
+                                         marker_color="#FF4444", opacity=0.5, nbinsx=80))
+            fig_h.add_trace(go.Histogram(x=wynik["pnl"] * 100, name="Z hedgingiem delta",
+                                         marker_color="#00FF88", opacity=0.7, nbinsx=80))
+            fig_h.update_layout(template="plotly_dark", barmode="overlay", height=350,
+                                xaxis_title="P&L (PLN)", margin=dict(l=50, r=50, t=30, b=50))
+            st.plotly_chart(fig_h, use_container_width=True)
+            
+            stat = wynik["statystyki"]
+            col_w1, col_w2, col_w3, col_w4 = st.columns(4)
+            with col_w1:
+                st.metric("Średni P&L", f"{stat['srednia'] * 100:.0f} PLN")
+            with col_w2:
+                st.metric("Odchylenie", f"{stat['odchylenie'] * 100:.0f} PLN",
+                          f"bez: {wynik['statystyki_bez_hedgingu']['odchylenie'] * 100:.0f}", delta_color="off")
+            with col_w3:
+                st.metric("Koszty transakcji", f"{wynik['koszty'].mean() * 100:.1f} PLN")
+            with col_w4:
+                st.metric("Rebalansów", f"{wynik['rebalanse'].mean():.1f}")
+            st.caption("💡 Realizowana > implikowana: long gamma zarabia na hedgingu (gamma scalping). "
+                       "Realizowana < implikowana: zarabia sprzedawca zmienności.")
+    
     # Stopka
     st.markdown("---")
     st.caption("⚠️ **Ostrzeżenie:** Handel opcjami wiąże się ze znacznym ryzykiem. Niektóre strategie mogą generować straty przekraczające początkową inwestycję. To narzędzie służy wyłącznie celom edukacyjnym.")
@@ -0,0 +1,200 @@
+"""
+🎯 REKOMENDACJE - ranking strategii pod własny scenariusz rynkowy
+Zamiast stałych podpowiedzi ("kupuj opcje", "sprzedawaj premię") użytkownik
+podaje pogląd jako rozkład: oczekiwany ruch ceny (znak to kierunek), jego
+niepewność, zmianę IV i horyzont. Cena na horyzoncie jest lognormalna:
+
+    ln(S_h / S) ~ N(ln(1 + ruch) - ½s², s²)
+
+Każda strategia z STRATEGIE (bez arbitrażowych) dostaje siatkę wariantów
+strike'ów: domyślny układ przesunięty względem S i rozciągnięty/ściśnięty.
+Nogi wszystkich wariantów są spłaszczane i deduplikowane - wycena dziś i na
+horyzoncie (z IV po zmianie) to jedno wywołanie modelu na typ opcji, a macierz
+P&L (warianty × siatka cen) powstaje przez sumy nóg (reduceat). Wartość
+oczekiwana, POP i kapitał wszystkich wariantów to iloczyny z jednym wektorem
+prawdopodobieństw siatki.
+
+Użycie:
+    python recommender.py --S 100 --iv 30 --dni 30 --ruch 5 --niepewnosc 6
+    python recommender.py --S 100 --iv 45 --dni 45 --zmiana-iv -10 --ranking pop
+Wynik na 1 kontrakt (100 akcji).
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr
+
+from options import KRZYWA, NOGI, REJESTR, bs, stopa_dla, stopa_terminowa_dla
+
+MNOZNIK = 100  # akcji na kontrakt
+PRZESUNIECIA = np.linspace(-0.1, 0.1, 9)  # przesunięcie układu strike'ów (ułamek S)
+SKALE = (0.5, 1.0, 1.5, 2.0)  # rozpiętość układu względem domyślnej
+RANKINGI = {"ev": "Oczekiwany P&L", "pop": "Szansa zysku", "efektywnosc": "EV / kapitał"}
+
+# ══════════════════════════════════════════════════════════════════════════════
+# POGLĄD I KANDYDACI
+# ══════════════════════════════════════════════════════════════════════════════
+def rozklad_pogladu(S, ruch, niepewnosc, punkty=601):
+    """Siatka cen na horyzoncie i jej prawdopodobieństwa (ogony doliczone do skrajnych punktów)
+
+    Siatka obejmuje co najmniej ±50% S (do wyznaczenia kapitału na ryzyku)
+    i ±5 odchyleń poglądu.
+    """
+    s = max(niepewnosc, 1e-4)
+    mu = np.log1p(ruch) - 0.5 * s**2
+    x = np.linspace(min(0.5, np.exp(mu - 5 * s)) * S, max(1.5, np.exp(mu + 5 * s)) * S, punkty)
+    krawedzie = np.concatenate(([0.0], 0.5 * (x[1:] + x[:-1]), [np.inf]))
+    with np.errstate(divide="ignore"):
+        dystrybuanta = ndtr((np.log(krawedzie / S) - mu) / s)
+    return x, np.diff(dystrybuanta)
+
+
+def _krok_strike(S):
+    """Krok notowań strike'ów - 1 przy S rzędu 100"""
+    return 10.0 ** (np.floor(np.log10(S)) - 2)
+
+
+def kandydaci(S, nazwy=None, przesuniecia=PRZESUNIECIA, skale=SKALE):
+    """Warianty strike'ów każdej strategii - słownik nazwa -> (klucze, macierz warianty × klucze)
+
+    K = S·(1 + przesunięcie + skala·(m - 1)) dla domyślnych mnożników m,
+    zaokrąglone do kroku notowań; warianty, w których strike'i się zlewają
+    albo zamieniają kolejnością, i duplikaty są pomijane.
+    """
+    nazwy = [n for n in REJESTR if REJESTR[n].kategoria != "🏦 Arbitraż"] if nazwy is None else nazwy
+    krok = _krok_strike(S)
+    p, s = (a.ravel() for a in np.meshgrid(np.asarray(przesuniecia, dtype=float), np.asarray(skale, dtype=float)))
+    wynik = {}
+    for nazwa in nazwy:
+        klucze, m = zip(*sorted(REJESTR[nazwa].mnozniki, key=lambda km: km[1]))
+        m = np.array(m)
+        K = np.round(S * (1 + p[:, None] + s[:, None] * (m - 1)) / krok) * krok
+        rosnace = (np.diff(K, axis=1) > 0) | (np.diff(m) == 0)
+        K = np.unique(K[rosnace.all(axis=1) & (K > 0).all(axis=1)], axis=0)
+        wynik[nazwa] = (klucze, K)
+    return wynik
+
+# ══════════════════════════════════════════════════════════════════════════════
+# OCENA
+# ══════════════════════════════════════════════════════════════════════════════
+def _splaszcz(warianty):
+    """Nogi wszystkich wariantów - tablice posortowane po kandydacie"""
+    kand, K, termin, ilosc, call = [], [], [], [], []
+    akcje, nazwy, strike = [], [], []
+    n0 = 0
+    for nazwa, (klucze, Ks) in warianty.items():
+        kolumna = {k: i for i, k in enumerate(klucze)}
+        idx = np.arange(n0, n0 + len(Ks))
+        for n in NOGI[nazwa]:
+            if n.typ == "akcja":
+                continue
+            kand.append(idx)
+            K.append(Ks[:, kolumna[n.strike]])
+            termin.append(np.full(len(Ks), n.termin))
+            ilosc.append(np.full(len(Ks), float(n.ilosc)))
+            call.append(np.full(len(Ks), n.typ == "call"))
+        akcje.append(np.full(len(Ks), float(sum(n.ilosc for n in NOGI[nazwa] if n.typ == "akcja"))))
+        nazwy += [nazwa] * len(Ks)
+        strike += [", ".join(f"{k}={v:g}" for k, v in zip(klucze, wiersz)) for wiersz in Ks]
+        n0 += len(Ks)
+    kand, K, termin, ilosc, call = (np.concatenate(a) for a in (kand, K, termin, ilosc, call))
+    kolejnosc = np.argsort(kand, kind="stable")
+    return ({"kand": kand[kolejnosc], "K": K[kolejnosc], "termin": termin[kolejnosc],
+             "ilosc": ilosc[kolejnosc], "call": call[kolejnosc]},
+            np.concatenate(akcje), nazwy, strike)
+
+
+def ocen(S, σ, dni, ruch=0.0, niepewnosc=None, zmiana_iv=0.0, horyzont=None, nazwy=None, r=None, model=bs):
+    """Ranking wariantów strategii pod pogląd - DataFrame na 1 kontrakt
+
+    σ, ruch, niepewnosc i zmiana_iv jako ułamki (0.05 = 5%, zmiana IV w punktach
+    zmienności); dni - wygaśnięcie strategii (nogi kalendarzowe jak w NOGI),
+    horyzont - dni do oceny poglądu (domyślnie wygaśnięcie). Domyślna niepewność
+    to rynkowa: σ·√(horyzont/365). Kapitał to największa strata na siatce
+    (co najmniej ±50% S), efektywność = EV / kapitał.
+    """
+    r = KRZYWA if r is None else r
+    horyzont = dni if horyzont is None else min(horyzont, dni)
+    T, h = dni / 365, horyzont / 365
+    niepewnosc = σ * np.sqrt(h) if niepewnosc is None else niepewnosc
+    x, p = rozklad_pogladu(S, ruch, niepewnosc)
+
+    nogi, akcje, nazwy_kand, strike = _splaszcz(kandydaci(S, nazwy))
+
+    # Warianty dzielą nogi - każda unikalna (typ, K, termin) wyceniana raz
+    unikalne, inv = np.unique(np.stack([nogi["call"], nogi["K"], nogi["termin"]], axis=1), axis=0,
+                              return_inverse=True)
+    inv = inv.ravel()
+    call_u, K_u, T_u = unikalne[:, 0].astype(bool), unikalne[:, 1], unikalne[:, 2] * T
+    reszta = np.maximum(T_u - h, 0.0)
+    r_dzis = np.broadcast_to(stopa_dla(r, T_u), T_u.shape)
+    r_fwd = np.broadcast_to(stopa_terminowa_dla(r, np.minimum(h, T_u), T_u), T_u.shape)
+    σ_h = max(σ + zmiana_iv, 0.01)
+
+    cena = np.empty(len(K_u))
+    wartosc = np.empty((len(K_u), len(x)))
+    for typ, m in (("call", call_u), ("put", ~call_u)):
+        if not m.any():
+            continue
+        cena[m] = model(S, K_u[m], T_u[m], r_dzis[m], σ, typ)["cena"]
+        K_ = K_u[m][:, None]
+        wartosc[m] = np.maximum(x - K_, 0) if typ == "call" else np.maximum(K_ - x, 0)
+        zyje = m & (reszta > 0)
+        if zyje.any():
+            wartosc[zyje] = model(x, K_u[zyje][:, None], reszta[zyje][:, None], r_fwd[zyje][:, None], σ_h,
+                                  typ)["cena"]
+
+    # Sumy nóg kandydatów: nogi posortowane po kandydacie, więc reduceat po początkach
+    _, poczatki = np.unique(nogi["kand"], return_index=True)
+    koszt = np.add.reduceat(nogi["ilosc"] * cena[inv], poczatki)
+    pnl = np.add.reduceat(nogi["ilosc"][:, None] * wartosc[inv], poczatki, axis=0)
+    pnl += akcje[:, None] * (x - S) - koszt[:, None]
+
+    ev = pnl @ p
+    kapital = np.maximum(-pnl.min(axis=1), 0.01 * S)
+    tabela = pd.DataFrame({
+        "strategia": nazwy_kand,
+        "kategoria": [REJESTR[n].kategoria for n in nazwy_kand],
+        "strike": strike,
+        "koszt": koszt * MNOZNIK,
+        "ev": ev * MNOZNIK,
+        "pop": (pnl > 0) @ p,
+        "kapital": kapital * MNOZNIK,
+        "efektywnosc": ev / kapital,
+    })
+    return tabela
+
+
+def rekomenduj(S, σ, dni, ranking="ev", najlepszy_wariant=True, **poglad):
+    """Posortowany ranking; najlepszy_wariant - jeden (najlepszy) wariant na strategię"""
+    if ranking not in RANKINGI:
+        raise ValueError(f"Nieznany ranking: {ranking} (dostępne: {', '.join(RANKINGI)})")
+    tabela = ocen(S, σ, dni, **poglad).sort_values(ranking, ascending=False, kind="stable")
+    if najlepszy_wariant:
+        tabela = tabela.drop_duplicates("strategia")
+    return tabela.reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ranking strategii opcyjnych pod pogląd rynkowy")
+    parser.add_argument("--S", type=float, default=100.0, help="Cena aktywa")
+    parser.add_argument("--iv", type=float, default=30.0, help="Zmienność implikowana (%)")
+    parser.add_argument("--dni", type=int, default=30, help="Dni do wygaśnięcia")
+    parser.add_argument("--ruch", type=float, default=0.0, help="Oczekiwany ruch ceny do horyzontu (%)")
+    parser.add_argument("--niepewnosc", type=float, help="Odchylenie ruchu (%%, domyślnie rynkowe z IV)")
+    parser.add_argument("--zmiana-iv", type=float, default=0.0, help="Zmiana IV do horyzontu (pkt %)")
+    parser.add_argument("--horyzont", type=int, help="Dni do oceny poglądu (domyślnie wygaśnięcie)")
+    parser.add_argument("--ranking", choices=list(RANKINGI), default="ev")
+    parser.add_argument("--wszystkie", action="store_true", help="Wszystkie warianty, nie tylko najlepszy")
+    parser.add_argument("-n", "--ile", type=int, default=15, help="Ile pozycji rankingu pokazać")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    tabela = rekomenduj(args.S, args.iv / 100, args.dni, args.ranking, not args.wszystkie, ruch=args.ruch / 100,
+                        niepewnosc=None if args.niepewnosc is None else args.niepewnosc / 100,
+                        zmiana_iv=args.zmiana_iv / 100, horyzont=args.horyzont)
+    czas = (time.perf_counter() - start) * 1000
+    print(f"🎯 ranking: {RANKINGI[args.ranking]} ({czas:.0f} ms)")
+    print(tabela.head(args.ile).to_string(index=False, float_format=lambda v: f"{v:.2f}"))
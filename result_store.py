@@ -0,0 +1,298 @@
+"""
+💾 MAGAZYN WYNIKÓW - trwały cache widoków współdzielony przez sesje i procesy
+Wynik (tablice payoff, Greeks, breakeveny, wykres) zapisywany jest na dysku
+pod kluczem sha256 z kanonicznego JSON-a wejścia. Tablice leżą w plikach .npy
+czytanych przez mmap (bez kopiowania), metadane i wykres - w JSON.
+
+    katalog/ab/abcdef.../meta.json, x.npy, y.npy, wykres.json
+
+Zapis jest atomowy (katalog tymczasowy + rename), więc równoległe procesy
+nie widzą połowicznych wpisów. Rozmiar jest ograniczony: gdy bieżąca suma
+rozmiarów (liczona w pamięci procesu, przeliczana z dysku co PRZELICZ_CO
+zapisów - inne procesy też piszą) przekroczy limit, usuwane są najdawniej
+używane wpisy do 90% limitu (czas dostępu = mtime katalogu, odświeżany przy odczycie).
+
+Na dysk trafiają tylko widoki popularne - domyślne strike'i strategii
+(REJESTR[n].params(S)); każda inna pozycja suwaka jest liczona na bieżąco,
+bez zapisu i skanowania magazynu.
+
+Użycie:
+    python result_store.py rozgrzej            # domyślne widoki wszystkich strategii
+    python result_store.py rozgrzej --S 100 --iv 30 --dni 7 30 90
+    python result_store.py info | wyczysc
+    python result_store.py sprawdz              # zgodność widoku pojedynczego i porównania
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+WERSJA = 2  # zmiana formatu unieważnia stare wpisy (2: poprawiona theta put)
+# Kod liczący wpisy - jego skrót jest częścią klucza, więc każda zmiana wyceny
+# unieważnia wpisy bez ręcznego podbijania WERSJA
+KOD_OBLICZEN = ("options.py", "fft_pricing.py")
+PRZELICZ_CO = 64  # zapisów między pełnymi przeliczeniami rozmiaru z dysku
+CYFRY = 12  # cyfr znaczących liczby w kluczu - szum zmiennoprzecinkowy nie rozbija wpisów
+
+
+def katalog_cache():
+    """Katalog na pliki współdzielone między procesami i sesjami"""
+    return os.environ.get("AKADEMIA_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "akademia_opcji"))
+
+# ══════════════════════════════════════════════════════════════════════════════
+# KLUCZ
+# ══════════════════════════════════════════════════════════════════════════════
+def _kanoniczne(v):
+    """Wartość w postaci niezależnej od typu (numpy / python), kolejności kluczy i szumu
+
+    Liczby (int i float) zaokrąglane są do CYFRY cyfr znaczących - ta sama postać
+    służy kluczowi i rozpoznaniu widoku domyślnego.
+    """
+    if isinstance(v, dict):
+        return {str(k): _kanoniczne(v[k]) for k in sorted(v)}
+    if isinstance(v, (list, tuple)):
+        return [_kanoniczne(e) for e in v]
+    if isinstance(v, np.ndarray):
+        return [_kanoniczne(e) for e in v.tolist()]
+    if isinstance(v, (bool, np.bool_)):
+        return bool(v)
+    if isinstance(v, (int, float, np.integer, np.floating)):
+        return repr(float(f"{float(v):.{CYFRY}g}") + 0.0)  # + 0.0: -0.0 -> 0.0
+    return v
+
+
+@lru_cache(maxsize=1)
+def wersja_obliczen():
+    """sha256 plików KOD_OBLICZEN - liczony raz na proces"""
+    h = hashlib.sha256()
+    katalog = os.path.dirname(os.path.abspath(__file__))
+    for nazwa in KOD_OBLICZEN:
+        with open(os.path.join(katalog, nazwa), "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def klucz(wejscie):
+    """sha256 kanonicznego JSON-a wejścia (z wersją formatu i skrótem kodu obliczeń)"""
+    tekst = json.dumps({"wersja": WERSJA, "kod": wersja_obliczen(), "wejscie": _kanoniczne(wejscie)},
+                       sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(tekst.encode()).hexdigest()
+
+# ══════════════════════════════════════════════════════════════════════════════
+# MAGAZYN
+# ══════════════════════════════════════════════════════════════════════════════
+class MagazynWynikow:
+    """Dyskowy magazyn LRU z limitem rozmiaru"""
+
+    def __init__(self, katalog=None, max_mb=256):
+        self.katalog = katalog or os.path.join(katalog_cache(), "wyniki")
+        self.max_bajtow = int(max_mb * 2**20)
+        self._bajty = None  # bieżąca suma rozmiarów (None - jeszcze nie policzona)
+        self._zapisy = 0
+        os.makedirs(self.katalog, exist_ok=True)
+
+    def _sciezka(self, k):
+        return os.path.join(self.katalog, k[:2], k)
+
+    def pobierz(self, k):
+        """Wpis albo None - tablice jako mmap tylko do odczytu"""
+        sciezka = self._sciezka(k)
+        try:
+            with open(os.path.join(sciezka, "meta.json")) as f:
+                meta = json.load(f)
+            tablice = {n: np.load(os.path.join(sciezka, n + ".npy"), mmap_mode="r") for n in meta["_tablice"]}
+            wykres = None
+            if meta["_wykres"]:
+                with open(os.path.join(sciezka, "wykres.json")) as f:
+                    wykres = f.read()
+            os.utime(sciezka)  # ślad użycia dla LRU
+        except (FileNotFoundError, NotADirectoryError, KeyError, ValueError):
+            return None
+        return {"tablice": tablice, "meta": {k: v for k, v in meta.items() if not k.startswith("_")},
+                "wykres": wykres}
+
+    def zapisz(self, k, tablice, meta, wykres=None):
+        """Atomowy zapis wpisu; wykres - JSON figury (fig.to_json())"""
+        sciezka = self._sciezka(k)
+        if os.path.isdir(sciezka):
+            return
+        os.makedirs(os.path.dirname(sciezka), exist_ok=True)
+        tmp = tempfile.mkdtemp(dir=os.path.dirname(sciezka), prefix=".tmp-")
+        try:
+            for n, a in tablice.items():
+                np.save(os.path.join(tmp, n + ".npy"), np.ascontiguousarray(a))
+            if wykres is not None:
+                with open(os.path.join(tmp, "wykres.json"), "w") as f:
+                    f.write(wykres)
+            with open(os.path.join(tmp, "meta.json"), "w") as f:
+                json.dump({**meta, "_tablice": list(tablice), "_wykres": wykres is not None}, f)
+            rozmiar = sum(p.stat().st_size for p in os.scandir(tmp))
+            os.rename(tmp, sciezka)
+        except OSError:
+            # Inny proces zapisał ten sam klucz pierwszy - jego wpis jest równie dobry
+            shutil.rmtree(tmp, ignore_errors=True)
+            if not os.path.isdir(sciezka):
+                raise
+            return
+        self._zapisy += 1
+        if self._bajty is None or self._zapisy % PRZELICZ_CO == 0:
+            self._bajty = self.rozmiar()["bajty"]
+        else:
+            self._bajty += rozmiar
+        if self._bajty > self.max_bajtow:
+            # Przycięcie z zapasem - kolejne zapisy nie skanują magazynu, dopóki znów się nie zapełni
+            self.przytnij(int(self.max_bajtow * 0.9))
+
+    def pobierz_lub_licz(self, wejscie, licz, trwale=True):
+        """Wynik z magazynu albo licz() -> (tablice, meta, wykres) zapisany i zwrócony
+
+        trwale=False - wynik tylko liczony, magazyn nie jest ani czytany, ani zapisywany.
+        """
+        if not trwale:
+            tablice, meta, wykres = licz()
+            return {"tablice": tablice, "meta": meta, "wykres": wykres}
+        k = klucz(wejscie)
+        wpis = self.pobierz(k)
+        if wpis is None:
+            tablice, meta, wykres = licz()
+            self.zapisz(k, tablice, meta, wykres)
+            wpis = self.pobierz(k) or {"tablice": tablice, "meta": meta, "wykres": wykres}
+        return wpis
+
+    def _wpisy(self):
+        """(czas użycia, rozmiar, ścieżka) wszystkich wpisów"""
+        wpisy = []
+        for prefiks in os.scandir(self.katalog):
+            if not prefiks.is_dir():
+                continue
+            for wpis in os.scandir(prefiks.path):
+                if wpis.name.startswith(".tmp-") or not wpis.is_dir():
+                    continue
+                rozmiar = sum(p.stat().st_size for p in os.scandir(wpis.path))
+                wpisy.append((wpis.stat().st_mtime, rozmiar, wpis.path))
+        return wpisy
+
+    def rozmiar(self):
+        wpisy = self._wpisy()
+        return {"wpisy": len(wpisy), "bajty": sum(w[1] for w in wpisy)}
+
+    def przytnij(self, do_bajtow=None):
+        """Usuwa najdawniej używane wpisy, aż rozmiar spadnie do do_bajtow (domyślnie limit)"""
+        do_bajtow = self.max_bajtow if do_bajtow is None else do_bajtow
+        wpisy = sorted(self._wpisy())
+        razem = sum(w[1] for w in wpisy)
+        for _, rozmiar, sciezka in wpisy:
+            if razem <= do_bajtow:
+                break
+            shutil.rmtree(sciezka, ignore_errors=True)
+            razem -= rozmiar
+        self._bajty = razem
+
+    def wyczysc(self):
+        shutil.rmtree(self.katalog, ignore_errors=True)
+        os.makedirs(self.katalog, exist_ok=True)
+        self._bajty = 0
+
+# ══════════════════════════════════════════════════════════════════════════════
+# WIDOK PAYOFF APLIKACJI
+# ══════════════════════════════════════════════════════════════════════════════
+_magazyn = None
+
+
+def magazyn():
+    """Magazyn procesu - katalog wspólny dla wszystkich procesów na maszynie"""
+    global _magazyn
+    if _magazyn is None:
+        _magazyn = MagazynWynikow(max_mb=float(os.environ.get("AKADEMIA_MAGAZYN_MB", 256)))
+    return _magazyn
+
+
+def domyslny_widok(strategia_nazwa, S, params):
+    """Czy strike'i to domyślne strike'i strategii - tylko takie widoki trafiają na dysk
+
+    Porównanie w postaci kanonicznej klucza: widoki uznane za ten sam domyślny
+    mają zawsze ten sam klucz.
+    """
+    from options import REJESTR
+    return _kanoniczne(params) == _kanoniczne(REJESTR[strategia_nazwa].params(S))
+
+
+def widok_payoff(strategia_nazwa, S, params, T, σ):
+    """Wykres payoff, koszt, Greeks i breakeveny widoku strategii - z magazynu lub liczone"""
+    from options import KRZYWA, get_payoff, rysuj_wykres
+
+    def licz():
+        x = np.linspace(S * 0.5, S * 1.5, 300)
+        y, koszt, greeks = get_payoff(strategia_nazwa, x, S, params, T, σ)
+        y = np.broadcast_to(np.asarray(y, dtype=float), x.shape)
+        breakevens = [float(x[i]) for i in np.where(np.diff(np.sign(y)))[0]]
+        fig = rysuj_wykres(x, y * 100, f"{strategia_nazwa}", S, breakevens)
+        meta = {"koszt": float(koszt), "greeks": {k: float(v) for k, v in greeks.items()}, "breakevens": breakevens}
+        return {"x": x, "y": y}, meta, fig.to_json()
+
+    wejscie = {"widok": "payoff", "strategia": strategia_nazwa, "S": S, "params": params, "T": T, "σ": σ,
+               "krzywa": [KRZYWA.terminy, KRZYWA.stopy]}
+    return magazyn().pobierz_lub_licz(wejscie, licz, trwale=domyslny_widok(strategia_nazwa, S, params))
+
+
+def widok_rozpadu(strategia_nazwa, S, params, T, σ):
+    """Animacja rozpadu czasowego (wszystkie dni do wygaśnięcia) - z magazynu lub liczona"""
+    from options import KRZYWA, rozpad_czasowy, rysuj_rozpad
+
+    def licz():
+        x = np.linspace(S * 0.5, S * 1.5, 300)
+        dni, y, koszt = rozpad_czasowy(strategia_nazwa, x, S, params, T, σ)
+        fig = rysuj_rozpad(x, dni, y * 100, f"⏳ {strategia_nazwa} - rozpad czasowy", S)
+        return {"x": x, "y": y}, {"koszt": koszt, "dni": int(dni[-1])}, fig.to_json()
+
+    wejscie = {"widok": "rozpad", "strategia": strategia_nazwa, "S": S, "params": params, "T": T, "σ": σ,
+               "krzywa": [KRZYWA.terminy, KRZYWA.stopy]}
+    return magazyn().pobierz_lub_licz(wejscie, licz, trwale=domyslny_widok(strategia_nazwa, S, params))
+
+
+def rozgrzej(S=100.0, iv=(0.3,), dni=(30,)):
+    """Liczy domyślne widoki wszystkich strategii (strike'i jak w get_params_ui)"""
+    from options import REJESTR
+    policzone = 0
+    for nazwa in REJESTR:
+        params = REJESTR[nazwa].params(S)
+        for σ in iv:
+            for d in dni:
+                widok_payoff(nazwa, S, params, d / 365, σ)
+                policzone += 1
+    return policzone
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Trwały magazyn wyników Akademii Opcji")
+    parser.add_argument("polecenie", choices=["rozgrzej", "info", "wyczysc", "sprawdz"])
+    parser.add_argument("--S", type=float, default=100.0, help="Cena aktywa")
+    parser.add_argument("--iv", type=float, nargs="+", default=[30], help="Zmienność w % (jak suwak)")
+    parser.add_argument("--dni", type=int, nargs="+", default=[30], help="Dni do wygaśnięcia")
+    args = parser.parse_args()
+
+    if args.polecenie == "sprawdz":
+        from options import zgodnosc_widokow
+        bledy = pd.concat([zgodnosc_widokow(args.S, v / 100, d / 365).assign(iv=v, dni=d)
+                           for v in args.iv for d in args.dni], ignore_index=True)
+        zle = bledy[bledy[["payoff", "koszt", "greeks"]].max(axis=1) > 1e-9]
+        print(bledy.groupby("strategia")[["payoff", "koszt", "greeks"]].max().to_string(float_format=lambda v: f"{v:.1e}"))
+        print(f"{'❌' if len(zle) else '✅'} {len(zle)} rozbieżności na {len(bledy)} widokach")
+        raise SystemExit(1 if len(zle) else 0)
+
+    m = magazyn()
+    if args.polecenie == "rozgrzej":
+        start = time.time()
+        n = rozgrzej(args.S, [v / 100 for v in args.iv], args.dni)
+        print(f"✅ {n} widoków w {time.time() - start:.1f} s -> {m.katalog}")
+    elif args.polecenie == "wyczysc":
+        m.wyczysc()
+        print(f"🧹 Wyczyszczono {m.katalog}")
+    print(f"📦 {m.rozmiar()['wpisy']} wpisów, {m.rozmiar()['bajty'] / 2**20:.1f} MB")
@@ -0,0 +1,354 @@
+"""
+🌐 SERWER WSADOWY - bezgłowy dostęp do bs() i wyceny strategii
+Lokalny serwis HTTP (asyncio, bez zależności spoza requirements) przyjmujący
+partie JSON. Małe żądania są sklejane w większe partie, a ciężkie obliczenia
+trafiają do puli procesów, więc pętla zdarzeń zostaje responsywna.
+
+Uruchomienie:
+    python server.py --port 8765 --procesy 4
+
+Endpointy (POST, JSON):
+    /wycena  {"nogi": [{"S": 100, "K": 105, "dni": 30, "sigma": 0.3, "typ": "call"}, ...]}
+             -> {"wyniki": [{"cena": ..., "delta": ..., "gamma": ..., "theta": ..., "vega": ...}, ...]}
+             "r" nogi opcjonalne - domyślnie stopa jej terminu z krzywej aplikacji (jak /payoff)
+    /payoff  {"strategie": [{"strategia": "Iron Condor", "params": {"K1": 85, ...},
+                             "S": 100, "sigma": 0.3, "dni": 30}, ...],
+              "siatka": {"od": 50, "do": 150, "n": 300}}
+             -> {"siatka": [...], "wyniki": [{"payoff": [...], "koszt": ..., "greeks": {...}}, ...]}
+Opcjonalnie "model": "bs" (jedyny dostępny model, domyślny).
+Pola S, K, sigma, T/dni i strike'i muszą być dodatnie i skończone (inaczej 400); żądania
+ponad limity MAX_* dostają 413.
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from options import bs, wycen_strategie, NOGI, KRZYWA, stopa_dla
+
+# ══════════════════════════════════════════════════════════════════════════════
+# OBLICZENIA (wykonywane w procesach roboczych)
+# ══════════════════════════════════════════════════════════════════════════════
+MODELE = {"bs": bs}
+# Limity jednego żądania - żadne nie zajmie całej pamięci ani puli procesów
+MAX_PUNKTOW = 10_000  # punktów siatki /payoff
+MAX_ELEMENTOW = 100_000  # nóg /wycena albo strategii /payoff
+MAX_WARTOSCI = 2_000_000  # strategii × punktów siatki /payoff
+MAX_CIALA = 16 * 2**20  # bajtów ciała żądania
+
+
+def _model(nazwa):
+    if nazwa not in MODELE:
+        raise ValueError(f"Nieznany model: {nazwa}")
+    return MODELE[nazwa]
+
+
+def _T(d):
+    """Czas w latach - z pola "T" albo "dni" (jak suwak w aplikacji)"""
+    return float(d["T"]) if "T" in d else float(d["dni"]) / 365
+
+
+def partia_wyceny(klucz, nogi):
+    """Jedna wektorowa wycena dla wszystkich nóg danego typu i modelu"""
+    typ, model = klucz
+    S = np.array([float(n["S"]) for n in nogi])
+    K = np.array([float(n["K"]) for n in nogi])
+    T = np.array([_T(n) for n in nogi])
+    σ = np.array([float(n["sigma"]) for n in nogi])
+    # Bez pola "r" - stopa terminu nogi z krzywej aplikacji (jak /payoff i widoki)
+    r = np.array([float(n["r"]) if "r" in n else np.nan for n in nogi])
+    r = np.where(np.isnan(r), stopa_dla(KRZYWA, T), r)
+    g = _model(model)(S, K, T, r, σ, typ)
+    kolumny = {k: np.broadcast_to(v, S.shape).tolist() for k, v in g.items()}
+    return [{k: kolumny[k][i] for k in kolumny} for i in range(len(nogi))]
+
+
+def partia_payoff(klucz, pozycje):
+    """Jedna wektorowa wycena wszystkich pozycji tej samej strategii i siatki"""
+    strategia, od, do, punkty, model = klucz
+    x = np.linspace(od, do, punkty)
+    S = np.array([float(p["S"]) for p in pozycje])
+    T = np.array([_T(p) for p in pozycje])
+    σ = np.array([float(p["sigma"]) for p in pozycje])
+    klucze = {n.strike for n in NOGI[strategia] if n.strike}
+    params = {k: np.array([float(p["params"][k]) for p in pozycje]) for k in klucze}
+    payoff, koszt, greeks = wycen_strategie(strategia, x, S, params, T, σ, model=_model(model))
+    greeks = {k: v.tolist() for k, v in greeks.items()}
+    return [{"payoff": payoff[i].tolist(), "koszt": float(koszt[i]),
+             "greeks": {k: greeks[k][i] for k in greeks}} for i in range(len(pozycje))]
+
+# ══════════════════════════════════════════════════════════════════════════════
+# SKLEJANIE ŻĄDAŃ W PARTIE
+# ══════════════════════════════════════════════════════════════════════════════
+class Koalescer:
+    """Zbiera elementy z wielu żądań i liczy je jedną partią na klucz
+
+    Partia startuje po upływie okna (okno_ms) od pierwszego elementu albo
+    po zebraniu max_partia elementów i nigdy nie jest od nich większa - dłuższa
+    kolejka (np. jedno duże żądanie) idzie kilkoma partiami. Małe partie liczone
+    są w pętli zdarzeń, większe w puli procesów.
+    """
+
+    def __init__(self, funkcja, pula, okno_ms=2.0, max_partia=4096, prog_puli=256):
+        self.funkcja = funkcja
+        self.pula = pula
+        self.okno = okno_ms / 1000
+        self.max_partia = max_partia
+        self.prog_puli = prog_puli
+        self._kolejki = defaultdict(list)
+        self._timery = {}
+        self._zadania = set()  # silne referencje do liczonych partii
+
+    async def licz(self, klucz, elementy):
+        """Dodaje elementy do partii i czeka na ich wyniki (w tej samej kolejności)"""
+        loop = asyncio.get_running_loop()
+        przyszle = [loop.create_future() for _ in elementy]
+        kolejka = self._kolejki[klucz]
+        kolejka.extend(zip(elementy, przyszle))
+        if len(kolejka) >= self.max_partia:
+            self._wyslij(klucz)
+        elif klucz not in self._timery:
+            self._timery[klucz] = loop.call_later(self.okno, self._wyslij, klucz)
+        return await asyncio.gather(*przyszle)
+
+    def _wyslij(self, klucz):
+        timer = self._timery.pop(klucz, None)
+        if timer is not None:
+            timer.cancel()
+        kolejka = self._kolejki.pop(klucz, [])
+        for i in range(0, len(kolejka), self.max_partia):
+            zadanie = asyncio.ensure_future(self._policz(klucz, kolejka[i:i + self.max_partia]))
+            self._zadania.add(zadanie)
+            zadanie.add_done_callback(self._zadania.discard)
+
+    async def _policz(self, klucz, partia):
+        elementy = [e for e, _ in partia]
+        try:
+            if self.pula is None or len(elementy) < self.prog_puli:
+                wyniki = self.funkcja(klucz, elementy)
+            else:
+                loop = asyncio.get_running_loop()
+                wyniki = await loop.run_in_executor(self.pula, self.funkcja, klucz, elementy)
+        except Exception as e:  # błąd partii trafia do każdego żądania z tej partii
+            for _, f in partia:
+                if not f.done():
+                    f.set_exception(e)
+            return
+        for (_, f), w in zip(partia, wyniki):
+            if not f.done():
+                f.set_result(w)
+
+# ══════════════════════════════════════════════════════════════════════════════
+# HTTP
+# ══════════════════════════════════════════════════════════════════════════════
+class BladZadania(Exception):
+    """Błąd po stronie klienta - odpowiedź 4xx"""
+
+    def __init__(self, status, komunikat):
+        super().__init__(komunikat)
+        self.status = status
+
+
+STATUSY = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+           500: "Internal Server Error"}
+
+
+def _sprawdz(d, pola, czas=True):
+    """Walidacja przed dołączeniem do partii - zły element nie psuje cudzych żądań
+
+    Pola z listy (i czas) muszą być skończone i dodatnie - zerowa zmienność czy
+    ujemna cena dałyby NaN w wyniku. Opcjonalne "r" musi być skończone.
+    """
+    if not isinstance(d, dict):
+        raise BladZadania(400, "Element partii musi być obiektem JSON")
+    if czas:
+        if "T" not in d and "dni" not in d:
+            raise BladZadania(400, "Brak pola 'T' lub 'dni'")
+        pola = pola + ("T" if "T" in d else "dni",)
+    for p in pola:
+        try:
+            v = float(d[p])
+        except (KeyError, TypeError, ValueError):
+            raise BladZadania(400, f"Pole '{p}' musi być liczbą")
+        if not (np.isfinite(v) and v > 0):
+            raise BladZadania(400, f"Pole '{p}' musi być dodatnie i skończone")
+    if "r" in d:
+        try:
+            r = float(d["r"])
+        except (TypeError, ValueError):
+            raise BladZadania(400, "Pole 'r' musi być liczbą")
+        if not np.isfinite(r):
+            raise BladZadania(400, "Pole 'r' musi być skończone")
+
+
+def _siatka(siatka, S0):
+    """Siatka cen /payoff: 0 < od < do, 2 <= n <= MAX_PUNKTOW (domyślnie ±50% S pierwszej strategii, 300 punktów)"""
+    if not isinstance(siatka, dict):
+        raise BladZadania(400, "Pole 'siatka' musi być obiektem JSON")
+    siatka = {"od": S0 * 0.5, "do": S0 * 1.5, "n": 300, **siatka}
+    _sprawdz(siatka, ("od", "do", "n"), czas=False)
+    od, do, n = float(siatka["od"]), float(siatka["do"]), float(siatka["n"])
+    if not od < do:
+        raise BladZadania(400, "Siatka: 'od' musi być mniejsze niż 'do'")
+    if n != int(n) or not 2 <= n <= MAX_PUNKTOW:
+        raise BladZadania(400, f"Siatka: 'n' musi być liczbą całkowitą od 2 do {MAX_PUNKTOW}")
+    return od, do, int(n)
+
+
+def _model_zadania(dane):
+    model = dane.get("model", "bs")
+    if model not in MODELE:
+        raise BladZadania(400, f"Nieznany model: {model}")
+    return model
+
+
+class Serwer:
+    def __init__(self, pula=None, okno_ms=2.0):
+        self.wycena = Koalescer(partia_wyceny, pula, okno_ms)
+        self.payoff = Koalescer(partia_payoff, pula, okno_ms, max_partia=512, prog_puli=8)
+        self.trasy = {"/wycena": self.obsluz_wycene, "/payoff": self.obsluz_payoff, "/zdrowie": self.obsluz_zdrowie}
+        self.start = time.time()
+        self.licznik = 0
+
+    async def obsluz_wycene(self, dane):
+        model = _model_zadania(dane)
+        nogi = dane.get("nogi")
+        if not isinstance(nogi, list):
+            raise BladZadania(400, "Pole 'nogi' musi być listą")
+        if len(nogi) > MAX_ELEMENTOW:
+            raise BladZadania(413, f"Za dużo nóg: {len(nogi)} (limit {MAX_ELEMENTOW})")
+        wyniki = [None] * len(nogi)
+        grupy = defaultdict(list)
+        for i, n in enumerate(nogi):
+            _sprawdz(n, ("S", "K", "sigma"))
+            typ = n.get("typ", "call")
+            if typ not in ("call", "put"):
+                raise BladZadania(400, f"Nieznany typ opcji: {typ}")
+            grupy[(typ, model)].append(i)
+        obliczone = await asyncio.gather(*(self.wycena.licz(k, [nogi[i] for i in idx]) for k, idx in grupy.items()))
+        for idx, w in zip(grupy.values(), obliczone):
+            for i, wynik in zip(idx, w):
+                wyniki[i] = wynik
+        return {"wyniki": wyniki}
+
+    async def obsluz_payoff(self, dane):
+        model = _model_zadania(dane)
+        strategie = dane.get("strategie")
+        if not isinstance(strategie, list) or not strategie:
+            raise BladZadania(400, "Pole 'strategie' musi być niepustą listą")
+        if len(strategie) > MAX_ELEMENTOW:
+            raise BladZadania(413, f"Za dużo strategii: {len(strategie)} (limit {MAX_ELEMENTOW})")
+        _sprawdz(strategie[0], ("S",), czas=False)
+        od, do, punkty = _siatka(dane.get("siatka", {}), float(strategie[0]["S"]))
+        if len(strategie) * punkty > MAX_WARTOSCI:
+            raise BladZadania(413, f"Za duży wynik: {len(strategie)} strategii × {punkty} punktów "
+                                   f"(limit {MAX_WARTOSCI} wartości)")
+        wyniki = [None] * len(strategie)
+        grupy = defaultdict(list)
+        for i, p in enumerate(strategie):
+            _sprawdz(p, ("S", "sigma"))
+            if p.get("strategia") not in NOGI:
+                raise BladZadania(400, f"Nieznana strategia: {p.get('strategia')}")
+            strike = tuple(n.strike for n in NOGI[p["strategia"]] if n.strike)
+            _sprawdz(p.get("params"), strike, czas=False)
+            grupy[(p["strategia"], od, do, punkty, model)].append(i)
+        obliczone = await asyncio.gather(*(self.payoff.licz(k, [strategie[i] for i in idx]) for k, idx in grupy.items()))
+        for idx, w in zip(grupy.values(), obliczone):
+            for i, wynik in zip(idx, w):
+                wyniki[i] = wynik
+        return {"siatka": np.linspace(od, do, punkty).tolist(), "wyniki": wyniki}
+
+    async def obsluz_zdrowie(self, dane):
+        return {"status": "ok", "czas_pracy": time.time() - self.start, "zadania": self.licznik}
+
+    async def polaczenie(self, reader, writer):
+        """Obsługa jednego połączenia HTTP/1.1 (z keep-alive)"""
+        try:
+            while True:
+                linia = await reader.readline()
+                if not linia:
+                    break
+                try:
+                    metoda, sciezka, _ = linia.decode("latin-1").split(" ", 2)
+                except ValueError:
+                    break
+                naglowki = {}
+                while True:
+                    h = await reader.readline()
+                    if h in (b"\r\n", b"\n", b""):
+                        break
+                    nazwa, _, wartosc = h.decode("latin-1").partition(":")
+                    naglowki[nazwa.strip().lower()] = wartosc.strip()
+                zamknij = naglowki.get("connection", "").lower() == "close"
+                try:
+                    dlugosc = int(naglowki.get("content-length", 0))
+                except ValueError:
+                    dlugosc = -1
+                # Bez wczytanego ciała nie wiadomo, gdzie zaczyna się następne żądanie - koniec połączenia
+                if dlugosc < 0:
+                    status, odpowiedz, zamknij = 400, {"blad": "Niepoprawny nagłówek Content-Length"}, True
+                elif dlugosc > MAX_CIALA:
+                    status, odpowiedz, zamknij = 413, {"blad": f"Ciało żądania ponad {MAX_CIALA} bajtów"}, True
+                else:
+                    cialo = await reader.readexactly(dlugosc)
+                    status, odpowiedz = await self.wykonaj(metoda, sciezka, cialo)
+                try:
+                    tresc = json.dumps(odpowiedz, allow_nan=False).encode()
+                except ValueError:  # NaN/inf w wyniku - błąd zamiast niepoprawnego JSON
+                    status, tresc = 500, json.dumps({"blad": "Wynik zawiera NaN lub nieskończoność"}).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} {STATUSY[status]}\r\n"
+                    f"Content-Type: application/json\r\nContent-Length: {len(tresc)}\r\n"
+                    f"Connection: {'close' if zamknij else 'keep-alive'}\r\n\r\n".encode() + tresc
+                )
+                await writer.drain()
+                if zamknij:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def wykonaj(self, metoda, sciezka, cialo):
+        self.licznik += 1
+        obsluga = self.trasy.get(sciezka.split("?", 1)[0])
+        if obsluga is None:
+            return 404, {"blad": f"Nieznana ścieżka: {sciezka}"}
+        if metoda not in ("POST", "GET"):
+            return 405, {"blad": f"Metoda {metoda} nieobsługiwana"}
+        try:
+            dane = json.loads(cialo) if cialo else {}
+            return 200, await obsluga(dane)
+        except BladZadania as e:
+            return e.status, {"blad": str(e)}
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+            return 400, {"blad": f"Niepoprawne dane: {e!r}"}
+        except Exception as e:
+            return 500, {"blad": repr(e)}
+
+
+async def uruchom(host, port, procesy, okno_ms):
+    pula = ProcessPoolExecutor(procesy) if procesy > 0 else None
+    serwer = Serwer(pula, okno_ms)
+    srv = await asyncio.start_server(serwer.polaczenie, host, port)
+    print(f"🌐 Serwer wsadowy na http://{host}:{port} (procesy: {procesy}, okno: {okno_ms} ms)")
+    try:
+        async with srv:
+            await srv.serve_forever()
+    finally:
+        if pula is not None:
+            pula.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bezgłowy serwer wsadowy Akademii Opcji")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--procesy", type=int, default=2, help="Rozmiar puli procesów (0 = bez puli)")
+    parser.add_argument("--okno-ms", type=float, default=2.0, help="Okno sklejania żądań w ms")
+    args = parser.parse_args()
+    asyncio.run(uruchom(args.host, args.port, args.procesy, args.okno_ms))
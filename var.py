@@ -0,0 +1,257 @@
+"""
+🎲 VaR PORTFELA - Monte Carlo z korelacją wielu instrumentów
+Książka pozycji na wielu instrumentach, macierz korelacji z pliku, skorelowane
+ruchy cen (Cholesky, opcjonalnie quasi-losowy ciąg Sobola), pełna rewaluacja
+każdej nogi wektorowym bs() na horyzoncie i VaR / ES z rozkładem na instrumenty.
+
+Scenariusze liczone są partiami (pamięć ~ partia × liczba nóg, nie liczba
+scenariuszy), partie idą równolegle w puli procesów. Kontrybucje liczone są
+w dwóch przebiegach: pierwszy zbiera tylko P&L portfela (jedna liczba na
+scenariusz), drugi odtwarza te same scenariusze i przelicza wyłącznie ogon.
+Kontrybucje Eulera sumują się do VaR i ES portfela.
+
+Użycie:
+    python var.py pozycje.csv --korelacja korelacje.csv --scenariusze 100000 --procesy 8
+    python var.py pozycje.csv --horyzont 10 --alfa 0.975 --sobol
+Plik pozycji: jak w feed.py. Korelacje: CSV z symbolami w wierszach i kolumnach
+(brakujące pary = 0).
+"""
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtri
+
+from options import NOGI, KRZYWA, bs, stopa_dla
+
+MNOZNIK = 100  # akcji na kontrakt
+BLOK = 1024    # scenariuszy na jedno ziarno - wynik nie zależy od wielkości partii
+
+# ══════════════════════════════════════════════════════════════════════════════
+# KSIĄŻKA I KORELACJE
+# ══════════════════════════════════════════════════════════════════════════════
+def splaszcz_ksiazke(pozycje, horyzont, r=None, model=bs):
+    """Nogi wszystkich pozycji jako tablice, posortowane po (typ, instrument)"""
+    r = KRZYWA if r is None else r
+    symbole = list(dict.fromkeys(pozycje["symbol"].astype(str)))
+    indeks = {s: u for u, s in enumerate(symbole)}
+    pierwsze = pozycje.assign(symbol=pozycje["symbol"].astype(str)).groupby("symbol", sort=False).first()
+    S0 = pierwsze.loc[symbole, "S"].to_numpy(float)
+    σ = pierwsze.loc[symbole, "sigma"].to_numpy(float)
+
+    akcje = np.zeros(len(symbole))
+    nogi = {"call": ([], [], [], []), "put": ([], [], [], [])}
+    for w in pozycje.to_dict("records"):
+        if w["strategia"] not in NOGI:
+            raise KeyError(f"Nieznana strategia: {w['strategia']}")
+        u = indeks[str(w["symbol"])]
+        ilosc = float(w["ilosc"]) * MNOZNIK
+        for n in NOGI[w["strategia"]]:
+            if n.typ == "akcja":
+                akcje[u] += n.ilosc * ilosc
+                continue
+            lista = nogi[n.typ]
+            lista[0].append(u)
+            lista[1].append(float(w[n.strike]))
+            lista[2].append(n.termin * float(w["dni"]) / 365)
+            lista[3].append(n.ilosc * ilosc)
+
+    wynik = {"symbole": symbole, "S0": S0, "σ": σ, "akcje": akcje, "horyzont": horyzont, "r": r, "model": model}
+    for typ, (u, K, T, waga) in nogi.items():
+        u = np.array(u, dtype=np.intp)
+        kolejnosc = np.argsort(u, kind="stable")
+        u, K, T, waga = u[kolejnosc], np.array(K)[kolejnosc], np.array(T)[kolejnosc], np.array(waga)[kolejnosc]
+        T_h = np.maximum(T - horyzont, 0.0)
+        grupy, poczatki = np.unique(u, return_index=True)
+        wynik[typ] = {"u": u, "K": K, "T_h": T_h, "r_h": np.asarray(stopa_dla(r, T_h)) * np.ones_like(T_h),
+                      "waga": waga, "grupy": grupy, "poczatki": poczatki,
+                      "V0": model(S0[u], K, T, np.asarray(stopa_dla(r, T)), σ[u], typ)["cena"] if len(u) else K}
+    return wynik
+
+
+def wczytaj_korelacje(sciezka, symbole):
+    """Macierz korelacji w kolejności symboli książki - brakujące pary = 0"""
+    df = pd.read_csv(sciezka, index_col=0)
+    df.index, df.columns = df.index.astype(str), df.columns.astype(str)
+    C = df.reindex(index=symbole, columns=symbole).to_numpy(float)
+    C = np.nan_to_num(C, nan=0.0)
+    np.fill_diagonal(C, 1.0)
+    return 0.5 * (C + C.T)
+
+
+def cholesky(C):
+    """Czynnik Choleskiego; macierz nie-PSD (np. sklejona z różnych źródeł)
+    jest najpierw rzutowana na najbliższą PSD przez obcięcie wartości własnych"""
+    try:
+        return np.linalg.cholesky(C)
+    except np.linalg.LinAlgError:
+        w, V = np.linalg.eigh(C)
+        C = (V * np.maximum(w, 1e-10)) @ V.T
+        d = np.sqrt(np.diag(C))
+        return np.linalg.cholesky(C / np.outer(d, d))
+
+# ══════════════════════════════════════════════════════════════════════════════
+# SCENARIUSZE (wykonywane w procesach roboczych)
+# ══════════════════════════════════════════════════════════════════════════════
+_STAN = None
+
+
+def _ustaw_stan(stan):
+    global _STAN
+    _STAN = stan
+
+
+def _normalne(stan, start, liczba):
+    """Scenariusze start..start+liczba - deterministyczne, niezależne od podziału na partie"""
+    U = len(stan["symbole"])
+    if stan["sobol"]:
+        from scipy.stats import qmc
+        sobol = qmc.Sobol(U, scramble=True, seed=stan["ziarno"])
+        if start:
+            sobol.fast_forward(start)
+        return ndtri(np.clip(sobol.random(liczba), 1e-12, 1 - 1e-12))
+    bloki = range(start // BLOK, -(-(start + liczba) // BLOK))
+    Z = np.concatenate([np.random.default_rng([stan["ziarno"], b]).standard_normal((BLOK, U)) for b in bloki])
+    return Z[start - bloki[0] * BLOK:][:liczba]
+
+
+def _pnl_instrumentow(stan, Z):
+    """P&L na instrument w każdym scenariuszu - (scenariusze, instrumenty)"""
+    h = stan["horyzont"]
+    X = Z @ stan["chol"].T
+    S_h = stan["S0"] * np.exp((stan["mu"] - 0.5 * stan["σ"]**2) * h + stan["σ"] * np.sqrt(h) * X)
+    pnl = (S_h - stan["S0"]) * stan["akcje"]
+    for typ in ("call", "put"):
+        nogi = stan[typ]
+        if not len(nogi["u"]):
+            continue
+        u = nogi["u"]
+        V = stan["model"](S_h[:, u], nogi["K"], nogi["T_h"], nogi["r_h"], stan["σ"][u], typ)["cena"]
+        pnl[:, nogi["grupy"]] += np.add.reduceat((V - nogi["V0"]) * nogi["waga"], nogi["poczatki"], axis=1)
+    return pnl
+
+
+def _partia_pnl(zadanie):
+    """Przebieg 1: tylko P&L portfela"""
+    start, liczba = zadanie
+    return _pnl_instrumentow(_STAN, _normalne(_STAN, start, liczba)).sum(axis=1)
+
+
+def _partia_ogona(zadanie):
+    """Przebieg 2: sumy P&L instrumentów w wybranych wierszach partii"""
+    start, liczba, wiersze_es, wiersze_var = zadanie
+    Z = _normalne(_STAN, start, liczba)
+    wiersze = np.concatenate([wiersze_es, wiersze_var])
+    pnl = _pnl_instrumentow(_STAN, Z[wiersze])
+    return pnl[: len(wiersze_es)].sum(axis=0), pnl[len(wiersze_es):].sum(axis=0)
+
+# ══════════════════════════════════════════════════════════════════════════════
+# API
+# ══════════════════════════════════════════════════════════════════════════════
+def var_portfela(pozycje, korelacja=None, scenariusze=100_000, horyzont_dni=1, alfa=0.99, mu=0.0,
+                 sobol=False, partia=None, procesy=1, ziarno=0, r=None, model=bs):
+    """VaR i ES portfela wielu instrumentów z kontrybucjami instrumentów
+
+    korelacja - macierz (w kolejności pierwszego wystąpienia symboli), DataFrame
+                z symbolami albo None (niezależne instrumenty)
+    partia    - scenariuszy na zadanie; domyślnie tak, by partia × nogi ≈ 2 mln
+    Wartości w PLN (ilość × 100 akcji na kontrakt), strata dodatnia.
+    """
+    ksiazka = splaszcz_ksiazke(pozycje, horyzont_dni / 365, r, model)
+    symbole = ksiazka["symbole"]
+    if korelacja is None:
+        C = np.eye(len(symbole))
+    elif isinstance(korelacja, pd.DataFrame):
+        C = korelacja.reindex(index=symbole, columns=symbole).fillna(0.0).to_numpy(float)
+        np.fill_diagonal(C, 1.0)
+    else:
+        C = np.asarray(korelacja, dtype=float)
+    stan = {**ksiazka, "chol": cholesky(C), "mu": mu, "sobol": sobol, "ziarno": ziarno}
+
+    liczba_nog = len(ksiazka["call"]["u"]) + len(ksiazka["put"]["u"])
+    partia = partia or int(np.clip(2_000_000 // max(liczba_nog, 1), 64, 50_000))
+    if sobol:
+        partia = 1 << (partia.bit_length() - 1)  # potęga 2 zachowuje równomierność ciągu Sobola
+    starty = list(range(0, scenariusze, partia))
+    zadania = [(s, min(partia, scenariusze - s)) for s in starty]
+
+    pula = ProcessPoolExecutor(procesy, initializer=_ustaw_stan, initargs=(stan,)) if procesy > 1 else None
+    try:
+        if pula is None:
+            _ustaw_stan(stan)
+            pnl = np.concatenate([_partia_pnl(z) for z in zadania])
+        else:
+            pnl = np.concatenate(list(pula.map(_partia_pnl, zadania)))
+
+        # Ogon (ES) i otoczenie kwantyla (VaR) - indeksy scenariuszy
+        k = max(1, int(np.ceil((1 - alfa) * scenariusze)))
+        kolejnosc = np.argsort(pnl, kind="stable")
+        ogon = kolejnosc[:k]
+        okno = max(1, scenariusze // 500)
+        otoczenie = kolejnosc[max(0, k - 1 - okno): k + okno]
+        var = -pnl[kolejnosc[k - 1]]
+        es = -pnl[ogon].mean()
+
+        zadania_ogona = []
+        for s, n in zadania:
+            w_es = ogon[(ogon >= s) & (ogon < s + n)] - s
+            w_var = otoczenie[(otoczenie >= s) & (otoczenie < s + n)] - s
+            if len(w_es) or len(w_var):
+                zadania_ogona.append((s, n, w_es, w_var))
+        if pula is None:
+            wyniki = [_partia_ogona(z) for z in zadania_ogona]
+        else:
+            wyniki = list(pula.map(_partia_ogona, zadania_ogona))
+    finally:
+        if pula is not None:
+            pula.shutdown()
+
+    suma_es = sum(w[0] for w in wyniki)
+    suma_var = sum(w[1] for w in wyniki)
+    kontrybucja_es = -suma_es / len(ogon)
+    kontrybucja_var = -suma_var / len(otoczenie)
+    # Otoczenie kwantyla daje kierunek; skalujemy, by kontrybucje sumowały się do VaR
+    kontrybucja_var = kontrybucja_var * (var / kontrybucja_var.sum()) if kontrybucja_var.sum() else kontrybucja_var
+
+    tabela = pd.DataFrame({"symbol": symbole, "kontrybucja_VaR": kontrybucja_var, "kontrybucja_ES": kontrybucja_es,
+                           "udzial_ES": kontrybucja_es / es if es else np.nan})
+    return {
+        "VaR": float(var),
+        "ES": float(es),
+        "alfa": alfa,
+        "horyzont_dni": horyzont_dni,
+        "scenariusze": scenariusze,
+        "pnl": pnl,
+        "kontrybucje": tabela.sort_values("kontrybucja_ES", ascending=False, ignore_index=True),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monte Carlo VaR / ES portfela wielu instrumentów")
+    parser.add_argument("pozycje", help="Plik pozycji (CSV)")
+    parser.add_argument("--korelacja", help="CSV macierzy korelacji (symbole w wierszach i kolumnach)")
+    parser.add_argument("--scenariusze", type=int, default=100_000)
+    parser.add_argument("--horyzont", type=float, default=1, help="Horyzont w dniach")
+    parser.add_argument("--alfa", type=float, default=0.99)
+    parser.add_argument("--sobol", action="store_true", help="Quasi-losowy ciąg Sobola zamiast pseudolosowego")
+    parser.add_argument("--partia", type=int, help="Scenariuszy na zadanie (domyślnie automatycznie)")
+    parser.add_argument("--procesy", type=int, default=1)
+    parser.add_argument("--ziarno", type=int, default=0)
+    parser.add_argument("-o", "--wyjscie", help="CSV z kontrybucjami instrumentów")
+    args = parser.parse_args()
+
+    pozycje = pd.read_csv(args.pozycje)
+    korelacja = None
+    if args.korelacja:
+        korelacja = wczytaj_korelacje(args.korelacja, list(dict.fromkeys(pozycje["symbol"].astype(str))))
+    start = time.time()
+    wynik = var_portfela(pozycje, korelacja, args.scenariusze, args.horyzont, args.alfa, sobol=args.sobol,
+                         partia=args.partia, procesy=args.procesy, ziarno=args.ziarno)
+    print(f"🎲 {args.scenariusze} scenariuszy, horyzont {args.horyzont:g} d, α = {args.alfa} "
+          f"({time.time() - start:.1f} s)")
+    print(f"   VaR: {wynik['VaR']:,.0f} PLN | ES: {wynik['ES']:,.0f} PLN")
+    print(wynik["kontrybucje"].head(10).to_string(index=False))
+    if args.wyjscie:
+        wynik["kontrybucje"].to_csv(args.wyjscie, index=False)